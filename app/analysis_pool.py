@@ -0,0 +1,248 @@
+"""
+analysis_pool.py
+- 여러 분석 워커 스레드가 서로 다른 유저의 윈도우를 동시에 처리
+- 같은 유저의 윈도우는 제출된 순서대로 한 번에 하나씩만 처리 (유저별 순서 보장)
+- 대기열 크기 제한(max_pending): 가득 차면 제출 측을 최대 put_timeout_sec 동안 블로킹(backpressure), 이후 폐기
+- 유저별 윈도우 병합(coalesce): 이미 대기 중인 윈도우가 있으면 새 윈도우를 합치거나(merge) 교체(replace)
+- 워커별 busy/idle 상태와 큐 대기시간/깊이/병합/폐기 통계 제공
+"""
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.logging.logger import get_logger
+from app.metrics import metrics
+
+log = get_logger("mindtrack.analysis_pool")
+
+COALESCE_MODES = ("none", "merge", "replace")
+
+
+class WorkerState:
+    """분석 워커 한 개의 현재 상태"""
+    def __init__(self, name: str):
+        self.name = name
+        self.busy = False
+        self.user_id: Optional[int] = None
+        self.since = time.time()
+        self.processed = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "state": "busy" if self.busy else "idle",
+            "user_id": self.user_id,
+            "since_sec": round(time.time() - self.since, 3),
+            "processed": self.processed,
+        }
+
+
+class AnalysisPool:
+    """
+    유저별 순서를 보장하는 분석 워커 풀.
+    - submit(user_id, job): 유저별 대기열에 작업 추가
+    - 한 유저의 작업이 처리 중이면 그 유저의 다음 작업은 완료될 때까지 대기
+    - 처리 가능한 유저는 ready 큐(FIFO)로 워커들에게 분배
+    - coalesce="merge"면 merge_fn(old_job, new_job) → (합친 작업, 폐기할 작업 또는 None)으로 대기 작업을 갱신,
+      "replace"면 새 작업으로 교체하고 이전 작업은 discard_fn으로 정리
+      (폐기할 작업은 락 밖에서 discard_fn으로 정리)
+    """
+    def __init__(
+        self,
+        handler: Callable[[int, Any], None],
+        num_workers: int = 4,
+        name: str = "analyze",
+        max_pending: int = 0,
+        coalesce: str = "none",
+        put_timeout_sec: float = 5,
+        merge_fn: Optional[Callable[[Any, Any], Any]] = None,
+        discard_fn: Optional[Callable[[int, Any], None]] = None,
+    ):
+        if coalesce not in COALESCE_MODES:
+            raise ValueError(f"coalesce는 {COALESCE_MODES} 중 하나여야 합니다: {coalesce}")
+        if coalesce == "merge" and merge_fn is None:
+            raise ValueError("coalesce='merge'에는 merge_fn이 필요합니다.")
+
+        self.handler = handler
+        self.num_workers = max(1, num_workers)
+        self.name = name
+        self.max_pending = max(0, max_pending)  # 0이면 무제한
+        self.coalesce = coalesce
+        self.put_timeout_sec = put_timeout_sec
+        self.merge_fn = merge_fn
+        self.discard_fn = discard_fn
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)  # 워커: 처리할 유저가 생길 때까지 대기
+        self._not_full = threading.Condition(self._lock)   # 제출 측: 대기열에 자리가 날 때까지 대기
+        self._pending: Dict[int, Deque[Tuple[float, Any]]] = {}  # uid -> [(enqueued_at, job)]
+        self._depth = 0                     # 대기 중인 전체 작업 수
+        self._ready: Deque[int] = deque()   # 처리 가능한 uid (처리 중이 아닌 유저만)
+        self._running = set()               # 현재 처리 중인 uid
+        self._workers: List[WorkerState] = []
+        self._started = False
+
+        # 큐 대기시간 통계 (submit → 처리 시작)
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+        # 병합/교체, 폐기 횟수
+        self._coalesced = 0
+        self._dropped = 0
+
+    def start(self):
+        """워커 스레드 시작 (중복 호출 시 무시)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for i in range(self.num_workers):
+            state = WorkerState(f"{self.name}-{i}")
+            self._workers.append(state)
+            threading.Thread(target=self._run, args=(state,), daemon=True, name=state.name).start()
+        log.info(
+            f"[POOL] 분석 워커 {self.num_workers}개 시작 "
+            f"(max_pending={self.max_pending or '무제한'}, coalesce={self.coalesce})"
+        )
+
+    def submit(self, user_id: int, job: Any) -> str:
+        """
+        유저의 분석 작업을 대기열에 추가.
+        반환값: "queued" | "merged" | "replaced" | "dropped"
+        """
+        discarded = None
+        with self._lock:
+            queue = self._pending.get(user_id)
+            if queue and self.coalesce != "none":
+                # 이미 대기 중인 윈도우가 있으면 대기열을 늘리지 않고 합치거나 교체
+                enqueued_at, old_job = queue[-1]
+                if self.coalesce == "merge":
+                    merged, discarded = self.merge_fn(old_job, job)
+                    queue[-1] = (enqueued_at, merged)
+                    outcome = "merged"
+                else:
+                    queue[-1] = (enqueued_at, job)
+                    discarded = old_job
+                    outcome = "replaced"
+                self._coalesced += 1
+            else:
+                # 대기열이 가득 차면 자리가 날 때까지 제출 측을 블로킹 (backpressure)
+                deadline = time.time() + self.put_timeout_sec
+                while self.max_pending and self._depth >= self.max_pending:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._not_full.wait(remaining)
+
+                if self.max_pending and self._depth >= self.max_pending:
+                    self._dropped += 1
+                    discarded = job
+                    outcome = "dropped"
+                else:
+                    queue = self._pending.setdefault(user_id, deque())
+                    queue.append((time.time(), job))
+                    self._depth += 1
+                    # 처리 중이 아니고 ready 큐에도 없는 유저면 ready 큐에 등록
+                    if user_id not in self._running and len(queue) == 1:
+                        self._ready.append(user_id)
+                        self._not_empty.notify()
+                    outcome = "queued"
+            depth = self._depth
+
+        if outcome != "queued":
+            metrics.incr(f"analysis_queue_{outcome}")
+            log.info(f"[POOL] user={user_id} 윈도우 {outcome} (depth={depth})")
+        if discarded is not None and self.discard_fn is not None:
+            try:
+                self.discard_fn(user_id, discarded)
+            except Exception as e:
+                log.exception(f"[POOL] user={user_id} 폐기 작업 정리 오류: {e}")
+        return outcome
+
+    def qsize(self) -> int:
+        """대기 중인 전체 작업 수"""
+        with self._lock:
+            return self._depth
+
+    def has_work(self, user_id: int) -> bool:
+        """유저의 작업이 대기 중이거나 처리 중이면 True"""
+        with self._lock:
+            return user_id in self._running or bool(self._pending.get(user_id))
+
+    def oldest_wait_sec(self) -> float:
+        """가장 오래 대기 중인 작업의 대기 시간 (없으면 0)"""
+        with self._lock:
+            oldest = min((q[0][0] for q in self._pending.values()), default=None)
+        return time.time() - oldest if oldest else 0.0
+
+    def _next_job(self) -> Tuple[int, float, Any]:
+        with self._lock:
+            while not self._ready:
+                self._not_empty.wait()
+            user_id = self._ready.popleft()
+            enqueued_at, job = self._pending[user_id].popleft()
+            if not self._pending[user_id]:
+                del self._pending[user_id]
+            self._depth -= 1
+            self._running.add(user_id)
+            self._not_full.notify()
+            return user_id, enqueued_at, job
+
+    def _finish(self, user_id: int):
+        with self._lock:
+            self._running.discard(user_id)
+            # 같은 유저의 다음 윈도우가 쌓여 있으면 다시 ready 큐로
+            if self._pending.get(user_id):
+                self._ready.append(user_id)
+                self._not_empty.notify()
+
+    def _record_wait(self, wait: float):
+        with self._lock:
+            self._wait_count += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._wait_last = wait
+
+    def _run(self, state: WorkerState):
+        while True:
+            user_id, enqueued_at, job = self._next_job()
+            wait = time.time() - enqueued_at
+            self._record_wait(wait)
+
+            state.busy, state.user_id, state.since = True, user_id, time.time()
+            log.info(f"[PERF] {state.name} user={user_id} 분석 큐 대기시간: {wait:.2f}s")
+            try:
+                self.handler(user_id, job)
+            except Exception as e:
+                log.exception(f"[POOL] {state.name} user={user_id} 작업 처리 오류: {e}")
+            finally:
+                state.processed += 1
+                state.busy, state.user_id, state.since = False, None, time.time()
+                self._finish(user_id)
+
+    def stats(self) -> dict:
+        """워커 상태 및 큐 통계 스냅샷"""
+        with self._lock:
+            oldest = min((q[0][0] for q in self._pending.values()), default=None)
+            wait_avg = self._wait_total / self._wait_count if self._wait_count else 0.0
+            return {
+                "workers": [w.to_dict() for w in self._workers],
+                "busy_workers": sum(1 for w in self._workers if w.busy),
+                "queue": {
+                    "depth": self._depth,
+                    "max_pending": self.max_pending,
+                    "pending_users": len(self._pending),
+                    "oldest_wait_sec": round(time.time() - oldest, 3) if oldest else 0.0,
+                    "coalesce": self.coalesce,
+                    "coalesced": self._coalesced,
+                    "dropped": self._dropped,
+                },
+                "wait_sec": {
+                    "count": self._wait_count,
+                    "avg": round(wait_avg, 3),
+                    "max": round(self._wait_max, 3),
+                    "last": round(self._wait_last, 3),
+                },
+            }
@@ -0,0 +1,205 @@
+"""
+async_integration_service.py
+- IntegrationService의 asyncio 버전 (AsyncOpenAI 클라이언트 사용)
+- LLM/임베딩 호출은 이벤트 루프에서 await 하므로 스레드 하나가 여러 유저 사이클의 응답을 동시에 기다린다.
+- CPU 작업(ResNet 대표 이미지 선택, tesseract OCR/PII)과 벡터DB 접근은 stage_executor로 넘겨 루프를 막지 않는다.
+- 단계 그래프 구성/결과 조립은 IntegrationService와 공유하고, 단계 함수만 코루틴으로 대체한다.
+- OpenAI 모듈은 AsyncOpenAI 버전만 생성하고(동기 클라이언트 없음), 텍스트 임베딩은 AsyncMicroBatcher로
+  이벤트 루프 안에서 모아 요청한다.
+"""
+import time
+import asyncio
+import functools
+
+from config_loader import config
+from app.integration_service import IntegrationService
+from app.degradation import LEVEL_FULL
+from app.micro_batcher import AsyncMicroBatcher
+from modules.image_description import AsyncImageDescription, AsyncEmbeddingGenerator
+from modules.action_predictor import AsyncActionPredictor, AsyncDescribeAndPredict
+from modules.history_qa import AsyncHistoryQA
+from modules.streaming import IncrementalJSONParser
+
+
+class AsyncIntegrationService(IntegrationService):
+    """
+    사용 예)
+        service = AsyncIntegrationService()
+        results = await asyncio.gather(*(service.run_image_cycle(frames, user_id=uid) for uid, frames in windows))
+    client_kwargs는 AsyncOpenAI 생성 인자로 전달된다. (예: base_url로 로컬 가짜 서버 지정)
+    """
+    def __init__(self, **client_kwargs):
+        self._client_kwargs = client_kwargs
+        super().__init__()
+
+    def _init_clients(self):
+        client_kwargs = self._client_kwargs
+        self.image_desc = AsyncImageDescription(
+            model_name=config["openai"]["image_description_model"], cache=self.description_cache,
+            optimizer=self.payload_optimizer, **client_kwargs
+        )
+        self.embed_gen = AsyncEmbeddingGenerator(
+            model_name=config["openai"]["embedding_model"], cache=self.embedding_cache, **client_kwargs
+        )
+        self.action_predictor = AsyncActionPredictor(
+            model_name=config["openai"]["action_predictor_model"], **client_kwargs
+        )
+        self.describe_predictor = AsyncDescribeAndPredict(
+            model_name=config["openai"].get("describe_predict_model", config["openai"]["action_predictor_model"]),
+            optimizer=self.payload_optimizer, **client_kwargs
+        )
+        self.history_qa = AsyncHistoryQA(
+            model_name=config["openai"]["history_qa_model"], **client_kwargs
+        )
+
+    def _embed_batcher(self, batch_cfg: dict):
+        return AsyncMicroBatcher(
+            self.embed_gen.generate_embeddings, max_wait_ms=batch_cfg.get("max_wait_ms", 5),
+            max_batch=batch_cfg.get("max_texts", 256), name="embeddings",
+        )
+
+    async def _offload(self, fn, *args):
+        """CPU/블로킹 작업을 stage_executor 스레드에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.stage_executor, functools.partial(fn, *args))
+
+    async def run_image_cycle(self, source, degradation_level: int = LEVEL_FULL, user_id=None, on_partial=None):
+        """IntegrationService.run_image_cycle과 같은 결과를 반환하는 코루틴"""
+        frames, degradation_level = await self._offload(self._prepare_cycle, source, degradation_level, user_id)
+        start_total = time.perf_counter()  # 🔹 전체 사이클 시작 시간
+        run = await self._cycle_graph(frames, degradation_level, user_id, on_partial).run_async()
+        return self._finish_cycle(run, degradation_level, user_id, start_total)
+
+    # ------------------------------------------------------------------
+    # 단계 함수 (코루틴)
+    # ------------------------------------------------------------------
+    async def _select(self, frames):
+        return await self._offload(super()._select, frames)
+
+    async def _fingerprint(self, rep_frame, user_id) -> dict:
+        return await self._offload(super()._fingerprint, rep_frame, user_id)
+
+    async def _redact(self, rep_frame):
+        return await self._offload(super()._redact, rep_frame)
+
+    async def _describe(self, frame, detail: str) -> str:
+        return self._description_text(await self.image_desc.generate_description(frame, detail=detail), detail)
+
+    async def _describe_and_predict(self, frame, detail: str, folder_context, recent_context: str,
+                                    similar_context: str):
+        output_text = await self.describe_predictor.describe_and_predict(
+            frame, detail, folder_context, recent_context, similar_context
+        )
+        return self._split_fused(output_text, detail)
+
+    async def _embed(self, description_text: str):
+        cached = self.embed_gen.lookup(description_text)
+        if cached is not None:
+            return cached
+        if self.embed_batcher is not None:
+            return await self.embed_batcher.submit(description_text)
+        return await self.embed_gen.generate_embedding(description_text)
+
+    async def _store(self, rep_frame, description_text: str, embedding, user_id=None):
+        return await self._offload(super()._store, rep_frame, description_text, embedding, user_id)
+
+    async def _recent_context(self, user_id=None) -> str:
+        return await self._offload(super()._recent_context, user_id)
+
+    async def _similar_context(self, embedding, user_id=None) -> str:
+        return await self._offload(super()._similar_context, embedding, user_id)
+
+    async def _predict(self, description_text: str, folder_context, recent_context: str, similar_context: str,
+                       on_prediction=None) -> str:
+        prompt_context = self._prompt_context(description_text, folder_context)
+        if not self.stream_predictions:
+            action_prediction_json = await self.action_predictor.predict(prompt_context, recent_context, similar_context)
+            return self._log_prediction(action_prediction_json)
+
+        parser = IncrementalJSONParser()
+        prediction = {"predicted_actions": [], "predicted_questions": []}
+        chunks = []
+        try:
+            async for delta in self.action_predictor.predict_stream(prompt_context, recent_context, similar_context):
+                chunks.append(delta)
+                if self._collect_prediction(parser.feed(delta), prediction) and on_prediction is not None:
+                    on_prediction(prediction)
+        except Exception as e:
+            if not chunks:
+                raise
+            print(f"[경고] 행동 예측 스트림 중단: {e}")
+        return self._log_prediction("".join(chunks))
+
+    # ------------------------------------------------------------------
+    # QA
+    # ------------------------------------------------------------------
+    async def answer_question(self, user_question: str, user_id=None, context: dict = None):
+        """IntegrationService.answer_question과 같은 결과를 반환하는 코루틴"""
+        try:
+            if context is None:
+                context = await self.build_qa_context(user_id)
+            cache_key, embedding, cached = await self._lookup_answer(user_question, user_id, context)
+            if cached is not None:
+                return cached
+
+            answer = await self.history_qa.answer(
+                current_context=context["current"],
+                recent_context=context["recent"],
+                similar_context=context["similar"],
+                user_question=user_question
+            )
+            return self._remember_answer(user_id, cache_key, embedding, self._log_answer(user_question, answer))
+
+        except Exception as e:
+            return self._answer_error(user_question, e)
+
+    async def answer_question_stream(self, user_question: str, user_id=None, context: dict = None):
+        """IntegrationService.answer_question_stream과 같은 이벤트를 yield 하는 비동기 제너레이터"""
+        yield "start", {"question": user_question}
+        try:
+            if context is None:
+                context = await self.build_qa_context(user_id)
+            cache_key, embedding, cached = await self._lookup_answer(user_question, user_id, context)
+            if cached is not None:
+                yield "done", cached
+                return
+
+            parser = IncrementalJSONParser()
+            chunks = []
+            async for delta in self.history_qa.answer_stream(
+                current_context=context["current"],
+                recent_context=context["recent"],
+                similar_context=context["similar"],
+                user_question=user_question
+            ):
+                chunks.append(delta)
+                for event in self._qa_stream_events(parser.feed(delta)):
+                    yield event
+            formatted = self._log_answer(user_question, "".join(chunks))
+            yield "done", self._remember_answer(user_id, cache_key, embedding, formatted)
+
+        except Exception as e:
+            yield "error", self._answer_error(user_question, e)
+
+    async def _lookup_answer(self, user_question: str, user_id, context: dict):
+        cache_key = self._answer_cache_key(user_question, context)
+        cached = self._cached_answer(user_question, user_id, cache_key)
+        if cache_key is None or cached is not None:
+            return cache_key, None, cached
+        embedding = await self._question_embedding(user_question)
+        return cache_key, embedding, self._similar_answer(user_question, user_id, cache_key, embedding)
+
+    async def _question_embedding(self, user_question: str):
+        try:
+            return await self._embed(user_question.strip())
+        except Exception as e:
+            print(f"[경고] 질문 임베딩 실패, 답변 캐시 생략: {e}")
+            return None
+
+    async def build_qa_context(self, user_id=None) -> dict:
+        current_item, current_context, recent_context = await self._offload(self._qa_base_context, user_id)
+        similar_context = "X"
+        if current_item is not None and current_context != "X":
+            embedding = await self._embed(current_context)
+            similar_context = await self._offload(self._qa_similar_context, embedding, current_item["id"], user_id)
+        return {"current": current_context, "recent": recent_context, "similar": similar_context}
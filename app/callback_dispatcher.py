@@ -0,0 +1,337 @@
+"""
+callback_dispatcher.py
+- 분석 결과를 Spring 백엔드로 전송하는 전용 디스패처
+- 분석 스레드는 submit()으로 payload만 넘기고 즉시 다음 작업으로 이동
+- keep-alive 커넥션 풀(requests.Session), 지수 백오프 재시도, 실패 시 Redis dead-letter 리스트 적재
+- 옵션: 여러 유저의 payload를 하나의 gzip 압축 요청으로 묶어 전송(batch)
+- 유저별 순서 보장: 유저마다 대기 큐(deque)를 두고 한 번에 한 전송만 진행해 같은 유저의 payload는 제출 순서대로,
+  재시도 중에도 뒤 payload가 앞지르지 않게 전송. 재시도는 백오프 시각까지 그 유저만 보류하고(전송 스레드는 잠들지 않음)
+  전송 스레드는 그 사이 다른 유저를 처리. 최종 결과가 제출된 윈도우의 부분 결과(partial)는 대기/재시도 중이면 폐기
+"""
+import gzip
+import json
+import time
+import heapq
+import random
+import itertools
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+import redis
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.logging.logger import get_logger
+from app.metrics import metrics
+
+log = get_logger("mindtrack.callback")
+
+# 재시도해도 의미 없는 응답 코드 (요청 자체가 잘못된 경우)
+_NON_RETRYABLE = {400, 401, 403, 404, 405, 409, 413, 415, 422}
+
+
+class CallbackError(Exception):
+    """콜백 전송 실패 (retryable=False면 즉시 dead-letter 처리)"""
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CallbackDispatcher:
+    """
+    Spring 콜백 비동기 디스패처.
+    - batch_size=1: payload 1건씩 POST {base_url}{path} (JSON)
+    - batch_size>1: batch_wait_ms 동안 모은 payload 목록을 POST {base_url}{batch_path}
+      (gzip=True면 Content-Encoding: gzip)
+    - 전송 스레드(senders개)는 보낼 차례인 유저를 공유해서 꺼내 보냄. 유저는 전송/재시도 대기 중이면 차례에서 빠짐
+    - window_id + partial로 낡은 부분 결과를 판단
+    """
+    def __init__(
+        self,
+        base_url: str,
+        redis_client: Optional[redis.Redis] = None,
+        path: str = "/analysis/result",
+        batch_path: str = "/analysis/results",
+        senders: int = 2,
+        pool_size: int = 10,
+        timeout_sec: float = 10,
+        max_retries: int = 3,
+        backoff_base_sec: float = 0.5,
+        backoff_max_sec: float = 10,
+        batch_size: int = 1,
+        batch_wait_ms: int = 50,
+        gzip_enabled: bool = True,
+        dead_letter_key: str = "callback:dead",
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.r = redis_client
+        self.path = path
+        self.batch_path = batch_path
+        self.senders = max(1, senders)
+        self.timeout_sec = timeout_sec
+        self.max_retries = max_retries
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+        self.batch_size = max(1, batch_size)
+        self.batch_wait_sec = batch_wait_ms / 1000.0
+        self.gzip_enabled = gzip_enabled
+        self.dead_letter_key = dead_letter_key
+
+        # keep-alive 커넥션 풀 (전송 스레드들이 공유)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._pending: Dict[object, deque] = {}  # user_id → 대기 중인 (제출 시각, payload)
+        self._ready = OrderedDict()  # 보낼 차례인 user_id (전송 중/재시도 대기 중인 유저는 없음)
+        self._busy = set()  # 전송 중인 user_id
+        self._parked = []  # 재시도 대기 힙 (retry_at, 순번, user_id)
+        self._parked_at: Dict[object, float] = {}  # 재시도 대기 중인 user_id → retry_at
+        self._park_seq = itertools.count()
+        self._retries: Dict[object, int] = {}  # user_id → 맨 앞 payload의 실패 횟수
+        self._finalized = set()  # 최종 결과가 제출되어 부분 결과를 더 보내지 않을 window_id
+        self._started = False
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+
+    @classmethod
+    def from_config(cls, base_url: str, redis_client: Optional[redis.Redis], cfg: Optional[dict]) -> "CallbackDispatcher":
+        """config.yaml의 worker.callback 섹션으로 생성"""
+        cfg = dict(cfg or {})
+        if "gzip" in cfg:
+            cfg["gzip_enabled"] = cfg.pop("gzip")
+        return cls(base_url, redis_client, **cfg)
+
+    def start(self):
+        """전송 스레드 시작 (중복 호출 시 무시)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for i in range(self.senders):
+            threading.Thread(target=self._run, daemon=True, name=f"callback-{i}").start()
+        log.info(
+            f"[CALLBACK] 디스패처 시작 (senders={self.senders}, batch_size={self.batch_size}, "
+            f"gzip={self.gzip_enabled}, max_retries={self.max_retries})"
+        )
+
+    def submit(self, payload: dict):
+        """payload를 유저의 대기 큐에 넣고 즉시 반환 (논블로킹)"""
+        user_id = payload.get("user_id")
+        window_id = payload.get("window_id")
+        with self._cond:
+            if window_id is not None and not payload.get("partial"):
+                self._finalized.add(window_id)
+                self._drop_queued_partials(user_id, window_id)
+            self._pending.setdefault(user_id, deque()).append((time.time(), payload))
+            self._schedule(user_id)
+
+    def qsize(self) -> int:
+        with self._lock:
+            return sum(len(q) for q in self._pending.values())
+
+    def _drop_queued_partials(self, user_id, window_id):
+        """최종 결과 제출 시 같은 윈도우의 대기 중인 부분 결과 폐기 (재시도 대기 중이던 부분 결과면 보류도 해제)"""
+        queue = self._pending.get(user_id)
+        if not queue:
+            return
+        head = queue[0]
+        kept = [e for e in queue if not (e[1].get("partial") and e[1].get("window_id") == window_id)]
+        if len(kept) == len(queue):
+            return
+        metrics.incr("callback_partial_dropped", len(queue) - len(kept))
+        queue.clear()
+        queue.extend(kept)
+        if user_id in self._parked_at and (not kept or kept[0] is not head):
+            del self._parked_at[user_id]
+            self._retries.pop(user_id, None)
+            self._schedule(user_id)
+
+    def _drop_stale(self, entries: List[tuple]) -> List[tuple]:
+        """최종 결과가 제출된 윈도우의 부분 결과를 제외"""
+        with self._lock:
+            live = [e for e in entries if not (e[1].get("partial") and e[1].get("window_id") in self._finalized)]
+        if len(live) < len(entries):
+            metrics.incr("callback_partial_dropped", len(entries) - len(live))
+        return live
+
+    def _settled(self, payloads: List[dict]):
+        """최종 결과 전송이 끝난(성공/dead-letter) 윈도우는 추적 종료 (같은 유저 큐라 부분 결과가 더 남아 있지 않음)"""
+        with self._lock:
+            for p in payloads:
+                if not p.get("partial"):
+                    self._finalized.discard(p.get("window_id"))
+
+    # ------------------------------------------------------------------
+    # 유저 스케줄 (self._cond를 잡은 상태에서 호출)
+    # ------------------------------------------------------------------
+    def _schedule(self, user_id):
+        """대기 payload가 있고 전송/재시도 대기 중이 아니면 보낼 차례에 추가"""
+        if user_id in self._busy or user_id in self._parked_at or user_id in self._ready:
+            return
+        if not self._pending.get(user_id):
+            self._pending.pop(user_id, None)
+            return
+        self._ready[user_id] = None
+        self._cond.notify()
+
+    def _park(self, user_id, delay: float):
+        retry_at = time.time() + delay
+        self._parked_at[user_id] = retry_at
+        heapq.heappush(self._parked, (retry_at, next(self._park_seq), user_id))
+        self._cond.notify()  # 잠든 전송 스레드가 대기 시간을 다시 계산하도록
+
+    def _unpark_due(self):
+        now = time.time()
+        while self._parked and self._parked[0][0] <= now:
+            retry_at, _, user_id = heapq.heappop(self._parked)
+            if self._parked_at.get(user_id) == retry_at:  # 먼저 보류가 풀린 유저의 옛 항목은 무시
+                del self._parked_at[user_id]
+                self._schedule(user_id)
+
+    def _next_retry_in(self) -> Optional[float]:
+        return max(0.0, self._parked[0][0] - time.time()) if self._parked else None
+
+    # ------------------------------------------------------------------
+    # 전송 루프
+    # ------------------------------------------------------------------
+    def _take_ready(self, batch: List[tuple], limit: int):
+        """보낼 차례인 유저의 앞쪽 payload를 limit건까지 batch에 (user_id, entries)로 추가"""
+        count = sum(len(entries) for _, entries in batch)
+        while self._ready and count < limit:
+            user_id, _ = self._ready.popitem(last=False)
+            queue = self._pending[user_id]
+            entries = []
+            while queue and count < limit:
+                entries.append(queue.popleft())
+                count += 1
+            self._busy.add(user_id)
+            batch.append((user_id, entries))
+        return count
+
+    def _next_batch(self) -> List[tuple]:
+        with self._cond:
+            while True:
+                self._unpark_due()
+                if self._ready:
+                    break
+                self._cond.wait(self._next_retry_in())
+            batch = []
+            count = self._take_ready(batch, self.batch_size)
+            deadline = time.time() + self.batch_wait_sec
+            while count < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+                self._unpark_due()
+                count = self._take_ready(batch, self.batch_size)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = [(user_id, self._drop_stale(entries)) for user_id, entries in self._next_batch()]
+            payloads = [p for _, entries in batch for _, p in entries]
+            try:
+                if payloads:
+                    self._send(payloads)
+                now = time.time()
+                for _, entries in batch:
+                    for enqueued_at, _ in entries:
+                        metrics.observe("callback_latency_sec", now - enqueued_at)
+                metrics.incr("callback_sent", len(payloads))
+                self._settled(payloads)
+                for user_id, _ in batch:
+                    self._finish(user_id)
+            except CallbackError as e:
+                for user_id, entries in batch:
+                    self._finish(user_id, entries, e)
+            except Exception as e:
+                log.exception(f"[CALLBACK] 예기치 못한 전송 오류: {e}")
+                self._dead_letter(payloads, repr(e))
+                self._settled(payloads)
+                for user_id, _ in batch:
+                    self._finish(user_id)
+
+    def _finish(self, user_id, entries: List[tuple] = (), error: Optional[CallbackError] = None):
+        """
+        전송이 끝난 유저를 다시 차례에 넣음.
+        실패면 entries를 유저 큐 앞에 되돌리고 백오프 시각까지 보류 (재시도 불가/횟수 초과면 dead-letter)
+        """
+        if error is not None:
+            entries = self._drop_stale(entries)  # 전송 중 최종 결과가 제출됐으면 부분 결과는 재시도하지 않음
+        with self._cond:
+            self._busy.discard(user_id)
+            attempt = self._retries.pop(user_id, 0)
+            retry = error is not None and entries and error.retryable and attempt < self.max_retries
+            if retry:
+                self._retries[user_id] = attempt + 1
+                self._pending.setdefault(user_id, deque()).extendleft(reversed(entries))
+                delay = min(self.backoff_max_sec, self.backoff_base_sec * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.0)  # jitter
+                self._park(user_id, delay)
+            else:
+                self._schedule(user_id)
+        if retry:
+            metrics.incr("callback_retried")
+            log.warning(
+                f"[CALLBACK] user={user_id} 전송 실패, {delay:.2f}s 후 재시도 ({attempt + 1}/{self.max_retries}): {error}"
+            )
+        elif error is not None:
+            payloads = [p for _, p in entries]
+            self._dead_letter(payloads, str(error))
+            self._settled(payloads)
+
+    def _send(self, payloads: List[dict]):
+        if len(payloads) == 1 and self.batch_size == 1:
+            url = f"{self.base_url}{self.path}"
+            body = json.dumps(payloads[0], ensure_ascii=False).encode("utf-8")
+        else:
+            url = f"{self.base_url}{self.batch_path}"
+            body = json.dumps(payloads, ensure_ascii=False).encode("utf-8")
+
+        headers = {"Content-Type": "application/json"}
+        if self.gzip_enabled and self.batch_size > 1:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+
+        try:
+            resp = self.session.post(url, data=body, headers=headers, timeout=self.timeout_sec)
+        except requests.RequestException as e:
+            raise CallbackError(f"{url} 요청 실패: {e}")
+
+        if resp.status_code >= 400:
+            raise CallbackError(
+                f"{url} 응답 {resp.status_code}: {resp.text[:200]}",
+                retryable=resp.status_code not in _NON_RETRYABLE,
+            )
+        log.info(f"[CALLBACK] ✅ Spring 콜백 성공 ({len(payloads)}건, users={[p.get('user_id') for p in payloads]})")
+
+    def _dead_letter(self, payloads: List[dict], error: str):
+        if not payloads:
+            return
+        metrics.incr("callback_dead_lettered", len(payloads))
+        log.error(f"[CALLBACK] 전송 최종 실패 → dead-letter 적재 ({len(payloads)}건): {error}")
+        if self.r is None:
+            return
+        try:
+            entries = [
+                json.dumps({"payload": p, "error": error, "failed_at": time.time()}, ensure_ascii=False)
+                for p in payloads
+            ]
+            self.r.rpush(self.dead_letter_key, *entries)
+        except Exception as e:
+            log.exception(f"[CALLBACK] dead-letter 적재 실패: {e}")
+
+    def stats(self) -> dict:
+        dead = None
+        if self.r is not None:
+            try:
+                dead = self.r.llen(self.dead_letter_key)
+            except Exception:
+                pass
+        with self._lock:
+            retrying = len(self._parked_at)
+        return {"queued": self.qsize(), "retrying": retrying, "dead_letter": dead}
@@ -0,0 +1,50 @@
+"""
+degradation.py
+- 분석 큐 지연(lag)에 따라 파이프라인을 단계적으로 축소하는 부하 차단(load shedding) 정책
+- 워커가 윈도우마다 level을 골라 IntegrationService.run_image_cycle(degradation_level=...)에 전달
+"""
+from typing import List, Optional
+
+# 단계가 높을수록 앞 단계의 축소를 모두 포함한다.
+LEVEL_FULL = 0              # 전체 파이프라인
+LEVEL_SKIP_ACTIONS = 1      # 행동 예측 LLM 호출 생략
+LEVEL_LOW_DETAIL = 2        # 이미지 설명에 저해상도(detail=low) 이미지 전송
+LEVEL_REUSE_DESCRIPTION = 3 # 직전 설명 재사용 (OCR/PII, 이미지 설명, 임베딩 저장 생략)
+MAX_LEVEL = LEVEL_REUSE_DESCRIPTION
+
+LEVEL_NAMES = {
+    LEVEL_FULL: "full",
+    LEVEL_SKIP_ACTIONS: "skip_actions",
+    LEVEL_LOW_DETAIL: "low_detail",
+    LEVEL_REUSE_DESCRIPTION: "reuse_description",
+}
+
+
+class DegradationPolicy:
+    """
+    큐 지연(초)이 thresholds_sec[i] 이상이면 level i+1을 적용한다.
+    예) thresholds_sec=[30, 60, 120] → 30초 이상 1단계, 60초 이상 2단계, 120초 이상 3단계
+    enabled=False면 항상 LEVEL_FULL.
+    """
+    def __init__(self, thresholds_sec: Optional[List[float]] = None, enabled: bool = True):
+        thresholds = sorted(float(t) for t in (thresholds_sec or []))
+        self.thresholds_sec = thresholds[:MAX_LEVEL]
+        self.enabled = enabled
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict]) -> "DegradationPolicy":
+        """config.yaml의 worker.degradation 섹션으로 생성"""
+        cfg = cfg or {}
+        return cls(thresholds_sec=cfg.get("thresholds_sec"), enabled=cfg.get("enabled", True))
+
+    def level_for(self, lag_sec: float) -> int:
+        if not self.enabled:
+            return LEVEL_FULL
+        level = LEVEL_FULL
+        for i, threshold in enumerate(self.thresholds_sec):
+            if lag_sec >= threshold:
+                level = i + 1
+        return level
+
+    def __repr__(self):
+        return f"DegradationPolicy(enabled={self.enabled}, thresholds_sec={self.thresholds_sec})"
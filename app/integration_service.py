@@ -3,15 +3,27 @@ import os
 import json
 import time  # 🔹 추가: 시간 측정용
 import traceback
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from config_loader import config
-from modules.image_selector import ImageClusterSelector
-from modules.ocr_pii import initialize_tesseract, initialize_analyzer, analyze_and_blur_image
-from modules.image_description import ImageDescription, EmbeddingGenerator, VectorDBStorage
-from modules.action_predictor import ActionPredictor
-from modules.history_qa import HistoryQA
+from app.stage_graph import StageGraph
+from app.micro_batcher import MicroBatcher
+from app.degradation import (
+    LEVEL_FULL, LEVEL_SKIP_ACTIONS, LEVEL_LOW_DETAIL, LEVEL_REUSE_DESCRIPTION, LEVEL_NAMES,
+)
+from modules.image_selector import ImageClusterSelector, dhash, hamming
+from modules.image_frame import ImageFrame, VisionPayloadOptimizer, load_frames
+from modules.ocr_pii import initialize_tesseract, initialize_analyzer, analyze_and_blur_frame
+from modules.image_description import (
+    ImageDescription, EmbeddingGenerator, ShardedVectorStore, DescriptionCache, EmbeddingCache,
+)
+from modules.action_predictor import ActionPredictor, DescribeAndPredict
+from modules.history_qa import HistoryQA, SemanticAnswerCache, context_fingerprint
+from modules.streaming import IncrementalJSONParser
 
 
 
@@ -26,135 +38,505 @@ class IntegrationService:
             n_clusters=config["image_selector"]["n_clusters"],
             random_state=config["image_selector"]["random_state"]
         )
+        # 같은 이미지 + 같은 요청의 이미지 설명은 디스크 캐시에서 재사용 (재처리/재시도 시 API 호출 없음)
+        cache_cfg = (config.get("integration") or {}).get("description_cache") or {}
+        self.description_cache = DescriptionCache(
+            path=cache_cfg.get("path", "./cache/descriptions.sqlite3"), max_mb=cache_cfg.get("max_mb", 256),
+        ) if cache_cfg.get("enabled", True) else None
+        # 이미지 설명 요청 전 축소/재인코딩(/텍스트 영역 자르기) → 요청 크기와 이미지 토큰 감소
+        payload_cfg = (config.get("integration") or {}).get("vision_payload") or {}
+        self.vision_detail = payload_cfg.get("detail", "auto")
+        self.payload_optimizer = VisionPayloadOptimizer(
+            max_edge=payload_cfg.get("max_edge", 1568),
+            image_format=payload_cfg.get("format", "JPEG"),
+            quality=payload_cfg.get("quality", 80),
+            crop_to_text=payload_cfg.get("crop_to_text", False),
+            crop_margin=payload_cfg.get("crop_margin", 16),
+        ) if payload_cfg.get("enabled", True) else None
+        # 텍스트 임베딩 캐시 (QA가 수집 시 이미 임베딩한 설명을 다시 요청하지 않음)
+        embed_cache_cfg = (config.get("integration") or {}).get("embedding_cache") or {}
+        self.embedding_cache = EmbeddingCache(
+            path=embed_cache_cfg.get("path", "./cache/embeddings.sqlite3"),
+            max_mb=embed_cache_cfg.get("max_mb", 512),
+            memory_entries=embed_cache_cfg.get("memory_entries", 2048),
+        ) if embed_cache_cfg.get("enabled", True) else None
+        # OpenAI 모듈 (AsyncIntegrationService는 AsyncOpenAI 버전으로 생성)
+        self._init_clients()
+        # 유저별 벡터DB 샤드 (재시작해도 기록 유지, 샤드 단위로 잠그므로 다른 유저의 사이클과 병렬 접근)
+        shard_cfg = config["vectordb"].get("shards") or {}
+        self.vectors = ShardedVectorStore(
+            db_dir=os.path.join(os.path.dirname(config["vectordb"]["path"]), "users"),
+            dim=config["vectordb"]["dim"],
+            max_shards=shard_cfg.get("max_loaded", 256),
+            max_memory_mb=shard_cfg.get("max_memory_mb", 512),
+            flush_interval_sec=shard_cfg.get("flush_interval_sec", 30),
+        )
+        # 유저별 직전 분석 결과 (부하 차단 3단계 / 변화 없는 화면 재사용)
+        # {"description", "embedding", "prediction", "hash"}, LRU로 max_users까지 보관하고 유휴 유저는 forget_user로 제거
+        self._last_cycles = OrderedDict()
+        self._last_cycles_lock = threading.Lock()
+
+        # run_image_cycle 단계 그래프 실행용 스레드 풀 (분석 워커들이 공유)
+        integration_cfg = config.get("integration") or {}
+        self.describe_redacted = integration_cfg.get("describe_redacted", True)
+        # 대표 이미지가 직전 분석한 대표 이미지와 거의 같으면 설명/임베딩/예측 재사용
+        unchanged_cfg = integration_cfg.get("reuse_unchanged") or {}
+        self.reuse_unchanged = unchanged_cfg.get("enabled", True)
+        self.unchanged_hash_size = unchanged_cfg.get("hash_size", 8)
+        self.unchanged_max_distance = unchanged_cfg.get("max_distance", 4)
+        self.last_cycle_max_users = max(1, unchanged_cfg.get("max_users", 10000))
+        # 행동 예측을 스트리밍으로 받아 완료된 predicted_actions 항목부터 on_partial로 전달
+        self.stream_predictions = integration_cfg.get("stream_predictions", True)
+        # 이미지 설명 + 행동 예측을 멀티모달 요청 1회로 수행 (LLM 왕복 2회 → 1회)
+        self.fused_describe_predict = integration_cfg.get("fused_describe_predict", False)
+        self.stage_executor = ThreadPoolExecutor(
+            max_workers=integration_cfg.get("stage_workers", 8), thread_name_prefix="stage"
+        )
+
+        # 동시에 끝난 여러 사이클의 ResNet 특징 추출/텍스트 임베딩을 모아 한 번에 처리
+        batch_cfg = integration_cfg.get("micro_batch") or {}
+        self.feature_batcher = self.embed_batcher = None
+        if batch_cfg.get("enabled", True):
+            self.feature_batcher = MicroBatcher(
+                self.selector.extractor.embed_batch, max_wait_ms=batch_cfg.get("max_wait_ms", 5),
+                max_batch=batch_cfg.get("max_images", 64), name="features",
+            )
+            self.selector.embed_images = self.feature_batcher.map
+            self.embed_batcher = self._embed_batcher(batch_cfg)
+
+        # 같은 컨텍스트에서 (거의) 같은 질문이면 모델 호출 없이 이전 답변 반환
+        answer_cache_cfg = integration_cfg.get("answer_cache") or {}
+        self.answer_cache = SemanticAnswerCache(
+            threshold=answer_cache_cfg.get("similarity_threshold", 0.95),
+            ttl_sec=answer_cache_cfg.get("ttl_sec", 3600),
+            max_entries_per_user=answer_cache_cfg.get("max_entries_per_user", 64),
+            max_users=answer_cache_cfg.get("max_users", 10000),
+        ) if answer_cache_cfg.get("enabled", True) else None
+
+        ## 초기화 완료 (시간 측정 가능)
+        print("[Init 완료] 통합 서비스 초기화 완료")
+
+    def _init_clients(self):
+        """OpenAI를 호출하는 모듈 생성 (캐시/페이로드 최적화 설정 이후 호출)"""
         self.image_desc = ImageDescription(
-            model_name=config["openai"]["image_description_model"]
+            model_name=config["openai"]["image_description_model"], cache=self.description_cache,
+            optimizer=self.payload_optimizer,
         )
         self.embed_gen = EmbeddingGenerator(
-            model_name=config["openai"]["embedding_model"]
-        )
-        self.db = VectorDBStorage(
-            db_dir=os.path.dirname(config["vectordb"]["path"]),
-            index_name=os.path.splitext(os.path.basename(config["vectordb"]["path"]))[0],
-            dim=config["vectordb"]["dim"]
+            model_name=config["openai"]["embedding_model"], cache=self.embedding_cache
         )
-        
-        self.db.reset()
-
         self.action_predictor = ActionPredictor(
             model_name=config["openai"]["action_predictor_model"]
         )
+        self.describe_predictor = DescribeAndPredict(
+            model_name=config["openai"].get("describe_predict_model", config["openai"]["action_predictor_model"]),
+            optimizer=self.payload_optimizer,
+        )
         self.history_qa = HistoryQA(
             model_name=config["openai"]["history_qa_model"]
         )
 
-        ## 초기화 완료 (시간 측정 가능)
-        print("[Init 완료] 통합 서비스 초기화 완료")
-
-    def run_image_cycle(self, upload_dir: str):
-        print(f"\n전체 이미지 폴더 처리 시작: {upload_dir}\n")
+    def _embed_batcher(self, batch_cfg: dict):
+        """동시 사이클의 텍스트 임베딩을 embeddings 요청 1회로 모으는 배처"""
+        return MicroBatcher(
+            self.embed_gen.generate_embeddings, max_wait_ms=batch_cfg.get("max_wait_ms", 5),
+            max_batch=batch_cfg.get("max_texts", 256), name="embeddings",
+        )
 
+    def run_image_cycle(self, source, degradation_level: int = LEVEL_FULL, user_id=None, on_partial=None):
+        """
+        source: 이미지 폴더 경로(str) 또는 ImageFrame 목록 (modules.image_frame)
+        - 폴더 경로는 ImageFrame 목록으로 읽어 같은 경로로 처리 (기존 API 호환)
+        - 각 이미지는 한 번만 디코딩되어 대표 이미지 선택, OCR/PII, 이미지 설명 단계가 공유
+        degradation_level (app/degradation.py):
+        - 1 이상: 행동 예측 LLM 호출 생략
+        - 2 이상: 이미지 설명에 detail=low 이미지 전송
+        - 3: 유저의 직전 설명 재사용 (OCR/PII, 이미지 설명, 임베딩 저장 생략, 직전 설명이 없으면 2단계로 처리)
+        실제 적용된 단계는 결과의 degradation_level로 반환
+
+        대표 이미지의 차이 해시(dhash)가 유저가 직전에 분석한 대표 이미지와 max_distance 이내면
+        OCR/PII, 이미지 설명, 임베딩, 벡터DB 저장, 행동 예측을 모두 생략하고 직전 결과를 재사용 (결과의 reused=True)
+
+        단계는 의존성 그래프(app/stage_graph.py)로 실행되어 서로 독립적인 단계가 겹쳐 실행된다.
+            select ─┬─ fingerprint ─ (변화 없으면 이후 단계 생략)
+                    ├─ ocr_pii ─ describe ─ embed ─┬─ similar ─┬─ predict ─ parse
+                    ├─ folder_context ─────────────┼───────────┤
+            recent ─┴──────────────────────────────┴───────────┴─ store (predict와 병렬)
+        - describe_redacted=True면 PII 블러 처리된 대표 이미지를 이미지 설명에 전달 (False면 ocr_pii와 병렬 실행)
+        - recent/similar 검색은 이번 결과를 저장(store)하기 전의 벡터DB를 기준으로 한다.
+        - fused_describe_predict=True(부하 차단 0단계)면 describe + predict를 요청 1회(describe_predict)로 대체
+            recent / similar ─ describe_predict ─┬─ describe ─ embed ─ store
+                                                 └─ predict ─ parse
+          similar는 새 설명의 임베딩 대신 유저의 직전 사이클 임베딩으로 검색 (없으면 생략)
+        단계별 시작/종료 시각은 결과의 stage_timings, 임계 경로는 critical_path로 반환
+
+        on_partial(result): stream_predictions=True면 행동 예측 스트림에서 predicted_actions 항목이 완료될 때마다
+        그때까지의 결과(최종 결과와 같은 키 + partial=True)로 호출 (predict 단계 실행 중에 호출됨)
+        """
+        frames, degradation_level = self._prepare_cycle(source, degradation_level, user_id)
         start_total = time.perf_counter()  # 🔹 전체 사이클 시작 시간
-
+        run = self._cycle_graph(frames, degradation_level, user_id, on_partial).run()
+        return self._finish_cycle(run, degradation_level, user_id, start_total)
+
+    def _prepare_cycle(self, source, degradation_level: int, user_id):
+        if degradation_level >= LEVEL_REUSE_DESCRIPTION and self._last_cycle(user_id) is None:
+            degradation_level = LEVEL_LOW_DETAIL
+        if isinstance(source, str):
+            frames = load_frames(source)
+            if not frames:
+                raise ValueError(f"No image files found in: {source}")
+        else:
+            frames = list(source)
+        print(f"\n전체 이미지 처리 시작: {len(frames)}장 (degradation={LEVEL_NAMES.get(degradation_level)})\n")
+        return frames, degradation_level
+
+    def _cycle_graph(self, frames, degradation_level: int, user_id, on_partial=None) -> StageGraph:
+        """run_image_cycle 단계 그래프 구성 (단계 함수는 AsyncIntegrationService에서 코루틴으로 대체됨)"""
+        reuse = degradation_level >= LEVEL_REUSE_DESCRIPTION
+        detail = "low" if degradation_level >= LEVEL_LOW_DETAIL else self.vision_detail
+        # 부하 차단 3단계: 직전 설명/임베딩 재사용 (이미지를 모델에 보내지 않으므로 OCR + PII도 생략)
+        last = self._last_cycle(user_id) if reuse else None
+        reused_text, reused_embedding = (last["description"], last["embedding"]) if last else (None, None)
+        # 대표 이미지가 직전과 같으면 이후 모델 호출 단계 생략 (fingerprint 결과로 실행 시 판단)
+        changed = False if reuse else (lambda d: d["fingerprint"]["previous"] is None)
+        fused = self.fused_describe_predict and not reuse and degradation_level < LEVEL_SKIP_ACTIONS
+        image_deps = ["select", "fingerprint", "ocr_pii"] if self.describe_redacted else ["select", "fingerprint"]
+
+        graph = StageGraph(self.stage_executor)
         ## 1️⃣ 대표 이미지 선택
-        t1 = time.perf_counter()
-        rep_img_path, all_imgs = self.selector.select(upload_dir)
-        print(f"[1] 대표 이미지 선택 완료 ({len(all_imgs)}장) - {time.perf_counter() - t1:.2f}s")
-
+        graph.add("select", lambda d: self._select(frames))
+        graph.add(
+            "fingerprint", lambda d: self._fingerprint(d["select"][0], user_id), deps=["select"],
+            enabled=self.reuse_unchanged and user_id is not None and not reuse,
+            default={"hash": None, "previous": None},
+        )
         ## 2️⃣ OCR + PII 분석
-        t2 = time.perf_counter()
-        blurred_img, _ = analyze_and_blur_image(rep_img_path, self.analyzer)
-        print(f"[2] OCR + PII 분석 완료 - {time.perf_counter() - t2:.2f}s")
+        graph.add("ocr_pii", lambda d: self._redact(d["select"][0]), deps=["select", "fingerprint"], enabled=changed)
+        ## 3️⃣ 이미지 설명 생성 (융합 모드: 설명 + 행동 예측 요청 1회)
+        if fused:
+            graph.add(
+                "describe_predict",
+                lambda d: self._describe_and_predict(
+                    d.get("ocr_pii") or d["select"][0], detail, d["folder_context"], d["recent"], d["similar"]
+                ),
+                deps=image_deps + ["folder_context", "recent", "similar"], enabled=changed,
+            )
+            graph.add("describe", lambda d: d["describe_predict"][0], deps=["describe_predict", "fingerprint"], enabled=changed)
+        else:
+            graph.add(
+                "describe",
+                lambda d: self._describe(d.get("ocr_pii") or d["select"][0], detail),
+                deps=image_deps, enabled=changed, default=reused_text,
+            )
+        ## 4️⃣ 임베딩 생성
+        graph.add(
+            "embed", lambda d: self._embed(d["describe"]),
+            deps=["describe", "fingerprint"], enabled=changed, default=reused_embedding,
+        )
+        ## 5️⃣ 폴더 컨텍스트 구성
+        graph.add(
+            "folder_context",
+            lambda d: [f.name for f in d["select"][1] if f is not d["select"][0]],
+            deps=["select"],
+        )
+        ## 6️⃣ 벡터 DB 검색 (최근 항목은 새 임베딩과 무관하므로 바로 시작)
+        graph.add("recent", lambda d: self._recent_context(user_id))
+        if fused:
+            # 새 설명은 describe_predict 응답에 포함되므로 직전 사이클 임베딩으로 미리 검색
+            previous_embedding = (self._last_cycle(user_id) or {}).get("embedding")
+            graph.add(
+                "similar", lambda d: self._similar_context(previous_embedding, user_id),
+                deps=["fingerprint"], enabled=(changed if previous_embedding is not None else False), default="",
+            )
+        else:
+            graph.add(
+                "similar", lambda d: self._similar_context(d["embed"], user_id),
+                deps=["embed", "fingerprint"], enabled=changed, default="",
+            )
+        ## 임베딩 저장 (검색이 끝난 뒤, 행동 예측과 병렬)
+        graph.add(
+            "store", lambda d: self._store(d["select"][0], d["describe"], d["embed"], user_id),
+            deps=["select", "fingerprint", "describe", "embed", "recent", "similar"], enabled=changed,
+        )
+        ## 7️⃣ 행동 예측 (부하 차단 시 LLM 호출 없이 빈 예측 → 8단계에서 기본값 처리)
+        if fused:
+            graph.add(
+                "predict", lambda d: d["describe_predict"][1],
+                deps=["describe_predict", "fingerprint"], enabled=changed, default="",
+            )
+        else:
+            graph.add(
+                "predict",
+                lambda d: self._predict(
+                    d["describe"], d["folder_context"], d["recent"], d["similar"],
+                    on_prediction=self._partial_callback(on_partial, d, degradation_level),
+                ),
+                deps=["select", "describe", "fingerprint", "folder_context", "recent", "similar"],
+                enabled=changed if degradation_level < LEVEL_SKIP_ACTIONS else False, default="",
+            )
+        ## 8️⃣ JSON 파싱
+        graph.add(
+            "parse", lambda d: self._parse_action_prediction(d["predict"]), deps=["predict", "fingerprint"],
+            enabled=True if reuse else changed, default={"predicted_actions": [], "predicted_questions": []},
+        )
+        return graph
+
+    @staticmethod
+    def _partial_callback(on_partial, d: dict, degradation_level: int):
+        """스트리밍 중 완료된 예측 항목 → on_partial(부분 결과) (on_partial이 없으면 None)"""
+        if on_partial is None:
+            return None
+        rep_frame, all_frames = d["select"]
+
+        def on_prediction(prediction: dict):
+            try:
+                on_partial({
+                    "representative_image": rep_frame.path,
+                    "description": d["describe"],
+                    "cluster_size": len(all_frames),
+                    "cluster_images": d["folder_context"],
+                    "predicted_actions": list(prediction["predicted_actions"]),
+                    "predicted_questions": list(prediction["predicted_questions"]),
+                    "degradation_level": degradation_level,
+                    "reused": False,
+                    "partial": True,
+                })
+            except Exception as e:
+                print(f"[경고] 부분 결과 콜백 실패: {e}")
+        return on_prediction
+
+    def _finish_cycle(self, run, degradation_level: int, user_id, start_total: float) -> dict:
+        rep_frame, all_frames = run.results["select"]
+        folder_context = run.results["folder_context"]
+        fingerprint = run.results["fingerprint"]
+        previous = fingerprint["previous"]
+        if previous is not None:
+            description_text, action_prediction = previous["description"], previous["prediction"]
+            print(f"[REUSE] user={user_id} 대표 이미지 변화 없음 → 직전 설명/임베딩/예측 재사용")
+        else:
+            description_text = run.results["describe"]
+            action_prediction = run.results["parse"]
+            if degradation_level < LEVEL_REUSE_DESCRIPTION and user_id is not None:
+                # 예측을 생략한 사이클(부하 차단)은 해시를 남기지 않아 빈 예측이 재사용되지 않게 한다.
+                # 기준 해시는 실제로 분석한 대표 이미지 기준 (재사용 사이클에서는 갱신하지 않아 조금씩 바뀌는 화면도 결국 재분석)
+                predicted = not run.timings["predict"].get("skipped")
+                self._remember_cycle(user_id, {
+                    "description": description_text,
+                    "embedding": run.results["embed"],
+                    "prediction": action_prediction,
+                    "hash": fingerprint["hash"] if predicted else None,
+                })
+
+        for name, t in run.timings.items():
+            state = " (생략)" if t.get("skipped") else ""
+            print(f"[STAGE] {name:<15} {t['start']:.2f}s → {t['end']:.2f}s ({t['sec']:.2f}s){state}")
+        critical_path = run.critical_path()
+        print(f"[STAGE] 임계 경로: {' → '.join(critical_path)}")
+
+        ## ✅ 전체 처리시간 출력
+        total_time = time.perf_counter() - start_total
+        print(f"\n✅ 전체 사이클 완료 - 총 {total_time:.2f}초 소요\n")
+
+        ## 결과 반환
+        return {
+            "representative_image": rep_frame.path,
+            "description": description_text,
+            "cluster_size": len(all_frames),
+            "cluster_images": folder_context,
+            "predicted_actions": action_prediction.get("predicted_actions", []),
+            "predicted_questions": action_prediction.get("predicted_questions", []),
+            "degradation_level": degradation_level,
+            "reused": previous is not None,
+            "partial": False,
+            "stage_timings": run.timings,
+            "critical_path": critical_path,
+        }
+
+    # ------------------------------------------------------------------
+    # run_image_cycle 단계 함수
+    # ------------------------------------------------------------------
+    def _select(self, frames):
+        return self.selector.select_frames(frames)
+
+    def _fingerprint(self, rep_frame: ImageFrame, user_id) -> dict:
+        """대표 이미지 해시와, 유저가 직전에 분석한 대표 이미지와 max_distance 이내면 그 결과(previous)"""
+        fingerprint = dhash(rep_frame.rgb, self.unchanged_hash_size)
+        last = self._last_cycle(user_id)
+        previous = None
+        if last and last["hash"] is not None and hamming(fingerprint, last["hash"]) <= self.unchanged_max_distance:
+            previous = last
+        return {"hash": fingerprint, "previous": previous}
+
+    def _last_cycle(self, user_id):
+        with self._last_cycles_lock:
+            last = self._last_cycles.get(user_id)
+            if last is not None:
+                self._last_cycles.move_to_end(user_id)
+            return last
+
+    def _remember_cycle(self, user_id, cycle: dict):
+        with self._last_cycles_lock:
+            self._last_cycles[user_id] = cycle
+            self._last_cycles.move_to_end(user_id)
+            while len(self._last_cycles) > self.last_cycle_max_users:
+                self._last_cycles.popitem(last=False)
+
+    def forget_user(self, user_id):
+        """유저의 직전 분석 결과 제거 (워커가 유휴 유저의 감시를 종료할 때 호출)"""
+        with self._last_cycles_lock:
+            self._last_cycles.pop(user_id, None)
+
+    def _redact(self, rep_frame: ImageFrame) -> ImageFrame:
+        """OCR + PII 블러. 블러한 영역이 있으면 블러된 이미지를 새 프레임으로 반환 (없으면 원본 프레임)"""
+        blurred_img, boxes = analyze_and_blur_frame(rep_frame, self.analyzer)
         if blurred_img is None:
             raise ValueError("이미지 처리 실패")
+        if not boxes:
+            return rep_frame
+        return ImageFrame.from_bgr(rep_frame.name, blurred_img, image_id=rep_frame.image_id)
 
-        ## 3️⃣ 이미지 설명 생성
-        t3 = time.perf_counter()
-        desc_response = self.image_desc.generate_description(rep_img_path)
+    def _describe(self, frame: ImageFrame, detail: str) -> str:
+        return self._description_text(self.image_desc.generate_description(frame, detail=detail), detail)
+
+    def _description_text(self, desc_response, detail: str) -> str:
         description_text = desc_response.output_text.strip()
-        print(f"[3] 이미지 설명 생성 완료 - {time.perf_counter() - t3:.2f}s")
+        cached = " (캐시)" if getattr(desc_response, "cached", False) else ""
+        usage = getattr(desc_response, "usage", None)
+        tokens = f", 입력 토큰 {usage.input_tokens}" if getattr(usage, "input_tokens", None) is not None else ""
+        print(f"[3] 이미지 설명 생성 완료 (detail={detail}{tokens}){cached}")
         print(f"    └ 요약: {description_text[:80]}...")
+        return description_text
 
-        ## 4️⃣ 임베딩 생성 및 저장
-        t4 = time.perf_counter()
-        embedding = self.embed_gen.generate_embedding(description_text)
-        self.db.add_vector(embedding, {
-            "file": os.path.basename(rep_img_path),
-            "text": description_text
-        })
-
-        print("[FAISS] 인덱스 저장 시도 중...")
-        self.db.save()
-        print(f"[4] 임베딩 생성 및 저장 완료 - {time.perf_counter() - t4:.2f}s")
+    def _describe_and_predict(self, frame: ImageFrame, detail: str, folder_context, recent_context: str,
+                              similar_context: str):
+        output_text = self.describe_predictor.describe_and_predict(
+            frame, detail, folder_context, recent_context, similar_context
+        )
+        return self._split_fused(output_text, detail)
 
-        ## 5️⃣ 폴더 컨텍스트 구성
-        t5 = time.perf_counter()
-        folder_context = [os.path.basename(p) for p in all_imgs if p != rep_img_path]
-        context_text = "\n".join(folder_context)
-        print(f"[5] 폴더 컨텍스트 구성 완료 - {time.perf_counter() - t5:.2f}s")
-
-        ## 6️⃣ 벡터 DB 검색
-        t6 = time.perf_counter()
-        if self.db.metadata:
-            recent_items = self.db.get_recent(k=config["vectordb"]["recent_k"])
-            recent_context = recent_items[0]["text"] if recent_items else ""
-            similar_results = self.db.search_vector(
+    def _split_fused(self, output_text: str, detail: str):
+        """
+        융합 응답 → (이미지 설명 텍스트, 행동 예측 원본)
+        설명은 ImageDescription 출력과 같은 {"current_action"} JSON으로 저장/임베딩하고,
+        행동 예측은 원본 그대로 파싱 단계로 넘긴다. (current_action을 찾지 못하면 원본 전체를 설명으로 사용)
+        """
+        print(f"[3] 이미지 설명 + 행동 예측 생성 완료 (detail={detail}, 요청 1회)")
+        current_action = next(
+            (value for kind, path, value in IncrementalJSONParser().feed(output_text or "")
+             if kind == "string_end" and path == ("current_action",)),
+            None,
+        )
+        if current_action is None:
+            description_text = (output_text or "").strip()
+        else:
+            description_text = json.dumps({"current_action": current_action}, ensure_ascii=False, indent=2)
+        return description_text, self._log_prediction(output_text or "")
+
+    def _embed(self, description_text: str):
+        # 캐시 적중은 배치 대기 없이 바로 반환
+        cached = self.embed_gen.lookup(description_text)
+        if cached is not None:
+            return cached
+        if self.embed_batcher is not None:
+            return self.embed_batcher.submit(description_text)
+        return self.embed_gen.generate_embedding(description_text)
+
+    def _store(self, rep_frame: ImageFrame, description_text: str, embedding, user_id=None):
+        # 디스크 저장은 샤드를 LRU에서 내릴 때 / 주기적으로 (write-back)
+        with self.vectors.shard(user_id, write=True) as db:
+            db.add_vector(embedding, {
+                "file": rep_frame.name,
+                "text": description_text
+            })
+
+    def _recent_context(self, user_id=None) -> str:
+        with self.vectors.shard(user_id) as db:
+            if not db.metadata:
+                return ""
+            recent_items = db.get_recent(k=config["vectordb"]["recent_k"])
+            return recent_items[0]["text"] if recent_items else ""
+
+    def _similar_context(self, embedding, user_id=None) -> str:
+        with self.vectors.shard(user_id) as db:
+            if not db.metadata:
+                return ""
+            similar_results = db.search_vector(
                 embedding,
                 top_k=config["vectordb"]["search_top_k"]
             )
-            similar_context = similar_results[0]["metadata"]["text"] if similar_results else ""
-        else:
-            recent_context, similar_context = "", ""
-        print(f"[6] 벡터 DB 검색 완료 - {time.perf_counter() - t6:.2f}s")
-
-        ## 7️⃣ 행동 예측
-        t7 = time.perf_counter()
-        prompt_context = (
+            return similar_results[0]["metadata"]["text"] if similar_results else ""
+
+    def _predict(self, description_text: str, folder_context, recent_context: str, similar_context: str,
+                 on_prediction=None) -> str:
+        prompt_context = self._prompt_context(description_text, folder_context)
+        if not self.stream_predictions:
+            action_prediction_json = self.action_predictor.predict(prompt_context, recent_context, similar_context)
+            return self._log_prediction(action_prediction_json)
+
+        parser = IncrementalJSONParser()
+        prediction = {"predicted_actions": [], "predicted_questions": []}
+        chunks = []
+        try:
+            for delta in self.action_predictor.predict_stream(prompt_context, recent_context, similar_context):
+                chunks.append(delta)
+                if self._collect_prediction(parser.feed(delta), prediction) and on_prediction is not None:
+                    on_prediction(prediction)
+        except Exception as e:
+            # 도중에 끊긴 스트림은 받은 부분까지 파싱 단계로 넘김 (완료된 항목은 복구)
+            if not chunks:
+                raise
+            print(f"[경고] 행동 예측 스트림 중단: {e}")
+        return self._log_prediction("".join(chunks))
+
+    @staticmethod
+    def _collect_prediction(parsed_events, prediction: dict) -> bool:
+        """
+        IncrementalJSONParser 이벤트 중 완료된 predicted_actions / predicted_questions 항목을 prediction에 추가.
+        predicted_actions 항목이 추가되면 True
+        """
+        added = False
+        for kind, path, value in parsed_events:
+            if kind == "string_end" and len(path) == 2 and path[0] in prediction:
+                prediction[path[0]].append(value)
+                added = added or path[0] == "predicted_actions"
+        return added
+
+    def _prompt_context(self, description_text: str, folder_context) -> str:
+        context_text = "\n".join(folder_context)
+        return (
             f"대표 이미지 설명:\n{description_text}\n\n"
             f"폴더 내 다른 이미지들:\n{context_text}"
         )
-        action_prediction_json = self.action_predictor.predict(
-            prompt_context, recent_context, similar_context
-        )
-        print(f"[7] 행동 예측 완료 - {time.perf_counter() - t7:.2f}s")
 
+    def _log_prediction(self, action_prediction_json: str) -> str:
         ## 모델 원본 응답 출력
         print("\n[모델 원본 응답]")
         print(repr(action_prediction_json))
         print("============================\n")
+        return action_prediction_json
 
-        ## 8️⃣ JSON 파싱
-        t8 = time.perf_counter()
+    def _parse_action_prediction(self, action_prediction_json: str) -> dict:
         try:
             raw_text = action_prediction_json.strip()
             if not raw_text:
                 print("[경고] action_prediction이 비어 있음, 기본값 설정")
-                action_prediction = {"predicted_actions": [], "predicted_questions": []}
-            else:
-                cleaned = (
-                    raw_text.replace("```json", "")
-                    .replace("```", "")
-                    .strip()
-                )
-                action_prediction = json.loads(cleaned)
+                return {"predicted_actions": [], "predicted_questions": []}
+            cleaned = (
+                raw_text.replace("```json", "")
+                .replace("```", "")
+                .strip()
+            )
+            return json.loads(cleaned)
         except Exception as e:
             print(f"[경고] JSON 파싱 실패: {e}")
             print("원본 출력:", repr(action_prediction_json))
-            action_prediction = {"predicted_actions": [], "predicted_questions": []}
-        print(f"[8] JSON 파싱 완료 - {time.perf_counter() - t8:.2f}s")
-
-        ## ✅ 전체 처리시간 출력
-        total_time = time.perf_counter() - start_total
-        print(f"\n✅ 전체 사이클 완료 - 총 {total_time:.2f}초 소요\n")
-
-        ## 결과 반환
-        return {
-            "representative_image": rep_img_path,
-            "description": description_text,
-            "cluster_size": len(all_imgs),
-            "cluster_images": folder_context,
-            "predicted_actions": action_prediction.get("predicted_actions", []),
-            "predicted_questions": action_prediction.get("predicted_questions", [])
-        }
+            # 잘린 출력 등: 완료된 배열 항목만 복구
+            prediction = {"predicted_actions": [], "predicted_questions": []}
+            self._collect_prediction(IncrementalJSONParser().feed(action_prediction_json or ""), prediction)
+            if prediction["predicted_actions"] or prediction["predicted_questions"]:
+                print(f"[복구] 완료된 항목 사용: 행동 {len(prediction['predicted_actions'])}개, "
+                      f"질문 {len(prediction['predicted_questions'])}개")
+            return prediction
 
 
     def _format_ai_answer(self, user_question: str, answer: str):
@@ -189,67 +571,184 @@ class IntegrationService:
             "answer": final_answer or "답변이 비어 있습니다."
         }
 
-    def answer_question(self, user_question: str):
+    def answer_question(self, user_question: str, user_id=None, context: dict = None):
         """
         사용자의 질문(user_question)에 대해, 최근 이미지 설명 기반으로 답변 생성.
-        VectorDB에서 자동으로 context를 구성합니다.
+        context: 워커가 미리 구성한 QA 컨텍스트 (build_qa_context 결과). 없으면 user_id의 VectorDB 샤드에서 구성합니다.
         """
-
-        # === 컨텍스트 기본값 (없을 때도 프롬프트에서 처리 가능하도록 "X"로 설정)
-        current_context = "X"
-        recent_context = "X"
-        similar_context = "X"
-
         try:
-            if self.db.metadata:
-                current_item = self.db.metadata[-1]
-                current_context = current_item.get("text", "") or "X"
-
-                # 최근 데이터
-                recent_items = self.db.get_recent(k=config["vectordb"]["recent_k"])
-                recent_context = "\n\n".join(
-                    [it.get("text", "") for it in recent_items if it.get("id") != current_item.get("id")]
-                ).strip() or "X"
-
-                # 유사 검색
-                if current_context and current_context != "X":
-                    embedding = self.embed_gen.generate_embedding(current_context)
-                    similar_results = self.db.search_vector(
-                        embedding,
-                        top_k=config["vectordb"]["search_top_k"],
-                        exclude_id=current_item["id"]
-                    )
-                    similar_context = "\n\n".join(
-                        [r["metadata"]["text"] for r in similar_results]
-                    ).strip() or "X"
-
-            # === 모델 호출
+            if context is None:
+                context = self.build_qa_context(user_id)
+            cache_key, embedding, cached = self._lookup_answer(user_question, user_id, context)
+            if cached is not None:
+                return cached
+
+            # === 모델 호출 (캐시 미스일 때만)
             answer = self.history_qa.answer(
-                current_context=current_context,
-                recent_context=recent_context,
-                similar_context=similar_context,
+                current_context=context["current"],
+                recent_context=context["recent"],
+                similar_context=context["similar"],
                 user_question=user_question
             )
+            return self._remember_answer(user_id, cache_key, embedding, self._log_answer(user_question, answer))
 
-            print("\n[질문]")
-            print(user_question)
-            print("\n[모델 RAW 응답]")
-            print(answer)
+        except Exception as e:
+            return self._answer_error(user_question, e)
 
-            formatted = self._format_ai_answer(user_question, answer)
-            print("\n[포맷팅된 결과]")
-            print(json.dumps(formatted, ensure_ascii=False, indent=2))
-            return formatted
+    def answer_question_stream(self, user_question: str, user_id=None, context: dict = None):
+        """
+        answer_question의 스트리밍 버전. 모델 출력이 도착하는 대로 (이벤트 이름, 데이터)를 yield
+        - ("start", {"question"}): 컨텍스트 구성/모델 호출 전에 바로 전송
+        - ("thought", {"index", "delta"}) / ("thought_done", {"index", "text"}): reasoning_steps[index]
+        - ("answer", {"delta"}): final_answer
+        - ("done", answer_question과 같은 결과 dict) / 오류 시 ("error", 기본 응답 dict)
+        답변 캐시(정확 일치 → 의미)에 적중하면 start 다음 바로 done을 보내고 모델 스트림은 열지 않습니다.
+        """
+        yield "start", {"question": user_question}
+        try:
+            if context is None:
+                context = self.build_qa_context(user_id)
+            cache_key, embedding, cached = self._lookup_answer(user_question, user_id, context)
+            if cached is not None:
+                yield "done", cached
+                return
+
+            parser = IncrementalJSONParser()
+            chunks = []
+            for delta in self.history_qa.answer_stream(
+                current_context=context["current"],
+                recent_context=context["recent"],
+                similar_context=context["similar"],
+                user_question=user_question
+            ):
+                chunks.append(delta)
+                yield from self._qa_stream_events(parser.feed(delta))
+            formatted = self._log_answer(user_question, "".join(chunks))
+            yield "done", self._remember_answer(user_id, cache_key, embedding, formatted)
 
         except Exception as e:
-            print(f"[오류] answer_question 처리 중 예외 발생: {e}")
-            traceback.print_exc()
-            return {
-                "question": user_question,
-                "ai_thoughts": "(예외가 발생하여 기본 응답을 반환합니다.)",
-                "answer": "답변을 생성하는 중 문제가 발생했습니다."
-            }
+            yield "error", self._answer_error(user_question, e)
+
+    @staticmethod
+    def _qa_stream_events(parsed_events):
+        """IncrementalJSONParser 이벤트 → QA 스트림 이벤트 (reasoning_steps / final_answer만 전달)"""
+        for kind, path, value in parsed_events:
+            if path[:1] == ("reasoning_steps",) and len(path) == 2:
+                if kind == "string_delta":
+                    yield "thought", {"index": path[1], "delta": value}
+                elif kind == "string_end":
+                    yield "thought_done", {"index": path[1], "text": value}
+            elif path == ("final_answer",) and kind == "string_delta":
+                yield "answer", {"delta": value}
+
+    def _answer_cache_key(self, user_question: str, context: dict):
+        """(컨텍스트 지문, 질문) - 답변 캐시를 쓰지 않으면 None. 정확 일치 조회에는 임베딩이 필요 없음"""
+        if self.answer_cache is None:
+            return None
+        return context_fingerprint(context), user_question
+
+    def _lookup_answer(self, user_question: str, user_id, context: dict):
+        """
+        (캐시 키, 질문 임베딩, 캐시된 답변) - 모델 호출 전에 답변 캐시 조회
+        정확 일치(임베딩 없음)로 먼저 찾고, 미스면 질문을 임베딩해 의미 조회 (임베딩은 저장에도 재사용)
+        """
+        cache_key = self._answer_cache_key(user_question, context)
+        cached = self._cached_answer(user_question, user_id, cache_key)
+        if cache_key is None or cached is not None:
+            return cache_key, None, cached
+        embedding = self._question_embedding(user_question)
+        return cache_key, embedding, self._similar_answer(user_question, user_id, cache_key, embedding)
+
+    def _cached_answer(self, user_question: str, user_id, cache_key) -> dict:
+        """정확 일치(정규화한 질문) 답변 캐시 조회"""
+        if cache_key is None:
+            return None
+        return self._cache_hit(user_question, self.answer_cache.get_exact(user_id, *cache_key), "정확 일치")
+
+    def _similar_answer(self, user_question: str, user_id, cache_key, embedding) -> dict:
+        """질문 임베딩 유사도로 답변 캐시 조회 (임베딩이 없으면 None)"""
+        if cache_key is None or embedding is None:
+            return None
+        return self._cache_hit(user_question, self.answer_cache.get(user_id, cache_key[0], embedding), "의미")
+
+    @staticmethod
+    def _cache_hit(user_question: str, cached, kind: str):
+        if cached is not None:
+            cached["question"] = user_question.strip()
+            print(f"[QA] 답변 캐시 적중 ({kind})")
+        return cached
+
+    def _question_embedding(self, user_question: str):
+        """의미 캐시용 질문 임베딩 (실패하면 None → 캐시 없이 모델 응답 사용)"""
+        try:
+            return self._embed(user_question.strip())
+        except Exception as e:
+            print(f"[경고] 질문 임베딩 실패, 답변 캐시 생략: {e}")
+            return None
+
+    def _remember_answer(self, user_id, cache_key, embedding, formatted: dict) -> dict:
+        if cache_key is not None and embedding is not None:
+            self.answer_cache.put(user_id, *cache_key, embedding, formatted)
+        return formatted
 
+    def build_qa_context(self, user_id=None) -> dict:
+        """
+        질문과 무관한 QA 컨텍스트 묶음 {"current", "recent", "similar"}
+        (없을 때도 프롬프트에서 처리 가능하도록 "X"로 설정)
+        """
+        current_item, current_context, recent_context = self._qa_base_context(user_id)
+        similar_context = "X"
+        if current_item is not None and current_context != "X":
+            embedding = self._embed(current_context)
+            similar_context = self._qa_similar_context(embedding, current_item["id"], user_id)
+        return {"current": current_context, "recent": recent_context, "similar": similar_context}
+
+    def _qa_base_context(self, user_id=None):
+        """(현재 항목, 현재 컨텍스트, 최근 컨텍스트) - 유저의 벡터DB가 비어 있으면 (None, "X", "X")"""
+        with self.vectors.shard(user_id) as db:
+            if not db.metadata:
+                return None, "X", "X"
+            current_item = db.metadata[-1]
+            current_context = current_item.get("text", "") or "X"
+
+            # 최근 데이터
+            recent_items = db.get_recent(k=config["vectordb"]["recent_k"])
+            recent_context = "\n\n".join(
+                [it.get("text", "") for it in recent_items if it.get("id") != current_item.get("id")]
+            ).strip() or "X"
+        return current_item, current_context, recent_context
+
+    def _qa_similar_context(self, embedding, exclude_id, user_id=None) -> str:
+        # 유사 검색
+        with self.vectors.shard(user_id) as db:
+            similar_results = db.search_vector(
+                embedding,
+                top_k=config["vectordb"]["search_top_k"],
+                exclude_id=exclude_id
+            )
+        return "\n\n".join(
+            [r["metadata"]["text"] for r in similar_results]
+        ).strip() or "X"
+
+    def _log_answer(self, user_question: str, answer: str) -> dict:
+        print("\n[질문]")
+        print(user_question)
+        print("\n[모델 RAW 응답]")
+        print(answer)
+
+        formatted = self._format_ai_answer(user_question, answer)
+        print("\n[포맷팅된 결과]")
+        print(json.dumps(formatted, ensure_ascii=False, indent=2))
+        return formatted
+
+    def _answer_error(self, user_question: str, e: Exception) -> dict:
+        print(f"[오류] answer_question 처리 중 예외 발생: {e}")
+        traceback.print_exc()
+        return {
+            "question": user_question,
+            "ai_thoughts": "(예외가 발생하여 기본 응답을 반환합니다.)",
+            "answer": "답변을 생성하는 중 문제가 발생했습니다."
+        }
 
 
 if __name__ == "__main__":
@@ -1,9 +1,11 @@
 import os, sys, logging, io, threading, redis
 from fastapi import FastAPI, Body
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from PIL import Image
 from app.logging.logger import get_logger  # 이거만 import, run_forever는 나중에 lazy import
-from app.integration_service import IntegrationService
+from app.qa_context import load_qa_context
+from modules.streaming import format_sse
+from modules.prompting import prompt_stats
 from fastapi.middleware.cors import CORSMiddleware
 
 logger = get_logger("mindtrack.fastapi")
@@ -11,7 +13,9 @@ logger = get_logger("mindtrack.fastapi")
 startup_lock = threading.Lock()
 startup_done = False
 
-service = IntegrationService()
+# QA 엔드포인트도 워커와 같은 IntegrationService(벡터 샤드, 캐시)를 사용
+# (별도 인스턴스의 샤드는 워커가 메모리에 쌓은 최신 내용을 보지 못함)
+from app.worker import _service as service
 
 # ====== FastAPI 앱 ======
 app = FastAPI(title="mind-track AI", version="1.0.0")
@@ -54,6 +58,26 @@ def on_startup():
 def health():
     return {"ok": True}
 
+
+# ====== 워커 상태 ======
+@app.get("/worker/stats")
+def worker_stats():
+    """분석 워커별 busy/idle 상태, 분석 큐 대기시간, 워커 메트릭 및 프롬프트 길이 집계"""
+    if not startup_done:
+        return JSONResponse(status_code=503, content={"error": "워커가 아직 시작되지 않았습니다."})
+    from app.worker import analysis_pool, callback_dispatcher
+    from app.metrics import metrics
+    return {
+        **analysis_pool.stats(),
+        "callback": callback_dispatcher.stats(),
+        "description_cache": service.description_cache.stats() if service.description_cache else None,
+        "embedding_cache": service.embedding_cache.stats() if service.embedding_cache else None,
+        "answer_cache": service.answer_cache.stats() if service.answer_cache else None,
+        "vision_payload": service.payload_optimizer.stats() if service.payload_optimizer else None,
+        "prompts": prompt_stats(),
+        "metrics": metrics.snapshot(),
+    }
+
 # ====== (옵션) 원본 이미지 점검 API ======
 """
 @app.get("/inspect/original/{user_id}/{image_id}")
@@ -72,6 +96,14 @@ def inspect_original(user_id: int, image_id: int):
 """
 
 # ====== QA 엔드포인트 ======
+def _parse_user_id(data: dict):
+    """요청의 user_id (필수). 없거나 정수가 아니면 ValueError"""
+    user_id = data.get("user_id")
+    if user_id is None or isinstance(user_id, bool) or not isinstance(user_id, (int, str)):
+        raise ValueError(user_id)
+    return int(user_id)
+
+
 @app.post("/api/qa/answer")
 def answer_question(data: dict = Body(...)):
     """
@@ -80,10 +112,16 @@ def answer_question(data: dict = Body(...)):
     question = data.get("question")
     if not question:
         return JSONResponse(status_code=400, content={"error": "질문이 비어 있습니다."})
+    try:
+        user_id = _parse_user_id(data)  # 해당 유저의 벡터DB 샤드에서 컨텍스트 구성
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "user_id(정수)가 필요합니다."})
 
-    logger.info(f"[QA 요청 수신] question={question}")
+    logger.info(f"[QA 요청 수신] user={user_id} question={question}")
     try:
-        result = service.answer_question(question)
+        # 워커가 분석 직후 미리 구성한 컨텍스트가 있으면 LLM 호출만 수행
+        context = load_qa_context(r, user_id)
+        result = service.answer_question(question, user_id=user_id, context=context)
         return JSONResponse(content=result)
     except Exception as e:
         logger.exception(f"[QA 처리 중 예외 발생] {e}")
@@ -95,3 +133,31 @@ def answer_question(data: dict = Body(...)):
                 "answer": "답변을 생성하는 중 문제가 발생했습니다."
             },
         )
+
+
+@app.post("/api/qa/answer/stream")
+def answer_question_stream(data: dict = Body(...)):
+    """
+    /api/qa/answer의 Server-Sent Events 버전.
+    start → thought/thought_done(reasoning_steps) → answer(final_answer 조각) → done(최종 결과) 순서로 전송
+    """
+    question = data.get("question")
+    if not question:
+        return JSONResponse(status_code=400, content={"error": "질문이 비어 있습니다."})
+    try:
+        user_id = _parse_user_id(data)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "user_id(정수)가 필요합니다."})
+
+    logger.info(f"[QA 스트림 요청 수신] user={user_id} question={question}")
+    context = load_qa_context(r, user_id)
+
+    def events():
+        for name, payload in service.answer_question_stream(question, user_id=user_id, context=context):
+            yield format_sse(name, payload)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
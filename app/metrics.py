@@ -0,0 +1,60 @@
+"""
+metrics.py
+- 워커 파이프라인용 경량 메트릭 레지스트리 (프로세스 내 메모리)
+- 카운터(incr)와 값 분포 요약(observe: count/sum/max)을 라벨별로 집계
+- 기록 시 [METRIC] 로그를 함께 남겨 로그 수집기에서도 집계 가능
+"""
+import threading
+from typing import Dict, Tuple
+
+from app.logging.logger import get_logger
+
+log = get_logger("mindtrack.metrics")
+
+
+def _key(name: str, labels: Dict[str, object]) -> Tuple[str, str]:
+    label_str = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return name, label_str
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._summaries: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """카운터 증가"""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        log.info(f"[METRIC] {name}{{{key[1]}}} +{value}")
+
+    def observe(self, name: str, value: float, **labels):
+        """값 분포(count/sum/max) 기록"""
+        key = _key(name, labels)
+        with self._lock:
+            s = self._summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            s["count"] += 1
+            s["sum"] += value
+            s["max"] = max(s["max"], value)
+        log.info(f"[METRIC] {name}{{{key[1]}}} {value:.3f}")
+
+    def snapshot(self) -> dict:
+        """현재까지 집계된 메트릭 스냅샷"""
+        with self._lock:
+            counters = {
+                f"{name}{{{labels}}}" if labels else name: value
+                for (name, labels), value in self._counters.items()
+            }
+            summaries = {}
+            for (name, labels), s in self._summaries.items():
+                avg = s["sum"] / s["count"] if s["count"] else 0.0
+                summaries[f"{name}{{{labels}}}" if labels else name] = {
+                    "count": s["count"], "avg": round(avg, 3), "max": round(s["max"], 3),
+                }
+            return {"counters": counters, "summaries": summaries}
+
+
+# 프로세스 전역 메트릭
+metrics = Metrics()
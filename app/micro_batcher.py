@@ -0,0 +1,195 @@
+"""
+micro_batcher.py
+- 여러 분석 사이클이 동시에 요청한 작업을 짧은 시간(max_wait_ms) 모아 한 번의 배치 호출로 처리
+- 예) 대표 이미지 선택의 ResNet 특징 추출 → 배치 forward 1회, 텍스트 임베딩 → embeddings.create(input=[...]) 1회
+- 호출자는 자신의 입력에 해당하는 결과만 돌려받는다. 배치 호출이 실패하면 요청별로 다시 호출해
+  실패한 요청의 호출자에게만 예외 전달 (잘못된 입력 1건이 같은 배치의 다른 호출자까지 실패시키지 않도록)
+- AsyncMicroBatcher: 같은 방식을 이벤트 루프 안에서 수행 (batch_fn은 코루틴 함수, 배치 대기에 스레드를 쓰지 않음)
+"""
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from queue import Queue, Empty
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from app.logging.logger import get_logger
+from app.metrics import metrics
+
+log = get_logger("mindtrack.batch")
+
+
+class MicroBatcher:
+    """
+    batch_fn(items) -> results (입력과 같은 길이/순서)
+    - 첫 요청이 들어오면 max_wait_ms 동안 또는 항목 수가 max_batch에 도달할 때까지 다른 요청을 모은다.
+    - 요청 1건이 max_batch보다 커도 나누지 않고 그대로 한 배치로 처리
+    - 전용 스레드 1개에서 batch_fn을 실행하므로 batch_fn은 스레드 안전할 필요가 없다.
+    """
+    def __init__(self, batch_fn: Callable[[List[Any]], Sequence[Any]], max_wait_ms: float = 5,
+                 max_batch: int = 64, name: str = "batch"):
+        self.batch_fn = batch_fn
+        self.max_wait_sec = max_wait_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.name = name
+        self._queue: Queue = Queue()
+        self._thread = threading.Thread(target=self._loop, name=f"{name}-batcher", daemon=True)
+        self._thread.start()
+
+    def submit_many(self, items: Sequence[Any]) -> Future:
+        """items를 배치에 넣고, 결과 리스트를 담을 Future 반환 (asyncio에서는 asyncio.wrap_future로 await)"""
+        future: Future = Future()
+        items = list(items)
+        if not items:
+            future.set_result([])
+            return future
+        self._queue.put((items, future))
+        return future
+
+    def map(self, items: Sequence[Any]) -> List[Any]:
+        """items의 결과 리스트 (배치 처리가 끝날 때까지 대기)"""
+        return self.submit_many(items).result()
+
+    def submit(self, item: Any) -> Any:
+        """항목 1개의 결과 (배치 처리가 끝날 때까지 대기)"""
+        return self.map([item])[0]
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait_sec
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                batch.append(request)
+                size += len(request[0])
+            self._run(batch)
+
+    def _run(self, batch):
+        items = [item for request_items, _ in batch for item in request_items]
+        start = time.perf_counter()
+        try:
+            results = self._call(items)
+        except Exception as e:
+            log.warning(f"[BATCH] {self.name} 배치 처리 실패 (요청 {len(batch)}건, 항목 {len(items)}개): {e}")
+            self._run_each(batch, e)
+            return
+
+        metrics.observe("micro_batch_size", len(items), batch=self.name)
+        metrics.observe("micro_batch_requests", len(batch), batch=self.name)
+        metrics.observe("micro_batch_sec", time.perf_counter() - start, batch=self.name)
+
+        offset = 0
+        for request_items, future in batch:
+            future.set_result(results[offset:offset + len(request_items)])
+            offset += len(request_items)
+
+    def _call(self, items: List[Any]) -> List[Any]:
+        results = list(self.batch_fn(items))
+        if len(results) != len(items):
+            raise ValueError(f"{self.name}: 결과 수 불일치 ({len(results)} != {len(items)})")
+        return results
+
+    def _run_each(self, batch, error: Exception):
+        """배치 실패 시 요청별로 다시 호출 (요청이 1건뿐이면 같은 예외를 그대로 전달)"""
+        if len(batch) == 1:
+            batch[0][1].set_exception(error)
+            return
+        metrics.incr("micro_batch_split", batch=self.name)
+        for request_items, future in batch:
+            try:
+                future.set_result(self._call(request_items))
+            except Exception as e:
+                future.set_exception(e)
+
+
+class AsyncMicroBatcher:
+    """
+    MicroBatcher의 asyncio 버전. batch_fn(items)은 코루틴 함수 (예: AsyncEmbeddingGenerator.generate_embeddings)
+    - 첫 요청 후 max_wait_ms 타이머(call_later) 또는 항목 수가 max_batch에 도달하면 배치를 await
+    - 대기 중인 요청은 처음 사용한 이벤트 루프에 묶이므로 한 루프에서만 사용한다.
+    """
+    def __init__(self, batch_fn: Callable[[List[Any]], Awaitable[Sequence[Any]]], max_wait_ms: float = 5,
+                 max_batch: int = 64, name: str = "batch"):
+        self.batch_fn = batch_fn
+        self.max_wait_sec = max_wait_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.name = name
+        self._batch: List[Tuple[List[Any], asyncio.Future]] = []
+        self._size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def map(self, items: Sequence[Any]) -> List[Any]:
+        """items의 결과 리스트"""
+        items = list(items)
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((items, future))
+        self._size += len(items)
+        if self._size >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_sec, self._flush)
+        return await future
+
+    async def submit(self, item: Any) -> Any:
+        """항목 1개의 결과"""
+        return (await self.map([item]))[0]
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch, self._size = self._batch, [], 0
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        items = [item for request_items, _ in batch for item in request_items]
+        start = time.perf_counter()
+        try:
+            results = await self._call(items)
+        except Exception as e:
+            log.warning(f"[BATCH] {self.name} 배치 처리 실패 (요청 {len(batch)}건, 항목 {len(items)}개): {e}")
+            await self._run_each(batch, e)
+            return
+
+        metrics.observe("micro_batch_size", len(items), batch=self.name)
+        metrics.observe("micro_batch_requests", len(batch), batch=self.name)
+        metrics.observe("micro_batch_sec", time.perf_counter() - start, batch=self.name)
+
+        offset = 0
+        for request_items, future in batch:
+            if not future.done():
+                future.set_result(results[offset:offset + len(request_items)])
+            offset += len(request_items)
+
+    async def _call(self, items: List[Any]) -> List[Any]:
+        results = list(await self.batch_fn(items))
+        if len(results) != len(items):
+            raise ValueError(f"{self.name}: 결과 수 불일치 ({len(results)} != {len(items)})")
+        return results
+
+    async def _run_each(self, batch, error: Exception):
+        """배치 실패 시 요청별로 다시 호출 (요청별 호출은 동시에 진행)"""
+        if len(batch) == 1:
+            if not batch[0][1].done():
+                batch[0][1].set_exception(error)
+            return
+        metrics.incr("micro_batch_split", batch=self.name)
+        outcomes = await asyncio.gather(*(self._call(items) for items, _ in batch), return_exceptions=True)
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, BaseException):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
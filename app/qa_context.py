@@ -0,0 +1,35 @@
+"""
+qa_context.py
+- 유저별 QA 컨텍스트 묶음(current/recent/similar)을 Redis에 저장/조회
+- 워커가 분석 사이클(벡터DB 저장)이 끝날 때마다 미리 구성해 qa:ctx:{uid}에 저장하고,
+  /api/qa/answer는 저장된 묶음으로 LLM 호출만 수행 (없으면 요청 시점에 구성)
+"""
+import json
+from typing import Optional
+
+import redis
+
+
+def k_qa_context(uid) -> bytes:
+    """Redis QA 컨텍스트 키 (bytes로 반환)"""
+    return f"qa:ctx:{uid}".encode("utf-8")
+
+
+def save_qa_context(r: redis.Redis, uid, context: dict, ttl_sec: int = 0):
+    """QA 컨텍스트 저장 (ttl_sec > 0이면 만료 시간 설정)"""
+    value = json.dumps(context, ensure_ascii=False)
+    if ttl_sec and ttl_sec > 0:
+        r.set(k_qa_context(uid), value, ex=int(ttl_sec))
+    else:
+        r.set(k_qa_context(uid), value)
+
+
+def load_qa_context(r: redis.Redis, uid) -> Optional[dict]:
+    """저장된 QA 컨텍스트 (없거나 깨진 값이면 None)"""
+    raw = r.get(k_qa_context(uid))
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
@@ -0,0 +1,188 @@
+"""
+stage_graph.py
+- 분석 사이클의 단계를 의존성 그래프(DAG)로 선언하고 executor에서 실행
+- 의존 단계가 모두 끝난 단계부터 바로 제출하므로 서로 독립적인 단계는 겹쳐서 실행된다.
+- 단계별 시작/종료 시각(그래프 시작 기준 초)과 임계 경로(critical path)를 함께 반환
+- run(): executor 스레드에서 실행 / run_async(): 이벤트 루프에서 실행 (단계 함수가 코루틴을 반환하면 await)
+"""
+import time
+import asyncio
+import inspect
+import threading
+from concurrent.futures import Executor, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+
+class Stage:
+    """
+    그래프의 단계 1개.
+    fn(results)는 의존 단계의 결과 dict(name -> 값)를 받아 이 단계의 결과를 반환한다.
+    enabled=False면 실행하지 않고 default를 결과로 사용한다.
+    enabled가 함수면 의존 단계가 끝난 뒤 enabled(results)로 실행 여부를 결정한다. (앞 단계 결과에 따른 생략)
+    """
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = (),
+                 enabled: Union[bool, Callable[[Dict[str, Any]], bool]] = True, default: Any = None):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.enabled = enabled
+        self.default = default
+
+
+class StageGraph:
+    def __init__(self, executor: Optional[Executor] = None):
+        self.executor = executor
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = (),
+            enabled: Union[bool, Callable[[Dict[str, Any]], bool]] = True, default: Any = None) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"중복된 단계 이름: {name}")
+        self.stages[name] = Stage(name, fn, deps, enabled, default)
+        return self
+
+    def _validate(self):
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"{stage.name}: 알 수 없는 의존 단계 {dep}")
+
+    def run(self) -> "GraphRun":
+        """
+        모든 단계를 실행하고 GraphRun(results, timings)을 반환.
+        단계에서 예외가 발생하면 아직 시작하지 않은 단계는 취소하고 그 예외를 다시 발생시킨다.
+        """
+        self._validate()
+        executor = self.executor or ThreadPoolExecutor(max_workers=4, thread_name_prefix="stage")
+        run = GraphRun(self.stages)
+        pending = dict(self.stages)
+        running = {}
+        try:
+            while pending or running:
+                for stage in self._take_ready(pending, run):
+                    running[executor.submit(run.execute, stage)] = stage.name
+
+                if not running:
+                    if pending:
+                        raise ValueError(f"순환 의존성: {sorted(pending)}")
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    future.result()  # 단계 예외 전파
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+        finally:
+            if self.executor is None:
+                executor.shutdown(wait=False)
+        return run
+
+    async def run_async(self) -> "GraphRun":
+        """
+        run()의 asyncio 버전. 단계마다 태스크를 만들고, 단계 함수가 코루틴을 반환하면 await 한다.
+        CPU 작업은 단계 함수 안에서 run_in_executor로 넘겨야 이벤트 루프가 막히지 않는다.
+        """
+        self._validate()
+        run = GraphRun(self.stages)
+        pending = dict(self.stages)
+        running = {}
+        try:
+            while pending or running:
+                for stage in self._take_ready(pending, run):
+                    running[asyncio.ensure_future(run.execute_async(stage))] = stage.name
+
+                if not running:
+                    if pending:
+                        raise ValueError(f"순환 의존성: {sorted(pending)}")
+                    break
+
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    del running[task]
+                    task.result()  # 단계 예외 전파
+        except BaseException:
+            for task in running:
+                task.cancel()
+            raise
+        return run
+
+    def _take_ready(self, pending: Dict[str, Stage], run: "GraphRun") -> List[Stage]:
+        """의존 단계가 모두 끝난 단계를 pending에서 꺼낸다. (비활성 단계는 즉시 완료 처리)"""
+        ready = []
+        progressed = True
+        while progressed:
+            progressed = False
+            for name, stage in list(pending.items()):
+                if not all(dep in run.results for dep in stage.deps):
+                    continue
+                del pending[name]
+                if run.is_enabled(stage):
+                    ready.append(stage)
+                else:
+                    run.skip(stage)
+                    progressed = True
+        return ready
+
+
+class GraphRun:
+    """한 번의 그래프 실행 결과 (단계 결과 및 시간 기록)"""
+    def __init__(self, stages: Dict[str, Stage]):
+        self.stages = stages
+        self.started_at = time.perf_counter()
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _inputs(self, stage: Stage) -> Dict[str, Any]:
+        return {dep: self.results[dep] for dep in stage.deps}
+
+    def is_enabled(self, stage: Stage) -> bool:
+        if callable(stage.enabled):
+            return bool(stage.enabled(self._inputs(stage)))
+        return stage.enabled
+
+    def execute(self, stage: Stage):
+        start = time.perf_counter()
+        value = stage.fn(self._inputs(stage))
+        return self._record(stage, start, value)
+
+    async def execute_async(self, stage: Stage):
+        start = time.perf_counter()
+        value = stage.fn(self._inputs(stage))
+        if inspect.isawaitable(value):
+            value = await value
+        return self._record(stage, start, value)
+
+    def _record(self, stage: Stage, start: float, value: Any):
+        end = time.perf_counter()
+        with self._lock:
+            self.timings[stage.name] = self._timing(start, end)
+            self.results[stage.name] = value
+        return value
+
+    def skip(self, stage: Stage):
+        now = time.perf_counter()
+        with self._lock:
+            self.timings[stage.name] = {**self._timing(now, now), "skipped": True}
+            self.results[stage.name] = stage.default
+
+    def _timing(self, start: float, end: float) -> dict:
+        return {
+            "start": round(start - self.started_at, 4),
+            "end": round(end - self.started_at, 4),
+            "sec": round(end - start, 4),
+        }
+
+    def critical_path(self) -> List[str]:
+        """가장 늦게 끝난 단계에서 시작해, 가장 늦게 끝난 의존 단계를 거슬러 올라간 경로"""
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n]["end"])
+        path = [name]
+        while self.stages[name].deps:
+            name = max(self.stages[name].deps, key=lambda n: self.timings[n]["end"])
+            path.append(name)
+        return list(reversed(path))
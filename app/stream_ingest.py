@@ -0,0 +1,388 @@
+"""
+stream_ingest.py
+- Redis Streams 컨슈머 그룹 기반 수집 모드 (여러 워커 프로세스/노드가 유저를 나눠 처리)
+- Redis 구조:
+    ingest:{uid}  유저별 스트림 (producer: XADD ingest:{uid} * img_id {img_id})
+    lease:{uid}   유저 리스(lease) - 값은 리스를 가진 컨슈머 이름, PX로 만료
+    active:ingest 활성 유저 레지스트리 스트림 (비어 있던 유저 스트림에 첫 엔트리가 들어오면 uid 등록)
+    user:{uid}:img:{img_id}  이미지 바이너리 (기존과 동일)
+- 리스를 가진 컨슈머만 해당 유저 스트림을 읽으므로 유저별 순서가 유지된다.
+- 엔트리는 윈도우 분석이 끝난 뒤 XACK 되므로, 프로세스가 죽으면 리스 만료 후
+  다른 컨슈머가 XAUTOCLAIM으로 미처리(pending) 엔트리를 넘겨받아 먼저 처리한다.
+"""
+import os
+import time
+import socket
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+import redis
+
+from app.logging.logger import get_logger
+from app.window_store import k_img, parse_img_ids, parse_uid
+
+log = get_logger("mindtrack.stream_ingest")
+
+# 활성 유저 레지스트리 스트림 (컨슈머 그룹으로 읽으므로 등록 1건은 워커 1곳에만 전달됨)
+ACTIVE_STREAM_KEY = b"active:ingest"
+REGISTRY_MAXLEN = 10000
+
+# producer용: 엔트리 추가 후 스트림이 비어 있었다면 레지스트리에 uid 등록
+_ENQUEUE_LUA = """
+redis.call('xadd', KEYS[1], '*', 'img_id', ARGV[1])
+if redis.call('xlen', KEYS[1]) == 1 then
+    redis.call('xadd', KEYS[2], 'MAXLEN', '~', ARGV[3], '*', 'uid', ARGV[2])
+end
+return 1
+"""
+
+# 리스 소유자일 때만 만료 시간 연장
+_RENEW_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+# 리스 소유자일 때만 해제, 비어 있는 스트림은 함께 삭제 (다음 XADD 시 재생성)
+# 해제 직전에 들어온 엔트리가 남아 있으면 레지스트리(KEYS[3])에 다시 등록해 다른 워커가 인수
+_RELEASE_LUA = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('del', KEYS[1])
+if redis.call('exists', KEYS[2]) == 1 then
+    if redis.call('xlen', KEYS[2]) == 0 then
+        redis.call('del', KEYS[2])
+    elseif KEYS[3] then
+        redis.call('xadd', KEYS[3], 'MAXLEN', '~', ARGV[3], '*', 'uid', ARGV[2])
+    end
+end
+return 1
+"""
+
+
+def k_stream(uid: int) -> bytes:
+    """유저별 수집 스트림 키"""
+    return f"ingest:{uid}".encode("utf-8")
+
+
+def k_lease(uid: int) -> bytes:
+    """유저 리스 키"""
+    return f"lease:{uid}".encode("utf-8")
+
+
+def parse_stream_key(key) -> int:
+    """ingest:{uid} 키에서 uid 추출"""
+    key_str = key.decode("utf-8") if isinstance(key, bytes) else key
+    return int(key_str.split(":")[1])
+
+
+def default_consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def enqueue_image(r: redis.Redis, uid: int, img_id: int, raw: bytes,
+                  registry_key: bytes = ACTIVE_STREAM_KEY) -> None:
+    """
+    producer 측 이미지 등록 (Spring 백엔드도 같은 순서/스크립트로 등록해야 함).
+    이미지 저장 → ingest:{uid}에 XADD → 스트림이 비어 있었다면 레지스트리에 uid 등록.
+    """
+    r.set(k_img(uid, img_id), raw)
+    r.register_script(_ENQUEUE_LUA)(
+        keys=[k_stream(uid), registry_key], args=[img_id, uid, REGISTRY_MAXLEN]
+    )
+
+
+class StreamIngestor:
+    """
+    유저 리스 + 컨슈머 그룹 기반 수집기.
+    - acquire(uid): 리스 획득 → 그룹 생성 → 이전 소유자의 pending 엔트리 XAUTOCLAIM
+    - run(): 리스를 가진 모든 유저 스트림(+ 레지스트리 스트림)을 XREADGROUP 한 번으로 블로킹 대기
+      레지스트리에 uid가 등록되면 같은 호출에서 깨어나 즉시 리스를 획득한다. (registry_key=None이면 discover() 스캔만 사용)
+    - ack(uid, entry_ids): 윈도우 분석 완료 후 XACK + XDEL
+    - 하트비트 스레드가 lease_ms/3 주기로 리스를 연장, 잃은 리스는 즉시 읽기 대상에서 제외
+    콜백:
+    - on_entries(uid, img_ids, entry_ids): 읽은(또는 회수한) 엔트리 전달
+    - on_tick(now): 매 루프마다 호출 (윈도우 종료/유휴 정리 등)
+    - timeout_fn(now): XREADGROUP 최대 블로킹 시간(초)
+    - is_busy(uid): True면 리스를 해제하지 않음 (열린 윈도우/분석 중인 엔트리 존재)
+    """
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        on_entries: Callable[[int, List[int], List[bytes]], None],
+        on_tick: Optional[Callable[[float], None]] = None,
+        timeout_fn: Optional[Callable[[float], float]] = None,
+        is_busy: Optional[Callable[[int], bool]] = None,
+        group: str = "mindtrack",
+        consumer: Optional[str] = None,
+        lease_ms: int = 30000,
+        block_ms: int = 1000,
+        read_count: int = 100,
+        registry_key: Optional[bytes] = ACTIVE_STREAM_KEY,
+    ):
+        self.r = redis_client
+        self.on_entries = on_entries
+        self.on_tick = on_tick or (lambda now: None)
+        self.timeout_fn = timeout_fn or (lambda now: block_ms / 1000.0)
+        self.is_busy = is_busy or (lambda uid: False)
+        self.group = group
+        self.consumer = consumer or default_consumer_name()
+        self.lease_ms = lease_ms
+        self.block_ms = block_ms
+        self.read_count = read_count
+        self.registry_key = registry_key
+
+        self._renew = self.r.register_script(_RENEW_LUA)
+        self._release = self.r.register_script(_RELEASE_LUA)
+        self._lock = threading.Lock()
+        self._leased: Set[int] = set()
+        self._last_seen: Dict[int, float] = {}
+        self._lease_event = threading.Event()
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, redis_client: redis.Redis, cfg: Optional[dict],
+                    registry_key: Optional[bytes] = ACTIVE_STREAM_KEY, **callbacks) -> "StreamIngestor":
+        """config.yaml의 worker.ingest 섹션으로 생성"""
+        cfg = cfg or {}
+        return cls(
+            redis_client,
+            group=cfg.get("group", "mindtrack"),
+            consumer=cfg.get("consumer") or None,
+            lease_ms=cfg.get("lease_ms", 30000),
+            block_ms=cfg.get("block_ms", 1000),
+            read_count=cfg.get("read_count", 100),
+            registry_key=registry_key,
+            **callbacks,
+        )
+
+    # ------------------------------------------------------------------
+    # 리스 관리
+    # ------------------------------------------------------------------
+    def leased_users(self) -> List[int]:
+        with self._lock:
+            return list(self._leased)
+
+    def owns(self, uid: int) -> bool:
+        with self._lock:
+            return uid in self._leased
+
+    def acquire(self, uid: int) -> bool:
+        """유저 리스 획득 시도. 성공하면 이전 소유자의 미처리 엔트리를 회수해 먼저 전달한다."""
+        if self.owns(uid):
+            return True
+        if not self.r.set(k_lease(uid), self.consumer, nx=True, px=self.lease_ms):
+            return False
+
+        self._ensure_group(k_stream(uid))
+
+        with self._lock:
+            self._leased.add(uid)
+            self._last_seen[uid] = time.time()
+        log.info(f"[STREAM] ▶ user={uid} 리스 획득 (consumer={self.consumer}, leased={len(self._leased)})")
+
+        self._reclaim(uid)
+        self._lease_event.set()
+        return True
+
+    def _ensure_group(self, key: bytes):
+        try:
+            self.r.xgroup_create(key, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _reclaim(self, uid: int):
+        """
+        이전 소유자(죽은 컨슈머)의 pending 엔트리를 XAUTOCLAIM으로 모두 넘겨받는다.
+        리스는 이전 소유자의 리스가 만료된 뒤에만 획득되므로 idle 시간과 무관하게 회수한다.
+        (리스를 잃었던 컨슈머가 늦게 ACK하는 경우 중복 처리될 수 있음: at-least-once)
+        """
+        start = "0-0"
+        while True:
+            resp = self.r.xautoclaim(
+                k_stream(uid), self.group, self.consumer,
+                min_idle_time=0, start_id=start, count=self.read_count,
+            )
+            start, entries = resp[0], resp[1]
+            entries = [(eid, fields) for eid, fields in entries if fields is not None]
+            if entries:
+                log.info(f"[STREAM] user={uid} 미처리 엔트리 {len(entries)}건 회수 (XAUTOCLAIM)")
+                self._deliver(uid, entries)
+            if start in (b"0-0", "0-0"):
+                break
+
+    def release(self, uid: int):
+        """리스 해제 (소유자일 때만), 비어 있는 스트림은 삭제"""
+        with self._lock:
+            self._leased.discard(uid)
+            self._last_seen.pop(uid, None)
+        keys = [k_lease(uid), k_stream(uid)]
+        if self.registry_key:
+            keys.append(self.registry_key)
+        self._release(keys=keys, args=[self.consumer, uid, REGISTRY_MAXLEN])
+        log.info(f"[STREAM] ■ user={uid} 리스 해제 (leased={len(self._leased)})")
+
+    def release_idle(self, now: float, idle_sec: float):
+        """열린 윈도우/분석 중인 엔트리 없이 idle_sec 이상 활동이 없는 유저의 리스 해제"""
+        with self._lock:
+            idle = [uid for uid, seen in self._last_seen.items() if now - seen >= idle_sec]
+        for uid in idle:
+            if not self.is_busy(uid):
+                self.release(uid)
+
+    def touch(self, uid: int):
+        with self._lock:
+            if uid in self._leased:
+                self._last_seen[uid] = time.time()
+
+    def _heartbeat(self):
+        interval = self.lease_ms / 3000.0
+        while not self._stop.wait(interval):
+            for uid in self.leased_users():
+                try:
+                    if not self._renew(keys=[k_lease(uid)], args=[self.consumer, self.lease_ms]):
+                        with self._lock:
+                            self._leased.discard(uid)
+                            self._last_seen.pop(uid, None)
+                        log.warning(f"[STREAM] user={uid} 리스 상실 → 읽기 중단")
+                except Exception as e:
+                    log.exception(f"[STREAM] user={uid} 리스 연장 실패: {e}")
+
+    # ------------------------------------------------------------------
+    # 읽기 / ACK
+    # ------------------------------------------------------------------
+    def _deliver(self, uid: int, entries):
+        entry_ids = [eid for eid, _ in entries]
+        img_ids = parse_img_ids(fields.get(b"img_id", fields.get("img_id")) for _, fields in entries)
+        self.touch(uid)
+        self.on_entries(uid, img_ids, entry_ids)
+
+    def ack(self, uid: int, entry_ids: List[bytes]):
+        """윈도우 분석이 끝난 엔트리 확인(XACK) 후 스트림에서 삭제(XDEL) - 왕복 1회"""
+        if not entry_ids:
+            return
+        pipe = self.r.pipeline(transaction=False)
+        pipe.xack(k_stream(uid), self.group, *entry_ids)
+        pipe.xdel(k_stream(uid), *entry_ids)
+        pipe.execute()
+
+    def _on_registry(self, entries):
+        """레지스트리에 등록된 유저의 리스 획득 (등록 엔트리는 바로 ACK + 삭제)"""
+        entry_ids = [eid for eid, _ in entries]
+        uids = set()
+        for _, fields in entries:
+            try:
+                uids.add(parse_uid(fields.get(b"uid", fields.get("uid"))))
+            except (TypeError, ValueError):
+                continue
+        pipe = self.r.pipeline(transaction=False)
+        pipe.xack(self.registry_key, self.group, *entry_ids)
+        pipe.xdel(self.registry_key, *entry_ids)
+        pipe.execute()
+        for uid in uids:
+            if not self.owns(uid):
+                self.acquire(uid)
+
+    def discover(self, pattern: bytes = b"ingest:*"):
+        """리스를 갖지 않은 유저 스트림을 찾아 리스 획득 시도"""
+        for key in self.r.scan_iter(pattern):
+            try:
+                uid = parse_stream_key(key)
+            except ValueError:
+                continue
+            if not self.owns(uid):
+                self.acquire(uid)
+
+    def run(self):
+        """리스를 가진 모든 유저 스트림을 XREADGROUP 한 번으로 대기하며 엔트리를 전달한다."""
+        threading.Thread(target=self._heartbeat, daemon=True, name="stream-heartbeat").start()
+        if self.registry_key:
+            self._ensure_group(self.registry_key)
+        while not self._stop.is_set():
+            try:
+                uids = self.leased_users()
+                if not uids and not self.registry_key:
+                    self._lease_event.wait(self.block_ms / 1000.0)
+                    self._lease_event.clear()
+                    self.on_tick(time.time())
+                    continue
+
+                streams = {k_stream(uid): ">" for uid in uids}
+                if self.registry_key:
+                    streams[self.registry_key] = ">"
+                block_ms = max(1, int(self.timeout_fn(time.time()) * 1000))
+                resp = self.r.xreadgroup(
+                    self.group, self.consumer, streams,
+                    count=self.read_count, block=block_ms,
+                )
+                for key, entries in resp or []:
+                    if key == self.registry_key:
+                        if entries:
+                            self._on_registry(entries)
+                        continue
+                    uid = parse_stream_key(key)
+                    if entries and self.owns(uid):
+                        self._deliver(uid, entries)
+
+                self.on_tick(time.time())
+
+            except redis.ResponseError as e:
+                # 리스 해제로 스트림이 삭제된 직후 등 그룹이 사라진 경우
+                if "NOGROUP" in str(e):
+                    if self.registry_key:
+                        self._ensure_group(self.registry_key)
+                    for uid in self.leased_users():
+                        if not self.r.exists(k_stream(uid)):
+                            with self._lock:
+                                self._leased.discard(uid)
+                                self._last_seen.pop(uid, None)
+                    continue
+                log.exception(f"[STREAM] 읽기 오류: {e}")
+                time.sleep(1)
+            except Exception as e:
+                log.exception(f"[STREAM] 수집 루프 오류: {e}")
+                time.sleep(1)
+
+    def stop(self):
+        self._stop.set()
+        self._lease_event.set()
+
+
+if __name__ == "__main__":
+    # 로컬 redis-server 대상 동작 확인:
+    #   REDIS_HOST=localhost python -m app.stream_ingest
+    # consumer-a가 엔트리를 읽은 뒤 ACK 없이 죽으면, 리스 만료 후 consumer-b가 회수해 순서대로 처리한다.
+    r = redis.Redis(host=os.getenv("REDIS_HOST", "localhost"), port=int(os.getenv("REDIS_PORT", "6379")))
+    uid = 990002
+    r.delete(k_stream(uid), k_lease(uid))
+    for i in range(5):
+        r.xadd(k_stream(uid), {"img_id": i})
+
+    received: Dict[str, List[int]] = {"a": [], "b": []}
+    a = StreamIngestor(r, lambda u, ids, eids: received["a"].extend(ids), consumer="consumer-a", lease_ms=1000)
+    a.acquire(uid)
+    threading.Thread(target=a.run, daemon=True).start()
+    time.sleep(0.5)
+    a.stop()  # ACK 없이 종료 (크래시 가정)
+    for i in range(5, 8):
+        r.xadd(k_stream(uid), {"img_id": i})
+    print(f"consumer-a 수신: {received['a']}")
+
+    b_ack: List[bytes] = []
+
+    def on_b(u, ids, eids):
+        received["b"].extend(ids)
+        b_ack.extend(eids)
+
+    b = StreamIngestor(r, on_b, consumer="consumer-b", lease_ms=1000)
+    while not b.acquire(uid):
+        time.sleep(0.2)  # a의 리스가 만료될 때까지 대기 (하트비트 중단)
+    threading.Thread(target=b.run, daemon=True).start()
+    time.sleep(0.5)
+    b.ack(uid, b_ack)
+    b.release(uid)
+    b.stop()
+    print(f"consumer-b 수신 (회수 + 신규): {received['b']}")
+    print(f"남은 pending: {r.exists(k_stream(uid)) and r.xpending(k_stream(uid), 'mindtrack')['pending']}")
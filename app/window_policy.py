@@ -0,0 +1,69 @@
+"""
+window_policy.py
+- 윈도우 종료 정책 (언제 수집을 멈추고 분석으로 넘길지 결정)
+- WindowPolicy를 상속해 close_reason / deadline을 구현하면 다른 정책으로 교체 가능
+"""
+import time
+from typing import Optional
+
+
+class WindowPolicy:
+    """
+    윈도우 종료 정책 인터페이스.
+    window는 opened_at, last_image_at, collected_ids 속성을 가진다.
+    """
+    def close_reason(self, window, now: float) -> Optional[str]:
+        """윈도우를 닫아야 하면 종료 사유 문자열, 아니면 None"""
+        raise NotImplementedError
+
+    def deadline(self, window) -> float:
+        """새 이미지가 없을 때 이 윈도우를 다시 판단해야 하는 시각 (epoch 초)"""
+        raise NotImplementedError
+
+
+class AdaptiveWindowPolicy(WindowPolicy):
+    """
+    다음 조건 중 가장 먼저 만족하는 시점에 윈도우를 닫는다.
+    - max_images: 이미지 N장 수집
+    - idle_gap_ms: 마지막 이미지 이후 T ms 동안 새 이미지 없음
+    - max_duration_sec: 윈도우를 연 뒤 최대 유지 시간
+    max_images / idle_gap_ms는 None 또는 0이면 비활성화된다.
+    """
+    def __init__(self, max_images: Optional[int] = None, idle_gap_ms: Optional[int] = None,
+                 max_duration_sec: float = 15):
+        self.max_images = max_images or None
+        self.idle_gap_sec = idle_gap_ms / 1000.0 if idle_gap_ms else None
+        self.max_duration_sec = max_duration_sec
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict], max_duration_sec: Optional[float] = None) -> "AdaptiveWindowPolicy":
+        """config.yaml의 worker.window_policy 섹션으로 생성"""
+        cfg = cfg or {}
+        return cls(
+            max_images=cfg.get("max_images"),
+            idle_gap_ms=cfg.get("idle_gap_ms"),
+            max_duration_sec=max_duration_sec if max_duration_sec is not None else cfg.get("max_duration_sec", 15),
+        )
+
+    def close_reason(self, window, now: Optional[float] = None) -> Optional[str]:
+        now = now if now is not None else time.time()
+        if self.max_images and len(window.collected_ids) >= self.max_images:
+            return "max_images"
+        if now - window.opened_at >= self.max_duration_sec:
+            return "max_duration"
+        if self.idle_gap_sec is not None and now - window.last_image_at >= self.idle_gap_sec:
+            return "idle_gap"
+        return None
+
+    def deadline(self, window) -> float:
+        deadline = window.opened_at + self.max_duration_sec
+        if self.idle_gap_sec is not None:
+            deadline = min(deadline, window.last_image_at + self.idle_gap_sec)
+        return deadline
+
+    def __repr__(self):
+        idle_ms = int(self.idle_gap_sec * 1000) if self.idle_gap_sec is not None else None
+        return (
+            f"AdaptiveWindowPolicy(max_images={self.max_images}, idle_gap_ms={idle_ms}, "
+            f"max_duration_sec={self.max_duration_sec})"
+        )
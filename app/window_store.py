@@ -0,0 +1,100 @@
+"""
+window_store.py
+- 워커가 사용하는 Redis 키 규칙 및 윈도우 수집용 일괄(batch) 접근 함수
+- Redis 구조: pending:{uid} (이미지 id 리스트), user:{uid}:img:{img_id} (이미지 바이너리),
+  active:pending (대기 이미지가 새로 생긴 유저 id 리스트, 워커가 BLPOP으로 즉시 감지)
+- 이미지 1장당 왕복(round trip)이 아니라 배치 1번당 왕복이 발생하도록 구성
+"""
+from typing import Iterable, List, Optional, Tuple
+
+import redis
+
+# 한 번의 LPOP으로 꺼내는 최대 이미지 id 개수
+DRAIN_BATCH = 100
+
+# 활성 유저 레지스트리 (producer가 비어 있던 pending 큐에 첫 이미지를 넣을 때 uid 등록)
+ACTIVE_KEY = b"active:pending"
+
+# pending 큐가 비어 있다가 첫 id가 들어온 경우에만 레지스트리에 uid 등록 (중복 등록 최소화)
+_ENQUEUE_LUA = """
+local n = redis.call('rpush', KEYS[1], ARGV[1])
+if n == 1 then
+    redis.call('rpush', KEYS[2], ARGV[2])
+end
+return n
+"""
+
+
+# ------------------------------------------------------------------
+# Redis 키 유틸
+# ------------------------------------------------------------------
+def k_img(uid: int, img_id: int) -> bytes:
+    """Redis 이미지 키 (bytes로 반환)"""
+    return f"user:{uid}:img:{img_id}".encode("utf-8")
+
+
+def k_pending(uid: int) -> bytes:
+    """Redis 큐 키 (bytes로 반환)"""
+    return f"pending:{uid}".encode("utf-8")
+
+
+def parse_pending_key(key) -> int:
+    """pending:{uid} 키에서 uid 추출"""
+    key_str = key.decode("utf-8") if isinstance(key, bytes) else key
+    return int(key_str.split(":")[1])
+
+
+def parse_uid(raw) -> int:
+    """레지스트리에서 꺼낸 uid(bytes/str)를 int로 변환"""
+    return int(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+
+
+def parse_img_ids(raw_ids: Iterable) -> List[int]:
+    """Redis에서 꺼낸 이미지 id(bytes/str)를 int로 변환 (잘못된 값은 무시)"""
+    ids = []
+    for raw in raw_ids:
+        try:
+            ids.append(int(raw.decode("utf-8") if isinstance(raw, bytes) else raw))
+        except (ValueError, AttributeError):
+            continue
+    return ids
+
+
+# ------------------------------------------------------------------
+# 일괄 접근 함수
+# ------------------------------------------------------------------
+def drain_pending(r: redis.Redis, key: bytes, first_id=None, count: int = DRAIN_BATCH) -> List[int]:
+    """
+    BLPOP으로 받은 첫 id 뒤에 쌓여 있는 id들을 LPOP(count) 한 번으로 모두 꺼낸다.
+    (Redis 6.2 이상의 LPOP count 사용, 왕복 1회)
+    """
+    raw_ids = [first_id] if first_id is not None else []
+    rest = r.lpop(key, count)
+    if rest:
+        raw_ids.extend(rest)
+    return parse_img_ids(raw_ids)
+
+
+def fetch_images(r: redis.Redis, uid: int, img_ids: List[int]) -> List[Tuple[int, Optional[bytes]]]:
+    """여러 이미지 바이너리를 MGET 한 번으로 조회 (왕복 1회)"""
+    if not img_ids:
+        return []
+    raws = r.mget([k_img(uid, img_id) for img_id in img_ids])
+    return list(zip(img_ids, raws))
+
+
+def delete_images(r: redis.Redis, uid: int, img_ids: List[int]) -> int:
+    """분석이 끝난 이미지들을 다중 키 DEL 한 번으로 삭제 (왕복 1회)"""
+    if not img_ids:
+        return 0
+    return r.delete(*[k_img(uid, img_id) for img_id in img_ids])
+
+
+def enqueue_image(r: redis.Redis, uid: int, img_id: int, raw: bytes, active_key: bytes = ACTIVE_KEY) -> int:
+    """
+    producer 측 이미지 등록 (Spring 백엔드도 같은 순서/스크립트로 등록해야 함).
+    이미지 저장 → pending:{uid}에 id 추가 → 큐가 비어 있었다면 active_key에 uid 추가.
+    반환값: 추가 후 pending 큐 길이
+    """
+    r.set(k_img(uid, img_id), raw)
+    return r.register_script(_ENQUEUE_LUA)(keys=[k_pending(uid), active_key], args=[img_id, uid])
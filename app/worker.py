@@ -1,22 +1,42 @@
 """
 fastapi_worker_clean.py
-- Redis에 쌓인 이미지를 30초 단위로 모아 분석(batch window)
-- Redis 구조: pending:{uid}, user:{uid}:img:{img_id}
-- 처리: pending → 폴더 저장 → AI 분석 → Spring 콜백 → 정리
-- 상태키/processing 제거, 구조 단순화
+- Redis에 쌓인 이미지를 윈도우 단위로 모아 분석(batch window)
+- 윈도우 종료: 이미지 N장 / 마지막 이미지 후 유휴 T ms / 최대 WINDOW_SEC 중 먼저 만족하는 조건 (window_policy.py)
+- Redis 구조: pending:{uid}, user:{uid}:img:{img_id} (키 규칙 및 일괄 조회는 window_store.py)
+- 처리: pending → 메모리 프레임(ImageFrame) → AI 분석 → Spring 콜백(callback_dispatcher.py, 비동기) → 정리
+  (이미지를 tmpdir에 쓰지 않고 Redis 바이트를 그대로 분석 단계에 전달, 디코딩은 분석 시 1회)
+- 중복 제거: 분석 워커가 프레임의 차이 해시(dhash)로 직전에 남긴 화면과 거의 같은 이미지를 분석에서 제외
+  (수집 스레드는 디코딩하지 않고, 해시용 디코딩 결과는 이후 분석 단계가 그대로 재사용)
+- 부하 차단: 분석 큐 지연이 임계값을 넘으면 축소된 파이프라인 단계로 분석 (degradation.py)
+- 수집(list 모드): 단일 수집 스레드가 감시 중인 모든 pending:{uid} 키를 BLPOP으로 한 번에 대기
+  (첫 이미지가 도착할 때 윈도우를 열고, 유휴 시간이 지난 유저는 감시 목록에서 제거)
+- 수집(stream 모드): ingest:{uid} 스트림 + 유저 리스로 여러 워커 프로세스가 유저를 나눠 처리 (stream_ingest.py)
+- 유저 발견(registry): producer가 큐가 비어 있던 유저를 active:pending / active:ingest에 등록하면
+  수집 스레드가 같은 블로킹 호출에서 바로 깨어나 처리 (pending:* 스캔은 느린 주기의 보조 수단)
 """
 import re
 import os
 import time
-import shutil
-import tempfile
-import requests
+import uuid
 import redis
+import itertools
 import threading
-from typing import List
+from typing import Dict, List, Optional
 from app.integration_service import IntegrationService
+from app.analysis_pool import AnalysisPool
+from app.callback_dispatcher import CallbackDispatcher
+from app.stream_ingest import StreamIngestor, ACTIVE_STREAM_KEY
+from app.window_policy import AdaptiveWindowPolicy, WindowPolicy
+from app.degradation import DegradationPolicy, LEVEL_NAMES
+from app.metrics import metrics
+from app.qa_context import save_qa_context
+from app.window_store import (
+    ACTIVE_KEY, k_pending, parse_pending_key, parse_uid, drain_pending, fetch_images, delete_images,
+)
 from app.logging.logger import get_logger
-from queue import Queue # 병렬 분석 파이프라인용 큐 추가
+from modules.image_selector.fingerprint import dhash, hamming
+from modules.image_frame import ImageFrame
+from config_loader import config
 
 log = get_logger("mindtrack.worker")
 
@@ -24,180 +44,532 @@ log = get_logger("mindtrack.worker")
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 SPRING_BASE = os.getenv("SPRING_CALLBACK_BASE", "http://spring-backend:8080")
-WINDOW_SEC = int(os.getenv("WINDOW_SEC", "15"))  # 윈도우 기간 (초)
+_worker_cfg = config.get("worker") or {}
+WINDOW_SEC = float(os.getenv("WINDOW_SEC", (_worker_cfg.get("window_policy") or {}).get("max_duration_sec", 15)))  # 윈도우 최대 기간 (초)
+IDLE_RETIRE_SEC = float(os.getenv("IDLE_RETIRE_SEC", "60"))  # 마지막 활동 후 유저 상태를 정리하기까지의 유휴 시간 (초)
+BLPOP_TIMEOUT_SEC = float(os.getenv("BLPOP_TIMEOUT_SEC", "1"))  # BLPOP 최대 대기 시간 (신규 유저 반영 주기)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))  # 동시에 분석을 수행하는 워커 수
+_ingest_cfg = _worker_cfg.get("ingest") or {}
+INGEST_MODE = os.getenv("INGEST_MODE", _ingest_cfg.get("mode", "list"))  # list(pending 리스트) | stream(Redis Streams)
+_discovery_cfg = _worker_cfg.get("discovery") or {}
+DISCOVERY_MODE = os.getenv("DISCOVERY_MODE", _discovery_cfg.get("mode", "registry"))  # registry(활성 유저 등록) | scan(키 스캔)
+FALLBACK_SCAN_SEC = float(_discovery_cfg.get("fallback_scan_sec", 1))  # registry 모드의 보조 스캔 주기 (0이면 비활성)
 
 #  이미지 바이너리를 안전하게 다루기 위해 decode_responses=False 유지
 r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=False)
 _service = IntegrationService()
 
-# 현재 처리 중인 유저 (중복 방지용)
-active_users = set()
-lock = threading.Lock()
+# Spring 콜백 디스패처 (keep-alive 풀, 재시도, dead-letter, 옵션 배치)
+callback_dispatcher = CallbackDispatcher.from_config(SPRING_BASE, r, _worker_cfg.get("callback"))
 
-# 분석을 비동기적으로 수행하기 위한 큐 생성
-analysis_queue = Queue()
+# 윈도우 종료 정책 (config.yaml worker.window_policy, 다른 WindowPolicy 구현으로 교체 가능)
+window_policy: WindowPolicy = AdaptiveWindowPolicy.from_config(
+    _worker_cfg.get("window_policy"), max_duration_sec=WINDOW_SEC
+)
 
-# ------------------------------------------------------------------
-# Redis 키 유틸
-# ------------------------------------------------------------------
-def k_img(uid: int, img_id: int) -> bytes:
-    """Redis 이미지 키 (bytes로 반환)"""
-    return f"user:{uid}:img:{img_id}".encode("utf-8")
+# 수집 시 중복 화면 제거 (config.yaml worker.dedup)
+_dedup_cfg = _worker_cfg.get("dedup") or {}
+DEDUP_ENABLED = bool(_dedup_cfg.get("enabled", True))
+DEDUP_HASH_SIZE = int(_dedup_cfg.get("hash_size", 8))
+DEDUP_MAX_DISTANCE = int(_dedup_cfg.get("max_distance", 4))  # 직전에 남긴 화면과의 해밍 거리가 이 값 이하이면 폐기
+
+# 큐 지연 기반 부하 차단 정책 (config.yaml worker.degradation)
+degradation_policy = DegradationPolicy.from_config(_worker_cfg.get("degradation"))
 
+# 분석 직후 QA 컨텍스트 미리 구성 (config.yaml worker.qa_context)
+_qa_context_cfg = _worker_cfg.get("qa_context") or {}
+QA_CONTEXT_ENABLED = bool(_qa_context_cfg.get("enabled", True))
+QA_CONTEXT_TTL_SEC = int(_qa_context_cfg.get("ttl_sec", 86400))
 
-def k_pending(uid: int) -> bytes:
-    """Redis 큐 키 (bytes로 반환)"""
-    return f"pending:{uid}".encode("utf-8")
+# 행동 예측 스트림에서 완료된 항목부터 부분 콜백 전송 (config.yaml worker.partial_callback)
+PARTIAL_CALLBACK_ENABLED = bool((_worker_cfg.get("partial_callback") or {}).get("enabled", False))
 
 
+class UserWindow:
+    """
+    한 유저의 열린 윈도우.
+    첫 이미지가 도착한 시점에 생성되며, 종료 정책(window_policy)을 만족하면 분석 큐로 넘어간다.
+    """
+    def __init__(self, user_id: int, opened_at: float = None):
+        self.user_id = user_id
+        self.opened_at = opened_at or time.time()
+        self.last_image_at = self.opened_at
+        self.closed_at = None  # 분석 큐에 전달된 시각 (큐 지연 계산용)
+        self.frames: List[ImageFrame] = []
+        self.collected_ids: List[int] = []
+        # stream 모드에서 분석 완료 후 ACK할 스트림 엔트리 id (+ 이미지 id → 엔트리 id, 병합 시 잘라낸 이미지 ACK용)
+        self.stream_entries: List[bytes] = []
+        self.entry_by_image: Dict[int, bytes] = {}
+        # 중복 제거로 분석에서 제외한 이미지 수
+        self.dropped = 0
+        # 콜백 payload의 window_id / seq (부분 결과 → 최종 결과 순으로 증가, 수신 측은 더 작은 seq를 무시)
+        self.window_id = uuid.uuid4().hex
+        self._seq = itertools.count(1)
+
+    def next_seq(self) -> int:
+        return next(self._seq)
+
+    def add(self, img_id: int, raw: bytes, now: float):
+        self.frames.append(ImageFrame(f"{img_id}.png", raw, image_id=img_id))
+        self.collected_ids.append(img_id)
+        self.last_image_at = now
+
+    def absorb(self, other: "UserWindow"):
+        """다른 윈도우의 이미지와 스트림 엔트리를 이 윈도우로 옮긴다."""
+        self.frames.extend(other.frames)
+        self.collected_ids.extend(other.collected_ids)
+        self.stream_entries.extend(other.stream_entries)
+        self.last_image_at = max(self.last_image_at, other.last_image_at)
+        self.entry_by_image.update(other.entry_by_image)
+        self.dropped += other.dropped
+
+    def trim(self, max_images: int) -> Optional["UserWindow"]:
+        """
+        가장 최근 max_images장만 남기고, 떼어낸 오래된 이미지(와 그 스트림 엔트리)를 담은 윈도우를 반환한다.
+        넘지 않으면 None.
+        """
+        excess = len(self.collected_ids) - max_images
+        if excess <= 0:
+            return None
+        overflow = UserWindow(self.user_id, self.opened_at)
+        overflow.frames, self.frames = self.frames[:excess], self.frames[excess:]
+        overflow.collected_ids, self.collected_ids = self.collected_ids[:excess], self.collected_ids[excess:]
+        own_entries = set(self.stream_entries)
+        for img_id in overflow.collected_ids:
+            entry_id = self.entry_by_image.pop(img_id, None)
+            if entry_id in own_entries:
+                overflow.stream_entries.append(entry_id)
+        if overflow.stream_entries:
+            trimmed = set(overflow.stream_entries)
+            self.stream_entries = [e for e in self.stream_entries if e not in trimmed]
+        return overflow
+
+
+# 감시 중인 유저 (uid -> 마지막 활동 시각). BLPOP 대상 키 목록이 된다.
+watched_users: Dict[int, float] = {}
+# 이미지가 도착해 열린 윈도우 (uid -> UserWindow)
+open_windows: Dict[int, UserWindow] = {}
+# 중복 제거: 유저별로 마지막에 분석 대상으로 남긴 화면의 해시 (다음 윈도우 첫 프레임 비교용)
+last_hashes: Dict[int, int] = {}
+lock = threading.Lock()
+# 감시 유저가 생기면 대기 중인 수집 스레드를 깨우기 위한 이벤트
+_watch_event = threading.Event()
+
 # ------------------------------------------------------------------
 # 유저별 윈도우(batch window) 처리
 # ------------------------------------------------------------------
-def process_user_window(user_id: int):
+def watch_user(user_id: int):
+    """유저를 BLPOP 감시 목록에 추가한다. (이미 감시 중이면 무시)"""
+    with lock:
+        if user_id in watched_users:
+            return
+        watched_users[user_id] = time.time()
+        log.info(f"[WORKER] ▶ user={user_id} 감시 시작 (watched={len(watched_users)})")
+    _watch_event.set()
+
+
+def process_user_window(user_id: int, img_ids: List[int], entry_ids: List[bytes] = None):
+    """
+    한 번에 꺼낸 이미지 id들을 해당 유저의 윈도우에 추가한다.
+    열린 윈도우가 없으면 이 시점(첫 이미지 도착)에 새 윈도우를 연다.
+    이미지 바이너리는 MGET 한 번으로 조회한다.
+    배치 도중 최대 장수(max_images)에 도달하면 윈도우를 바로 닫고 나머지는 새 윈도우로 넘긴다.
+    entry_ids(stream 모드)는 배치 끝에 열려 있는 윈도우에 붙여 분석 완료 후 ACK 한다.
+    이미지는 디코딩하지 않는다. (중복 제거는 분석 워커의 dedup_window에서 수행)
     """
-    한 유저의 15초 윈도우(batch window) 동안 Redis 큐에서 이미지를 수집하고
-    새 tmpdir에 저장한 뒤, 분석 큐(analysis_queue)에 전달한다.
-    이후 즉시 다음 윈도우 수집으로 넘어가며, 분석은 별도 스레드에서 수행된다.
+    images = [(img_id, raw) for img_id, raw in fetch_images(r, user_id, img_ids) if raw]
+    if not images:
+        ack_entries(user_id, entry_ids)
+        return
+
+    # stream 모드: 엔트리 1개 = 이미지 1장 (잘못된 id가 섞여 정렬이 깨지면 이미지별 매핑 없이 윈도우 단위로만 ACK)
+    entry_by_image = dict(zip(img_ids, entry_ids)) if entry_ids and len(entry_ids) == len(img_ids) else {}
+
+    now = time.time()
+    closed = []
+    with lock:
+        watched_users[user_id] = now
+        for img_id, raw in images:
+            window = open_windows.get(user_id)
+            if window is None:
+                window = UserWindow(user_id, now)
+                open_windows[user_id] = window
+                log.info(f"[COLLECT] user={user_id} 윈도우 시작 ({window_policy})")
+            window.add(img_id, raw, now)
+            if img_id in entry_by_image:
+                window.entry_by_image[img_id] = entry_by_image[img_id]
+
+            reason = window_policy.close_reason(window, now)
+            if reason == "max_images":
+                del open_windows[user_id]
+                closed.append((window, reason))
+
+        if entry_ids:
+            (open_windows.get(user_id) or closed[-1][0]).stream_entries.extend(entry_ids)
+
+    for window, reason in closed:
+        dispatch_window(window, reason, now)
+
+
+def _fingerprint(frame: ImageFrame):
     """
+    프레임 차이 해시. frame.rgb(디코딩 캐시)를 해시하므로 이후 대표 이미지 선택/OCR/설명 단계는 다시 디코딩하지 않는다.
+    디코딩 실패 시 None → 중복 판단 없이 유지
+    """
+    image = frame.rgb
+    return dhash(image, DEDUP_HASH_SIZE) if image is not None else None
+
 
+def dedup_window(user_id: int, window: UserWindow):
+    """
+    분석 워커에서 호출: 직전에 남긴 화면(이전 윈도우의 마지막 화면 포함)과 거의 같은
+    (해밍 거리 ≤ DEDUP_MAX_DISTANCE) 프레임을 분석 대상에서 제외한다.
+    Redis 원본은 분석 후 윈도우의 다른 이미지와 함께 삭제된다.
+    """
+    with lock:
+        last = last_hashes.get(user_id)
+    kept = []
+    for frame in window.frames:
+        fingerprint = _fingerprint(frame)
+        if fingerprint is not None and last is not None and hamming(fingerprint, last) <= DEDUP_MAX_DISTANCE:
+            frame.release()
+            window.dropped += 1
+            continue
+        kept.append(frame)
+        if fingerprint is not None:
+            last = fingerprint
+    window.frames = kept
+
+    with lock:
+        # 분석 중 감시 종료(retire)된 유저는 다시 기록하지 않음
+        if last is not None and user_id in watched_users:
+            last_hashes[user_id] = last
+    if window.dropped:
+        metrics.incr("frames_dropped", window.dropped)
+    metrics.incr("frames_kept", len(kept))
+
+
+def dispatch_window(window: UserWindow, reason: str, now: float):
+    """닫힌 윈도우의 종료 사유를 메트릭으로 기록하고 분석 워커 풀(analysis_pool)에 전달한다."""
+    if not window.collected_ids:
+        return
+
+    metrics.incr("window_closed", reason=reason)
+    metrics.observe("window_duration_sec", now - window.opened_at, reason=reason)
+    metrics.observe("window_images", len(window.collected_ids), reason=reason)
+    log.info(
+        f"[WORKER] user={window.user_id} 총 {len(window.collected_ids)}장 수집 완료 "
+        f"(reason={reason}, {now - window.opened_at:.2f}s). 분석 큐에 전달."
+    )
+    window.closed_at = now
+    analysis_pool.submit(window.user_id, window)
+
+
+def close_due_windows(now: float):
+    """종료 정책(window_policy)을 만족한 윈도우를 닫아 분석 워커 풀에 전달한다."""
+    with lock:
+        due = []
+        for window in list(open_windows.values()):
+            reason = window_policy.close_reason(window, now)
+            if reason:
+                del open_windows[window.user_id]
+                watched_users[window.user_id] = now
+                due.append((window, reason))
+
+    for window, reason in due:
+        dispatch_window(window, reason, now)
+
+
+def retire_idle_users(now: float):
+    """열린 윈도우 없이 IDLE_RETIRE_SEC 이상 활동이 없는 유저를 감시 목록에서 제거한다."""
+    with lock:
+        idle = [
+            uid for uid, last_seen in watched_users.items()
+            if uid not in open_windows and now - last_seen >= IDLE_RETIRE_SEC
+        ]
+        for uid in idle:
+            del watched_users[uid]
+            last_hashes.pop(uid, None)
+    for uid in idle:
+        _service.forget_user(uid)
+        log.info(f"[WORKER] ■ user={uid} 유휴 상태로 감시 종료 (watched={len(watched_users)})")
+
+
+def _blpop_timeout(now: float) -> float:
+    """가장 먼저 닫혀야 할 윈도우 시각까지만 블로킹하도록 BLPOP 타임아웃 계산"""
+    timeout = BLPOP_TIMEOUT_SEC
+    with lock:
+        for window in open_windows.values():
+            timeout = min(timeout, window_policy.deadline(window) - now)
+    # BLPOP의 timeout=0은 무한 대기이므로 최소값 보장
+    return max(timeout, 0.01)
+
+
+def collect_forever():
+    """
+    감시 중인 모든 pending:{uid} 키를 하나의 BLPOP으로 대기하며 이미지를 수집한다.
+    registry 모드에서는 활성 유저 레지스트리(active:pending)도 같은 BLPOP으로 대기하므로
+    새 유저의 첫 이미지도 스캔 주기를 기다리지 않고 바로 수집된다.
+    유저 수와 무관하게 스레드 1개, 대기 중에는 Redis 호출이 발생하지 않는다.
+    """
+    rotation = 0
     while True:
-            start_time = time.time()
-            collected_ids: List[int] = []
-            tmpdir = tempfile.mkdtemp(prefix=f"user{user_id}_")
-
-            #log.info(f"[WORKER] user={user_id} 윈도우 시작 ({WINDOW_SEC}초 동안 수집 중...)")
-            log.info(f"[COLLECT] user={user_id} 수집 스레드 시작 (window={WINDOW_SEC}s)")
-
-            # 1. {WINDOW_SEC}초 동안 이미지 수집
-            while time.time() - start_time < WINDOW_SEC:
-                img_id = r.lpop(k_pending(user_id))
-                if not img_id:
-                    time.sleep(0.2)
-                    continue
-
-                try:
-                    img_int = int(img_id.decode("utf-8") if isinstance(img_id, bytes) else img_id)
-                except ValueError:
-                    continue
-
-                raw = r.get(k_img(user_id, img_int))
-                if not raw:
-                    continue
-
-                img_path = os.path.join(tmpdir, f"{img_int}.png")
-                with open(img_path, "wb") as f:
-                    f.write(raw)
-                collected_ids.append(img_int)
-            
-            # 2. 수집된 이미지가 없으면 tmpdir 삭제 후 다음 루프로 이동
-            if not collected_ids:
-                log.info(f"[COLLECT] user={user_id} 수집된 이미지 없음. 다음 윈도우 대기.")
-                shutil.rmtree(tmpdir, ignore_errors=True)
+        try:
+            with lock:
+                keys = [k_pending(uid) for uid in watched_users]
+
+            if keys:
+                # BLPOP은 앞쪽 키부터 확인하므로 시작 위치를 돌려가며 유저 간 공정성 확보
+                rotation = (rotation + 1) % len(keys)
+                keys = keys[rotation:] + keys[:rotation]
+            if DISCOVERY_MODE == "registry":
+                keys.insert(0, ACTIVE_KEY)
+
+            if not keys:
+                _watch_event.wait(BLPOP_TIMEOUT_SEC)
+                _watch_event.clear()
                 continue
-            
-            # 3. 수집 완료 → 분석 큐에 전
-            log.info(f"[WORKER] user={user_id} 총 {len(collected_ids)}장 수집 완료. 분석 큐에 전달.")
-            analysis_queue.put((user_id, tmpdir, collected_ids))
 
-            # 4. 즉시 다음 윈도우 수집 시작 (분석은 별도 스레드에서 수행)
-            log.info(f"[COLLECT] user={user_id} 다음 윈도우로 이동.")
+            item = r.blpop(keys, timeout=_blpop_timeout(time.time()))
+            if item:
+                key, value = item
+                if key == ACTIVE_KEY:
+                    # 새로 등록된 유저: 감시 목록에 추가하고 쌓인 id를 바로 꺼냄
+                    user_id = parse_uid(value)
+                    watch_user(user_id)
+                    img_ids = drain_pending(r, k_pending(user_id))
+                else:
+                    # 첫 id는 BLPOP으로, 뒤에 쌓인 id는 LPOP(count) 한 번으로 함께 꺼냄
+                    user_id = parse_pending_key(key)
+                    img_ids = drain_pending(r, key, value)
+                if img_ids:
+                    process_user_window(user_id, img_ids)
+
+            now = time.time()
+            close_due_windows(now)
+            retire_idle_users(now)
+
+        except Exception as e:
+            log.exception(f"[COLLECT] 수집 루프 오류: {e}")
+            time.sleep(1)
+
+
+def refresh_qa_context(user_id: int):
+    """유저의 최신 벡터DB 상태로 QA 컨텍스트를 구성해 Redis(qa:ctx:{uid})에 저장"""
+    t0 = time.time()
+    try:
+        save_qa_context(r, user_id, _service.build_qa_context(user_id), QA_CONTEXT_TTL_SEC)
+        metrics.observe("qa_context_build_sec", time.time() - t0)
+    except Exception as e:
+        log.warning(f"[QA_CTX] user={user_id} QA 컨텍스트 구성 실패: {e}")
 
 
-def analyze_worker():
+def analyze_window(user_id: int, window: UserWindow):
     """
-    process_user_window()가 analysis_queue에 넣은 작업을 소비한다.
-    각 폴더(tmpdir)에 대해 AI 분석을 수행하고, Spring 콜백 전송 및 데이터 정리를 담당한다.
+    분석 워커 풀(analysis_pool)이 호출하는 윈도우 1개 분석 작업.
+    윈도우의 메모리 프레임에 대해 AI 분석을 수행하고, Spring 콜백 전송 및 데이터 정리를 담당한다.
     """
-    while True:
+    collected_ids = window.collected_ids
+    try:
+        if DEDUP_ENABLED:
+            dedup_window(user_id, window)
+        if not window.frames:
+            log.info(f"[ANALYZE] user={user_id} 모든 이미지가 직전 화면과 같아 분석 생략 ({len(collected_ids)}장)")
+            return
+        log.info(f"[ANALYZE] user={user_id} 분석 시작 ({len(window.frames)}장, 중복 {window.dropped}장 제외)")
+        # 1. 큐 지연(이 윈도우의 대기시간과 가장 오래 대기 중인 윈도우 중 큰 값)으로 부하 차단 단계 결정
+        t_ai_start = time.time()
+        lag = max(t_ai_start - (window.closed_at or window.opened_at), analysis_pool.oldest_wait_sec())
+        level = degradation_policy.level_for(lag)
+
+        # 2. AI 분석 실행 (예측 항목이 완료될 때마다 partial=True 콜백을 먼저 전송)
+        def on_partial(partial: dict):
+            metrics.incr("callback_partial")
+            callback_dispatcher.submit(build_payload(user_id, window, partial, partial["degradation_level"]))
+
+        result = {}
         try:
-            user_id, tmpdir, collected_ids = analysis_queue.get()
-            log.info(f"[ANALYZE] user={user_id} 폴더={tmpdir} 분석 시작 ({len(collected_ids)}장)")
-            # 1. AI 분석 실행
-            t_ai_start = time.time()
-            result = {}
-            try:
-                result = _service.run_image_cycle(tmpdir) or {}
-            except Exception as e:
-                log.exception(f"[ANALYZE] AI 분석 오류 user={user_id}: {e}")
-            t_ai_end = time.time()
-
-            log.info(f"[PERF] AI 분석 소요시간: {t_ai_end - t_ai_start:.2f}s")
-            log.info(f"[ANALYZE] 분석 결과: {result}")
-
-            # 2. 대표 이미지 및 결과 추출
-            rep_img_path = result.get("representative_image", "")
-            rep_img_name = os.path.basename(rep_img_path)
-            match = re.search(r"(\d+)", rep_img_name)
-            representative_id = int(match.group(1)) if match else (collected_ids[0] if collected_ids else -1)
-
-            desc = result.get("description", "")
-            actions = result.get("predicted_actions", [])
-            questions = result.get("predicted_questions", [])
-
-            payload = {
-                "user_id": user_id,
-                "image_id": representative_id,
-                "suggestion": {
-                    "representative_image": rep_img_name,
-                    "description": desc,
-                    "predicted_actions": actions,
-                },
-                "predicted_questions": [{"question": q} for q in questions[:3]],
-            }
-
-            t_callback_start = time.time()
-            try:
-                requests.post(f"{SPRING_BASE}/analysis/result", json=payload, timeout=10)
-                log.info(f"[CALLBACK TEST] posting to {SPRING_BASE}/analysis/result")
-                log.info(f"[CALLBACK PAYLOAD] {payload}")
-                log.info(f"[ANALYZE] ✅ Spring 콜백 성공 user={user_id}")
-            except Exception as e:
-                log.exception(f"[ANALYZE] Spring 콜백 실패 user={user_id}: {e}")
-            t_callback_end = time.time()
-
-            log.info(f"[PERF] Spring 콜백 소요시간: {t_callback_end - t_callback_start:.2f}s")
-
-        finally:
-            # 정리: temp 폴더 및 redis 데이터 정리
-            for img_id in collected_ids:
-                r.delete(k_img(user_id, img_id))  #분석 끝난 원본 이미지를 정리해줘야 메모리 누수 방지
-            shutil.rmtree(tmpdir, ignore_errors=True)
-            analysis_queue.task_done()
-            log.info(f"[ANALYZE] user={user_id} 분석 완료 및 정리 완료 ({len(collected_ids)}장)")
+            result = _service.run_image_cycle(
+                window.frames, degradation_level=level, user_id=user_id,
+                on_partial=on_partial if PARTIAL_CALLBACK_ENABLED else None,
+            ) or {}
+        except Exception as e:
+            log.exception(f"[ANALYZE] AI 분석 오류 user={user_id}: {e}")
+        t_ai_end = time.time()
+
+        level = result.get("degradation_level", level)
+        for stage, timing in (result.get("stage_timings") or {}).items():
+            if not timing.get("skipped"):
+                metrics.observe("stage_sec", timing["sec"], stage=stage)
+        metrics.incr("analysis_degradation", level=LEVEL_NAMES.get(level, level))
+        if result.get("reused"):
+            metrics.incr("analysis_reused")
+        log.info(f"[PERF] AI 분석 소요시간: {t_ai_end - t_ai_start:.2f}s (queue_lag={lag:.2f}s, degradation={level}, "
+                 f"critical_path={result.get('critical_path')})")
+        log.info(f"[ANALYZE] 분석 결과: {result}")
+
+        # 3. 대표 이미지 및 결과 추출
+        payload = build_payload(user_id, window, result, level)
+
+        # 4. Spring 콜백은 디스패처에 넘기고 즉시 반환 (전송/재시도는 디스패처 스레드에서 수행)
+        callback_dispatcher.submit(payload)
+        log.info(f"[CALLBACK PAYLOAD] {payload}")
+
+        # 5. 벡터DB에 새 설명이 저장된 경우 QA 컨텍스트를 미리 구성 (질문 시 LLM 호출만 수행)
+        store_timing = (result.get("stage_timings") or {}).get("store")
+        if QA_CONTEXT_ENABLED and store_timing and not store_timing.get("skipped"):
+            refresh_qa_context(user_id)
+
+    finally:
+        # 정리: 메모리 프레임 및 redis 데이터 정리
+        delete_images(r, user_id, collected_ids)  #분석 끝난 원본 이미지를 정리해줘야 메모리 누수 방지 (다중 키 DEL 1회)
+        window.frames = []
+        ack_entries(user_id, window.stream_entries)
+        log.info(f"[ANALYZE] user={user_id} 분석 완료 및 정리 완료 ({len(collected_ids)}장)")
+
+
+def build_payload(user_id: int, window: UserWindow, result: dict, level: int) -> dict:
+    """run_image_cycle 결과(또는 부분 결과) → Spring 콜백 payload"""
+    collected_ids = window.collected_ids
+    rep_img_path = result.get("representative_image", "")
+    rep_img_name = os.path.basename(rep_img_path)
+    match = re.search(r"(\d+)", rep_img_name)
+    representative_id = int(match.group(1)) if match else (collected_ids[0] if collected_ids else -1)
+
+    desc = result.get("description", "")
+    actions = result.get("predicted_actions", [])
+    questions = result.get("predicted_questions", [])
+
+    return {
+        "user_id": user_id,
+        "image_id": representative_id,
+        "suggestion": {
+            "representative_image": rep_img_name,
+            "description": desc,
+            "predicted_actions": actions,
+            "cluster_size": result.get("cluster_size", len(collected_ids) - window.dropped),
+            "frames_kept": len(collected_ids) - window.dropped,
+            "frames_dropped": window.dropped,
+        },
+        "predicted_questions": [{"question": q} for q in questions[:3]],
+        "degradation_level": level,
+        "reused": bool(result.get("reused")),
+        "partial": bool(result.get("partial")),
+        "window_id": window.window_id,
+        "seq": window.next_seq(),
+    }
+
+
+def merge_windows(old: UserWindow, new: UserWindow):
+    """
+    대기 중인 윈도우(old)에 새 윈도우(new)의 이미지를 합친다.
+    합친 결과가 window_policy.max_images를 넘으면 최신 이미지만 남기고,
+    떼어낸 오래된 이미지는 (합친 윈도우, 폐기할 윈도우)로 반환해 풀이 discard_window로 정리하게 한다.
+    """
+    old.absorb(new)
+    max_images = getattr(window_policy, "max_images", None)
+    overflow = old.trim(max_images) if max_images else None
+    if overflow is not None:
+        metrics.incr("analysis_merge_trimmed", len(overflow.collected_ids))
+    return old, overflow
+
+
+def discard_window(user_id: int, window: UserWindow):
+    """교체/폐기된 윈도우의 메모리 프레임과 Redis 원본 이미지를 정리한다."""
+    delete_images(r, user_id, window.collected_ids)
+    window.frames = []
+    ack_entries(user_id, window.stream_entries)
+    log.info(f"[ANALYZE] user={user_id} 분석하지 않은 윈도우 정리 ({len(window.collected_ids)}장)")
+
+
+def ack_entries(user_id: int, entry_ids: List[bytes]):
+    """stream 모드: 처리(또는 폐기)가 끝난 스트림 엔트리 ACK"""
+    if entry_ids and stream_ingestor is not None:
+        stream_ingestor.ack(user_id, entry_ids)
+
+
+# 분석 워커 풀 (다른 유저는 동시에, 같은 유저는 순서대로 분석)
+_queue_cfg = _worker_cfg.get("analysis_queue") or {}
+analysis_pool = AnalysisPool(
+    analyze_window,
+    num_workers=ANALYSIS_WORKERS,
+    max_pending=_queue_cfg.get("max_pending", 0),
+    coalesce=_queue_cfg.get("coalesce", "none"),
+    put_timeout_sec=_queue_cfg.get("put_timeout_sec", 5),
+    merge_fn=merge_windows,
+    discard_fn=discard_window,
+)
+
+
+def _stream_tick(now: float):
+    close_due_windows(now)
+    retire_idle_users(now)
+    stream_ingestor.release_idle(now, IDLE_RETIRE_SEC)
+
+
+def _user_busy(user_id: int) -> bool:
+    """열린 윈도우나 분석 대기/진행 중인 윈도우가 있으면 리스를 유지"""
+    with lock:
+        if user_id in open_windows:
+            return True
+    return analysis_pool.has_work(user_id)
+
+
+# stream 모드 수집기 (list 모드면 None)
+stream_ingestor = StreamIngestor.from_config(
+    r, _ingest_cfg,
+    on_entries=process_user_window,
+    on_tick=_stream_tick,
+    timeout_fn=_blpop_timeout,
+    is_busy=_user_busy,
+    registry_key=ACTIVE_STREAM_KEY if DISCOVERY_MODE == "registry" else None,
+) if INGEST_MODE == "stream" else None
 
 # ------------------------------------------------------------------
 # 메인 루프 (모든 유저 감시)
 # ------------------------------------------------------------------
 def run_forever():
     """
-    Redis의 pending:* 큐를 주기적으로 감시하여,
-    유저별로 수집 스레드를 실행한다.
-    동시에 하나의 분석 스레드(analyze_worker)가 큐를 소비하며 병렬로 동작한다.
+    새 유저는 수집 스레드가 활성 유저 레지스트리로 바로 감지한다. (DISCOVERY_MODE=registry)
+    아래 스캔은 레지스트리에 등록하지 않는 producer를 위한 보조 수단으로 FALLBACK_SCAN_SEC마다 수행한다.
+    (DISCOVERY_MODE=scan이면 기존처럼 1초마다 수행)
+    list 모드: pending:* 키를 찾아 수집 스레드(collect_forever)의 BLPOP 감시 목록에 추가한다.
+    stream 모드: ingest:* 스트림을 찾아 리스가 비어 있는 유저의 리스를 획득한다.
+    동시에 분석 워커 풀(analysis_pool)이 유저별 순서를 지키며 윈도우를 병렬로 분석한다.
     """
     
-    log.info(f"[WORKER] start pipeline mode (window={WINDOW_SEC}s)")
+    log.info(
+        f"[WORKER] start pipeline mode (ingest={INGEST_MODE}, discovery={DISCOVERY_MODE}, {window_policy}, "
+        f"idle_retire={IDLE_RETIRE_SEC}s, analysis_workers={ANALYSIS_WORKERS}, {degradation_policy})"
+    )
     
-    # 분석 전용 스레드 시작 (큐 소비자)
-    threading.Thread(target=analyze_worker, daemon=True).start()
-
+    # 콜백 디스패처 및 분석 워커 풀 시작 (큐 소비자)
+    callback_dispatcher.start()
+    analysis_pool.start()
+
+    if stream_ingestor is not None:
+        # 스트림 수집 스레드 시작 (리스를 가진 유저 스트림을 XREADGROUP으로 대기)
+        threading.Thread(target=stream_ingestor.run, daemon=True, name="stream-ingest-thread").start()
+    else:
+        # 수집 전용 스레드 시작 (BLPOP 기반, 유저 수와 무관하게 1개)
+        threading.Thread(target=collect_forever, daemon=True, name="collector-thread").start()
+
+    scan_interval = 1 if DISCOVERY_MODE == "scan" else FALLBACK_SCAN_SEC
+    last_scan = 0.0
     while True:
         try:
-            for key in r.scan_iter(b"pending:*"):  # bytes 단위 key -> Redis 내 모든 유저 큐 탐색
-                key_str = key.decode("utf-8")
-                user_id = int(key_str.split(":")[1])
-                
-                with lock:
-
-                    # 이미 윈도우 실행 중인 유저(수집 스레드가 실행 중)는 스킵
-                    if user_id in active_users:
-                        continue
-
-                    # 큐에 데이터가 있으면 새 윈도우 시작
-                    if r.llen(k_pending(user_id)) > 0:
-                        t = threading.Thread(target=process_user_window, args=(user_id,), daemon=True)
-                        t.start()
-                        active_users.add(user_id)
-                        log.info(f"[WORKER] ▶ user={user_id} 스레드 시작 (active={len(active_users)})")
+            now = time.time()
+            # 시작 직후 1회는 항상 스캔 (레지스트리 도입 전에 쌓인 키 처리)
+            if not last_scan or (scan_interval and now - last_scan >= scan_interval):
+                last_scan = now
+                if stream_ingestor is not None:
+                    stream_ingestor.discover()
+                else:
+                    # 비어 있는 리스트 키는 Redis에 존재하지 않으므로 발견된 키 = 대기 이미지가 있는 유저
+                    for key in r.scan_iter(b"pending:*"):
+                        user_id = parse_pending_key(key)
+                        if user_id not in watched_users:
+                            watch_user(user_id)
 
             time.sleep(1)
 
@@ -0,0 +1,99 @@
+"""
+fused_latency.py
+- 분석 사이클 1회의 종단 지연 비교 벤치마크 (실제 OpenAI API 호출)
+- two-call: 이미지 설명 요청 → (임베딩/유사 검색) → 행동 예측 요청 (LLM 왕복 2회, 예측은 스트리밍)
+- fused   : 이미지 + 최근/유사 컨텍스트를 멀티모달 요청 1회로 보내 설명과 예측을 함께 받음 (integration.fused_describe_predict)
+- 설명 캐시와 변화 없는 화면 재사용은 끄고, 모드별로 임시 벡터DB에 같은 이미지 순서로 기록을 쌓으며 측정
+
+실행 (OPENAI_API_KEY 필요, OPENAI_BASE_URL로 다른 엔드포인트 지정 가능):
+    python benchmarks/fused_latency.py --images app/sample/image --rounds 3
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import contextlib
+import io
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config_loader import config
+from app.integration_service import IntegrationService
+from modules.image_frame import load_frames
+from modules.image_description import ShardedVectorStore
+
+BENCH_UID = 990002
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run(service: IntegrationService, fused: bool, frames, rounds: int, warmup: int) -> dict:
+    """모드 1개 측정: 사이클 총 시간, 첫 예측 행동이 나온 시점, 임계 경로의 단계별 시간"""
+    service.fused_describe_predict = fused
+    service.vectors = ShardedVectorStore(db_dir=tempfile.mkdtemp(prefix="bench_shards_"), dim=config["vectordb"]["dim"])
+    service._last_cycles.clear()
+
+    totals, first_actions, stage_secs = [], [], {}
+    cycles = [frame for _ in range(rounds) for frame in frames]
+    for i, frame in enumerate(frames[:warmup] + cycles):
+        first = []
+        t0 = time.perf_counter()
+
+        def on_partial(_):
+            if not first:
+                first.append(time.perf_counter() - t0)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = service.run_image_cycle([frame], user_id=BENCH_UID, on_partial=on_partial)
+        total = time.perf_counter() - t0
+        if i < warmup:
+            continue
+        totals.append(total)
+        # 융합 모드는 부분 콜백이 없으므로 첫 예측 행동 = 사이클 완료 시점
+        first_actions.append(first[0] if first else total)
+        for name in result["critical_path"]:
+            stage_secs.setdefault(name, []).append(result["stage_timings"][name]["sec"])
+    return {
+        "mean": statistics.mean(totals),
+        "p50": _percentile(totals, 0.5),
+        "p95": _percentile(totals, 0.95),
+        "first_action": statistics.mean(first_actions),
+        "cycles": len(totals),
+        "critical_path": {name: statistics.mean(secs) for name, secs in stage_secs.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="two-call / fused 분석 사이클 종단 지연 벤치마크")
+    parser.add_argument("--images", default="app/sample/image", help="측정할 이미지 디렉토리")
+    parser.add_argument("--rounds", type=int, default=3, help="이미지 전체를 반복할 횟수")
+    parser.add_argument("--warmup", type=int, default=1, help="측정에서 제외할 모드별 첫 사이클 수")
+    args = parser.parse_args()
+
+    frames = load_frames(args.images)
+    if not frames:
+        raise SystemExit(f"No image files found in: {args.images}")
+
+    service = IntegrationService()
+    service.image_desc.cache = None  # 같은 이미지 반복 시 설명 캐시 적중 방지
+    service.reuse_unchanged = False
+
+    print(f"\n이미지 {len(frames)}장 x {args.rounds}회 측정 (모드별 워밍업 {args.warmup}회 제외)\n")
+    print(f"{'mode':<10}{'mean s':>9}{'p50 s':>9}{'p95 s':>9}{'first action s':>16}{'cycles':>8}")
+    results = {}
+    for name, fused in [("two-call", False), ("fused", True)]:
+        results[name] = stats = run(service, fused, frames, args.rounds, args.warmup)
+        print(f"{name:<10}{stats['mean']:>9.2f}{stats['p50']:>9.2f}{stats['p95']:>9.2f}"
+              f"{stats['first_action']:>16.2f}{stats['cycles']:>8}")
+
+    print("\n임계 경로 단계별 평균 (초)")
+    for name, stats in results.items():
+        path = " → ".join(f"{stage} {sec:.2f}" for stage, sec in stats["critical_path"].items())
+        print(f"{name:<10}{path}")
+    saved = results["two-call"]["mean"] - results["fused"]["mean"]
+    print(f"\nfused 평균 단축: {saved:.2f}s ({saved / results['two-call']['mean'] * 100:.1f}%)")
@@ -0,0 +1,100 @@
+"""
+window_roundtrips.py
+- 윈도우 1개 수집/정리에 필요한 Redis 왕복(round trip) 횟수 비교 벤치마크
+- before: 이미지마다 LPOP → GET, 정리 시 이미지마다 DEL
+- after : BLPOP → LPOP(count) → MGET, 정리 시 다중 키 DEL 1회 (app/window_store.py)
+
+실행 (로컬 redis-server 필요, Redis 6.2 이상):
+    REDIS_HOST=localhost python benchmarks/window_roundtrips.py --images 10 --windows 20
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import redis
+
+from app.window_store import k_img, k_pending, parse_img_ids, drain_pending, fetch_images, delete_images
+
+BENCH_UID = 990001
+
+
+class CountingConnection(redis.Connection):
+    """소켓에 명령을 보낸 횟수(= 왕복 횟수)를 센다. 파이프라인은 한 번으로 집계된다."""
+    round_trips = 0
+
+    def send_packed_command(self, command, check_health=True):
+        CountingConnection.round_trips += 1
+        super().send_packed_command(command, check_health)
+
+
+def _seed(r: redis.Redis, n_images: int, payload: bytes):
+    pipe = r.pipeline(transaction=False)
+    for img_id in range(n_images):
+        pipe.set(k_img(BENCH_UID, img_id), payload)
+        pipe.rpush(k_pending(BENCH_UID), img_id)
+    pipe.execute()
+
+
+def collect_before(r: redis.Redis) -> int:
+    """기존 방식: LPOP 1건 → GET 1건 반복, 이미지별 DEL"""
+    collected = []
+    while True:
+        img_id = r.lpop(k_pending(BENCH_UID))
+        if not img_id:
+            break
+        img_int = parse_img_ids([img_id])[0]
+        if r.get(k_img(BENCH_UID, img_int)):
+            collected.append(img_int)
+    for img_id in collected:
+        r.delete(k_img(BENCH_UID, img_id))
+    return len(collected)
+
+
+def collect_after(r: redis.Redis) -> int:
+    """배치 방식: BLPOP 1회 + LPOP(count) 1회 + MGET 1회, 다중 키 DEL 1회"""
+    item = r.blpop([k_pending(BENCH_UID)], timeout=1)
+    if not item:
+        return 0
+    key, first_id = item
+    img_ids = drain_pending(r, key, first_id)
+    collected = [img_id for img_id, raw in fetch_images(r, BENCH_UID, img_ids) if raw]
+    delete_images(r, BENCH_UID, collected)
+    return len(collected)
+
+
+def run(r: redis.Redis, fn, n_images: int, n_windows: int, payload: bytes):
+    trips, elapsed, images = 0, 0.0, 0
+    for _ in range(n_windows):
+        _seed(r, n_images, payload)
+        CountingConnection.round_trips = 0
+        t0 = time.perf_counter()
+        images += fn(r)
+        elapsed += time.perf_counter() - t0
+        trips += CountingConnection.round_trips
+    return trips / n_windows, elapsed / n_windows * 1000, images
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="윈도우당 Redis 왕복 횟수 벤치마크")
+    parser.add_argument("--images", type=int, default=10, help="윈도우당 이미지 수")
+    parser.add_argument("--windows", type=int, default=20, help="측정할 윈도우 수")
+    parser.add_argument("--size-kb", type=int, default=200, help="이미지 1장 크기(KB)")
+    args = parser.parse_args()
+
+    pool = redis.ConnectionPool(
+        connection_class=CountingConnection,
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+    )
+    r = redis.Redis(connection_pool=pool, decode_responses=False)
+    r.delete(k_pending(BENCH_UID))
+    payload = os.urandom(args.size_kb * 1024)
+
+    print(f"윈도우당 이미지 {args.images}장, {args.windows}개 윈도우 측정\n")
+    print(f"{'mode':<8}{'round trips/window':>20}{'ms/window':>12}{'images':>8}")
+    for name, fn in [("before", collect_before), ("after", collect_after)]:
+        trips, ms, images = run(r, fn, args.images, args.windows, payload)
+        print(f"{name:<8}{trips:>20.1f}{ms:>12.2f}{images:>8}")
@@ -6,20 +6,29 @@ Modules package initializer.
 - action_predictor: 다음 행동 및 예상 질문 예측
 - history_qa: 과거 + 현재 컨텍스트 기반 질의응답
 - image_description: 이미지 설명 생성 및 임베딩
+- image_frame: 한 번만 디코딩해 여러 단계가 공유하는 메모리 이미지 프레임
 - image_selector: 업로드된 이미지 중 대표 이미지 선택
 - ocr_pii: OCR 기반 개인정보 탐지 및 마스킹
+- prompting: 한 번만 파싱해 재사용하는 프롬프트 템플릿 (고정 접두부 우선 배치, 길이 집계)
+- streaming: 스트리밍 모델 출력의 점진적 JSON 파싱 및 SSE 전송 유틸
 """
 
 from . import action_predictor
 from . import history_qa
 from . import image_description
+from . import image_frame
 from . import image_selector
 from . import ocr_pii
+from . import prompting
+from . import streaming
 
 __all__ = [
     "action_predictor",
     "history_qa",
     "image_description",
+    "image_frame",
     "image_selector",
     "ocr_pii",
+    "prompting",
+    "streaming",
 ]
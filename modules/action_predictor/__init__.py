@@ -4,6 +4,7 @@ Action Predictor Module
 다음 행동(predicted_actions)과 예상 질문(predicted_questions)을 예측합니다.
 """
 
-from .predictor import ActionPredictor
+from .predictor import ActionPredictor, AsyncActionPredictor
+from .describe_predict import DescribeAndPredict, AsyncDescribeAndPredict
 
-__all__ = ["ActionPredictor"]
+__all__ = ["ActionPredictor", "AsyncActionPredictor", "DescribeAndPredict", "AsyncDescribeAndPredict"]
@@ -0,0 +1,68 @@
+import os
+from openai import OpenAI, AsyncOpenAI
+
+from modules.image_frame import ImageFrame, VisionPayloadOptimizer
+from modules.prompting import PromptTemplate
+
+
+class DescribeAndPredict:
+    """
+    이미지 설명 + 행동 예측을 멀티모달 요청 1회로 수행 (ImageDescription → ActionPredictor 2회 왕복 대체)
+    출력: {"current_action", "predicted_actions", "predicted_questions"} JSON 텍스트
+    """
+    def __init__(self, prompt_filename="describe_and_predict_prompt.txt", model_name="gpt-4.1-mini",
+                 max_output_tokens=800, optimizer: VisionPayloadOptimizer = None):
+        self.client = OpenAI()
+        self.model_name = model_name
+        self.max_output_tokens = max_output_tokens
+        self.optimizer = optimizer  # 전송 전 축소/재인코딩 (선택)
+        prompt_path = os.path.join(os.path.dirname(__file__), "prompts", prompt_filename)
+        self.prompt_template = PromptTemplate.from_file(prompt_path, name="describe_and_predict")
+
+    def _build_prompt(self, recent_context: str, similar_context: str) -> str:
+        return self.prompt_template.render(recent_context=recent_context, similar_context=similar_context)
+
+    def _request(self, frame: ImageFrame, detail: str, folder_context, recent_context: str, similar_context: str) -> dict:
+        context_text = "\n".join(folder_context)
+        if self.optimizer is not None:
+            frame = self.optimizer.optimize(frame)
+        return dict(
+            model=self.model_name,
+            temperature=0.3,
+            max_output_tokens=self.max_output_tokens,
+            input=[
+                {"role": "system", "content": self._build_prompt(recent_context, similar_context)},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "input_text", "text": f"이미지를 분석하고 JSON을 반환하세요.\n\n폴더 내 다른 이미지들:\n{context_text}"},
+                        {"type": "input_image", "image_url": frame.data_url(), "detail": detail}
+                    ]
+                }
+            ]
+        )
+
+    def describe_and_predict(self, frame: ImageFrame, detail: str, folder_context, recent_context: str,
+                             similar_context: str) -> str:
+        resp = self.client.responses.create(
+            **self._request(frame, detail, folder_context, recent_context, similar_context)
+        )
+        return resp.output_text
+
+
+class AsyncDescribeAndPredict(DescribeAndPredict):
+    """DescribeAndPredict with AsyncOpenAI"""
+    def __init__(self, prompt_filename="describe_and_predict_prompt.txt", model_name="gpt-4.1-mini",
+                 max_output_tokens=800, optimizer: VisionPayloadOptimizer = None, **client_kwargs):
+        super().__init__(
+            prompt_filename=prompt_filename, model_name=model_name, max_output_tokens=max_output_tokens,
+            optimizer=optimizer,
+        )
+        self.client = AsyncOpenAI(**client_kwargs)
+
+    async def describe_and_predict(self, frame: ImageFrame, detail: str, folder_context, recent_context: str,
+                                   similar_context: str) -> str:
+        resp = await self.client.responses.create(
+            **self._request(frame, detail, folder_context, recent_context, similar_context)
+        )
+        return resp.output_text
@@ -1,24 +1,22 @@
 import os
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+
+from modules.prompting import PromptTemplate
 
 class ActionPredictor:
     def __init__(self, prompt_filename="action_predictor_prompt.txt", model_name="gpt-4.1-mini"):
         self.client = OpenAI()
         self.model_name = model_name
         prompt_path = os.path.join(os.path.dirname(__file__), "prompts", prompt_filename)
-        self.prompt_template = self._load_prompt(prompt_path)
+        self.prompt_template = PromptTemplate.from_file(prompt_path, name="action_predictor")
 
-    def _load_prompt(self, path: str) -> str:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+    def _build_prompt(self, current_context: str, recent_context: str, similar_context: str) -> str:
+        return self.prompt_template.render(
+            recent_context=recent_context, similar_context=similar_context, current_context=current_context
+        )
 
     def predict(self, current_context: str, recent_context: str, similar_context: str):
-        prompt = (
-            self.prompt_template
-            .replace("{current_context}", current_context)
-            .replace("{recent_context}", recent_context)
-            .replace("{similar_context}", similar_context)
-        )
+        prompt = self._build_prompt(current_context, recent_context, similar_context)
 
         resp = self.client.responses.create(
             model=self.model_name,
@@ -27,6 +25,50 @@ class ActionPredictor:
         )
         return resp.output_text
 
+    def predict_stream(self, current_context: str, recent_context: str, similar_context: str):
+        """predict()와 같은 요청을 스트리밍으로 보내고 출력 텍스트 조각(delta)을 도착하는 대로 yield"""
+        prompt = self._build_prompt(current_context, recent_context, similar_context)
+
+        stream = self.client.responses.create(
+            model=self.model_name,
+            input=prompt,
+            temperature=0.3,
+            stream=True
+        )
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                yield event.delta
+
+
+class AsyncActionPredictor(ActionPredictor):
+    """ActionPredictor with AsyncOpenAI"""
+    def __init__(self, prompt_filename="action_predictor_prompt.txt", model_name="gpt-4.1-mini", **client_kwargs):
+        super().__init__(prompt_filename=prompt_filename, model_name=model_name)
+        self.client = AsyncOpenAI(**client_kwargs)
+
+    async def predict(self, current_context: str, recent_context: str, similar_context: str):
+        prompt = self._build_prompt(current_context, recent_context, similar_context)
+
+        resp = await self.client.responses.create(
+            model=self.model_name,
+            input=prompt,
+            temperature=0.3
+        )
+        return resp.output_text
+
+    async def predict_stream(self, current_context: str, recent_context: str, similar_context: str):
+        prompt = self._build_prompt(current_context, recent_context, similar_context)
+
+        stream = await self.client.responses.create(
+            model=self.model_name,
+            input=prompt,
+            temperature=0.3,
+            stream=True
+        )
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                yield event.delta
+
 
 if __name__ == "__main__":
     base_dir = os.path.join(os.path.dirname(__file__), "../../app/sample/description")
@@ -4,6 +4,7 @@ History QA Module
 사용자의 질문에 대한 답변을 생성합니다.
 """
 
-from .qa import HistoryQA
+from .qa import HistoryQA, AsyncHistoryQA
+from .answer_cache import SemanticAnswerCache, context_fingerprint
 
-__all__ = ["HistoryQA"]
+__all__ = ["HistoryQA", "AsyncHistoryQA", "SemanticAnswerCache", "context_fingerprint"]
@@ -0,0 +1,113 @@
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+
+def context_fingerprint(context: dict) -> str:
+    """QA 컨텍스트(current/recent/similar)의 해시 → 컨텍스트가 바뀌면 이전 답변은 적중하지 않음"""
+    canonical = json.dumps(context, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SemanticAnswerCache:
+    """
+    HistoryQA 답변 의미 캐시 (프로세스 메모리)
+    - 유저별 범위: 같은 유저 + 같은 컨텍스트 지문에서
+      get_exact: 정규화한 질문(공백 정리, 대소문자 무시)이 같으면 저장된 답변 반환 (임베딩 불필요)
+      get: 질문 임베딩의 코사인 유사도가 threshold 이상이면 저장된 답변 반환
+    - ttl_sec이 지난 항목은 사용하지 않고 삭제
+    - 유저당 max_entries_per_user개, 유저 수 max_users개를 넘으면 가장 오래 사용하지 않은 것부터 삭제 (LRU)
+    """
+    def __init__(self, threshold: float = 0.95, ttl_sec: float = 3600, max_entries_per_user: int = 64,
+                 max_users: int = 10000):
+        self.threshold = threshold
+        self.ttl_sec = ttl_sec
+        self.max_entries_per_user = max(1, max_entries_per_user)
+        self.max_users = max(1, max_users)
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self._users = OrderedDict()  # user_id -> OrderedDict(seq -> (context_fp, 정규화 질문, 질문 벡터, 답변, 저장 시각))
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        v = np.asarray(embedding, dtype=np.float32)
+        return v / (np.linalg.norm(v) + 1e-12)
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """정확 일치 비교용 질문 (앞뒤/연속 공백 정리, 대소문자 무시)"""
+        return " ".join(question.split()).casefold()
+
+    def _live_entries(self, user_id, now: float):
+        """유저의 만료되지 않은 항목 (만료 항목은 삭제)"""
+        entries = self._users.get(user_id)
+        if not entries:
+            return None
+        self._users.move_to_end(user_id)
+        for seq, entry in list(entries.items()):
+            if now - entry[4] > self.ttl_sec:
+                del entries[seq]
+        return entries
+
+    def get_exact(self, user_id, context_fp: str, question: str) -> Optional[dict]:
+        """같은 컨텍스트에서 정규화한 질문이 같은 답변 (미스는 이후 get()에서 집계)"""
+        question = self.normalize_question(question)
+        with self._lock:
+            entries = self._live_entries(user_id, time.time())
+            for seq, (fp, q, _, answer, _) in reversed(list((entries or {}).items())):
+                if fp == context_fp and q == question:
+                    self.hits += 1
+                    self.exact_hits += 1
+                    entries.move_to_end(seq)
+                    return dict(answer)
+            return None
+
+    def get(self, user_id, context_fp: str, question_embedding: List[float]) -> Optional[dict]:
+        query = self._normalize(question_embedding)
+        with self._lock:
+            entries = self._live_entries(user_id, time.time())
+            best_seq, best_score = None, self.threshold
+            for seq, (fp, _, vector, _, _) in (entries or {}).items():
+                if fp != context_fp:
+                    continue
+                score = float(np.dot(vector, query))
+                if score >= best_score:
+                    best_seq, best_score = seq, score
+            if best_seq is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entries.move_to_end(best_seq)
+            return dict(entries[best_seq][3])
+
+    def put(self, user_id, context_fp: str, question: str, question_embedding: List[float], answer: dict):
+        vector = self._normalize(question_embedding)
+        with self._lock:
+            entries = self._users.setdefault(user_id, OrderedDict())
+            self._users.move_to_end(user_id)
+            self._seq += 1
+            entries[self._seq] = (context_fp, self.normalize_question(question), vector, dict(answer), time.time())
+            while len(entries) > self.max_entries_per_user:
+                entries.popitem(last=False)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._users),
+                "entries": sum(len(e) for e in self._users.values()),
+                "hits": self.hits,
+                "exact_hits": self.exact_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
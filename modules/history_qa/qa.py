@@ -1,27 +1,26 @@
 import os
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+
+from modules.prompting import PromptTemplate
 
 class HistoryQA:
     def __init__(self, prompt_filename="history_qa_prompt.txt", model_name="gpt-5-mini"):
         self.client = OpenAI()
         self.model_name = model_name
         prompt_path = os.path.join(os.path.dirname(__file__), "prompts", prompt_filename)
-        self.prompt_template = self._load_prompt(prompt_path)
-
-    def _load_prompt(self, path: str) -> str:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+        self.prompt_template = PromptTemplate.from_file(prompt_path, name="history_qa")
 
-    def answer(self, current_context: str, recent_context: str, similar_context: str, user_question: str):
-        prompt = (
-            self.prompt_template
-            .replace("{current_context}", current_context)
-            .replace("{recent_context}", recent_context)
-            .replace("{similar_context}", similar_context)
-            .replace("{user_question}", user_question)
+    def _build_prompt(self, current_context: str, recent_context: str, similar_context: str, user_question: str) -> str:
+        prompt = self.prompt_template.render(
+            recent_context=recent_context, similar_context=similar_context,
+            current_context=current_context, user_question=user_question,
         )
 
         print("\n--- Prompt ---\n", prompt)
+        return prompt
+
+    def answer(self, current_context: str, recent_context: str, similar_context: str, user_question: str):
+        prompt = self._build_prompt(current_context, recent_context, similar_context, user_question)
 
         resp = self.client.responses.create(
             model=self.model_name,
@@ -29,6 +28,47 @@ class HistoryQA:
         )
         return resp.output_text
 
+    def answer_stream(self, current_context: str, recent_context: str, similar_context: str, user_question: str):
+        """answer()와 같은 요청을 스트리밍으로 보내고 출력 텍스트 조각(delta)을 도착하는 대로 yield"""
+        prompt = self._build_prompt(current_context, recent_context, similar_context, user_question)
+
+        stream = self.client.responses.create(
+            model=self.model_name,
+            input=prompt,
+            stream=True
+        )
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                yield event.delta
+
+
+class AsyncHistoryQA(HistoryQA):
+    """HistoryQA with AsyncOpenAI"""
+    def __init__(self, prompt_filename="history_qa_prompt.txt", model_name="gpt-5-mini", **client_kwargs):
+        super().__init__(prompt_filename=prompt_filename, model_name=model_name)
+        self.client = AsyncOpenAI(**client_kwargs)
+
+    async def answer(self, current_context: str, recent_context: str, similar_context: str, user_question: str):
+        prompt = self._build_prompt(current_context, recent_context, similar_context, user_question)
+
+        resp = await self.client.responses.create(
+            model=self.model_name,
+            input=prompt
+        )
+        return resp.output_text
+
+    async def answer_stream(self, current_context: str, recent_context: str, similar_context: str, user_question: str):
+        prompt = self._build_prompt(current_context, recent_context, similar_context, user_question)
+
+        stream = await self.client.responses.create(
+            model=self.model_name,
+            input=prompt,
+            stream=True
+        )
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                yield event.delta
+
 
 if __name__ == "__main__":
     base_dir = os.path.join(os.path.dirname(__file__), "../../app/sample/description")
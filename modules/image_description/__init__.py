@@ -3,12 +3,20 @@ Image Description Module
 이미지에 대한 설명 생성, 임베딩 생성, 벡터DB 저장을 담당합니다.
 """
 
-from .description import ImageDescription
-from .embedding import EmbeddingGenerator
+from .description import ImageDescription, AsyncImageDescription
+from .embedding import EmbeddingGenerator, AsyncEmbeddingGenerator
+from .description_cache import DescriptionCache
+from .embedding_cache import EmbeddingCache
 from .storage import VectorDBStorage
+from .sharded_storage import ShardedVectorStore
 
 __all__ = [
     "ImageDescription",
+    "AsyncImageDescription",
+    "DescriptionCache",
     "EmbeddingGenerator",
+    "AsyncEmbeddingGenerator",
+    "EmbeddingCache",
     "VectorDBStorage",
+    "ShardedVectorStore",
 ]
@@ -1,31 +1,30 @@
 # modules/image_description/description.py
 import os
-import base64
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+
+from modules.image_frame import ImageFrame, VisionPayloadOptimizer
+from modules.image_description.description_cache import DescriptionCache, CachedDescription
 
 # Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 class ImageDescription:
-    def __init__(self, model_name="gpt-4.1-mini"):
+    def __init__(self, model_name="gpt-4.1-mini", cache: DescriptionCache = None,
+                 optimizer: VisionPayloadOptimizer = None):
         self.client = OpenAI(api_key=OPENAI_API_KEY)
         self.model_name = model_name
+        self.cache = cache  # optional disk cache (same image + same request → no API call)
+        self.optimizer = optimizer  # optional downscale/re-encode/crop before upload
         # Load prompt from file
         prompt_path = os.path.join(os.path.dirname(__file__), "prompts", "description.txt")
         with open(prompt_path, "r", encoding="utf-8") as f:
             self.prompt_template = f.read()
 
-    def _encode_image(self, image_path: str) -> str:
-        """Encode image to Base64 for API"""
-        with open(image_path, "rb") as img:
-            return base64.b64encode(img.read()).decode("utf-8")
-
-    def generate_description(self, image_path: str):
-        """Send image and prompt to GPT model and return the raw response object"""
-        image_base64 = self._encode_image(image_path)
-        response = self.client.responses.create(
+    def _request(self, image_url, detail: str) -> dict:
+        """Build responses.create arguments (shared by sync/async clients)"""
+        return dict(
             model=self.model_name,
             temperature=0.3,
             max_output_tokens=300,
@@ -36,12 +35,60 @@ class ImageDescription:
                     "role": "user",
                     "content": [
                         {"type": "input_text", "text": "이미지를 분석하고 JSON을 반환하세요."},
-                        {"type": "input_image", "image_url": f"data:image/png;base64,{image_base64}"}
+                        {"type": "input_image", "image_url": image_url, "detail": detail}
                     ]
                 }
             ]
         )
-        return response
+
+    def _image_url(self, frame: ImageFrame) -> str:
+        """Data URL to upload (optimized only here, i.e. after a cache miss)"""
+        if self.optimizer is not None:
+            frame = self.optimizer.optimize(frame)
+        return frame.data_url()
+
+    def generate_description(self, image, detail: str = "auto"):
+        """Send image and prompt to GPT model and return the raw response object
+        image: file path or ImageFrame (in-memory bytes, no file read)
+        detail: "low" | "high" | "auto" (low uses far fewer image tokens)
+        With a cache, a hit returns CachedDescription (same output_text attribute)"""
+        frame = image if isinstance(image, ImageFrame) else ImageFrame.from_path(image)
+        key, cached = self._cache_lookup(frame, detail)
+        if cached is not None:
+            return cached
+        resp = self.client.responses.create(**self._request(self._image_url(frame), detail))
+        self._cache_store(key, resp)
+        return resp
+
+    def _cache_lookup(self, frame: ImageFrame, detail: str):
+        """Key on the original bytes + optimizer settings, so a hit skips optimize()"""
+        if self.cache is None:
+            return None, None
+        transform = self.optimizer.settings() if self.optimizer is not None else None
+        key = DescriptionCache.key_for(self._request(None, detail), frame.data, transform)
+        value = self.cache.get(key)
+        return key, (CachedDescription(value) if value is not None else None)
+
+    def _cache_store(self, key, resp):
+        if key is not None and resp.output_text:
+            self.cache.put(key, resp.output_text)
+
+
+class AsyncImageDescription(ImageDescription):
+    """ImageDescription with AsyncOpenAI (one event loop can keep many requests in flight)"""
+    def __init__(self, model_name="gpt-4.1-mini", cache: DescriptionCache = None,
+                 optimizer: VisionPayloadOptimizer = None, **client_kwargs):
+        super().__init__(model_name=model_name, cache=cache, optimizer=optimizer)
+        self.client = AsyncOpenAI(api_key=OPENAI_API_KEY, **client_kwargs)
+
+    async def generate_description(self, image, detail: str = "auto"):
+        frame = image if isinstance(image, ImageFrame) else ImageFrame.from_path(image)
+        key, cached = self._cache_lookup(frame, detail)
+        if cached is not None:
+            return cached
+        resp = await self.client.responses.create(**self._request(self._image_url(frame), detail))
+        self._cache_store(key, resp)
+        return resp
 
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+import json
+import hashlib
+from typing import Optional
+
+from .disk_cache import DiskLRUCache
+
+
+class CachedDescription:
+    """캐시에서 꺼낸 설명 (responses.create 응답처럼 output_text로 접근)"""
+    cached = True
+
+    def __init__(self, output_text: str):
+        self.output_text = output_text
+
+
+class DescriptionCache(DiskLRUCache):
+    """
+    이미지 설명 디스크 캐시 (SQLite, 크기 제한 LRU)
+    - 키: 요청 인자(모델, 프롬프트, 생성 파라미터, detail), 원본 이미지 바이트 해시, 전송 전 변환(축소/재인코딩) 설정으로 만든 sha256
+      → 원본 이미지만으로 키가 정해지므로 적중하면 이미지 변환을 하지 않는다.
+    - 값: 모델 응답 텍스트(output_text)
+    """
+    def __init__(self, path="./cache/descriptions.sqlite3", max_mb=256):
+        super().__init__(path, max_mb=max_mb, table="descriptions")
+
+    @staticmethod
+    def key_for(request: dict, image: bytes, transform: Optional[dict] = None) -> str:
+        """responses.create 인자(이미지 URL 제외) + 원본 이미지 + 변환 설정으로 캐시 키 생성"""
+        canonical = json.dumps(
+            {"request": request, "image": hashlib.sha256(image).hexdigest(), "transform": transform},
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -0,0 +1,108 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Union
+
+Value = Union[str, bytes]
+
+
+class DiskLRUCache:
+    """
+    SQLite 디스크 캐시 (키 → 텍스트/바이트, 크기 제한 LRU)
+    - 저장된 값 크기 합계가 max_mb를 넘으면 가장 오래 조회되지 않은 항목부터 삭제
+    - 여러 스레드에서 공유 (연결 1개 + lock), 여러 프로세스가 같은 파일을 써도 WAL 모드로 동작
+      (크기 합계는 메모리에 따로 세지 않고 매번 SUM(size)로 읽어 다른 프로세스가 쓴 항목도 반영)
+    - 조회 결과는 hits/misses로 집계
+    """
+    def __init__(self, path: str, max_mb: float = 256, table: str = "entries"):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_access ON {table}(last_access)")
+
+    def get(self, key: str) -> Optional[Value]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Value]:
+        """찾은 항목만 dict로 반환 (조회 1회)"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        with self._lock:
+            marks = ",".join("?" * len(keys))
+            rows = self._conn.execute(
+                f"SELECT key, value FROM {self.table} WHERE key IN ({marks})", keys
+            ).fetchall()
+            found = dict(rows)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key = ?", [(now, k) for k in found]
+                )
+            return found
+
+    def put(self, key: str, value: Value):
+        self.put_many({key: value})
+
+    def put_many(self, items: Dict[str, Value]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # 크기 합계 조회~삭제 동안 다른 프로세스의 쓰기 차단
+            try:
+                for key, value in items.items():
+                    size = len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+                    self._conn.execute(
+                        f"INSERT OR REPLACE INTO {self.table} (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                        (key, value, size, now),
+                    )
+                self._evict_locked()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _total_bytes_locked(self) -> int:
+        return self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def _evict_locked(self):
+        total = self._total_bytes_locked()
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                return
+            for key, size in rows:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    return
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "size_mb": round(self._total_bytes_locked() / 1024 / 1024, 3),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
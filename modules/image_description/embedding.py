@@ -1,24 +1,75 @@
 import os
 import json
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+
+from modules.image_description.embedding_cache import EmbeddingCache
 
 # Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 class EmbeddingGenerator:
-    def __init__(self, model_name="text-embedding-3-small"):
+    def __init__(self, model_name="text-embedding-3-small", cache: EmbeddingCache = None):
         self.client = OpenAI(api_key=OPENAI_API_KEY)
         self.model_name = model_name
+        self.cache = cache  # optional memory + disk cache (same model + same text → no API call)
+
+    def lookup(self, text: str) -> Optional[List[float]]:
+        """Cached embedding for text, or None (never calls the API)."""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.model_name, text)
 
     def generate_embedding(self, text: str):
         """Generate embedding for a given text using OpenAI embeddings API."""
-        response = self.client.embeddings.create(
-            model=self.model_name,
-            input=text
-        )
-        return response.data[0].embedding
+        return self.generate_embeddings([text])[0]
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts (same order as texts).
+        Cached texts are served from the cache; the misses go out in a single embeddings API request."""
+        texts = list(texts)
+        found, missing = self._split_cached(texts)
+        if missing:
+            response = self.client.embeddings.create(
+                model=self.model_name,
+                input=missing
+            )
+            found.update(self._store_created(missing, response))
+        return [found[t] for t in texts]
+
+    def _split_cached(self, texts: List[str]) -> Tuple[Dict[str, List[float]], List[str]]:
+        found = self.cache.get_many(self.model_name, texts) if self.cache is not None else {}
+        missing = list(dict.fromkeys(t for t in texts if t not in found))
+        return found, missing
+
+    def _store_created(self, missing: List[str], response) -> Dict[str, List[float]]:
+        created = {missing[d.index]: d.embedding for d in response.data}
+        if self.cache is not None:
+            self.cache.put_many(self.model_name, created)
+        return created
+
+
+class AsyncEmbeddingGenerator(EmbeddingGenerator):
+    """EmbeddingGenerator with AsyncOpenAI"""
+    def __init__(self, model_name="text-embedding-3-small", cache: EmbeddingCache = None, **client_kwargs):
+        super().__init__(model_name=model_name, cache=cache)
+        self.client = AsyncOpenAI(api_key=OPENAI_API_KEY, **client_kwargs)
+
+    async def generate_embedding(self, text: str):
+        return (await self.generate_embeddings([text]))[0]
+
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        found, missing = self._split_cached(texts)
+        if missing:
+            response = await self.client.embeddings.create(
+                model=self.model_name,
+                input=missing
+            )
+            found.update(self._store_created(missing, response))
+        return [found[t] for t in texts]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .disk_cache import DiskLRUCache
+
+
+class EmbeddingCache:
+    """
+    텍스트 임베딩 캐시 (메모리 LRU + SQLite 디스크)
+    - 키: sha256(모델 이름 + 텍스트) → 같은 모델로 같은 텍스트를 다시 임베딩하지 않음
+    - 메모리: 최근 memory_entries개 (float32 배열)
+    - 디스크: float32 바이트 (1536차원 = 6KB), 합계가 max_mb를 넘으면 가장 오래 조회되지 않은 항목부터 삭제
+    """
+    def __init__(self, path="./cache/embeddings.sqlite3", max_mb=512, memory_entries=2048):
+        self.disk = DiskLRUCache(path, max_mb=max_mb, table="embeddings")
+        self.memory_entries = max(0, memory_entries)
+        self.memory_hits = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model_name, [text]).get(text)
+
+    def get_many(self, model_name: str, texts: Iterable[str]) -> Dict[str, List[float]]:
+        """찾은 텍스트만 dict(text → 임베딩)로 반환 (메모리에 없는 항목은 디스크 조회 1회)"""
+        keys = {self.key_for(model_name, t): t for t in texts}
+        found = {}
+        with self._lock:
+            for key, text in keys.items():
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[text] = vector
+            self.memory_hits += len(found)
+
+        missing = [key for key, text in keys.items() if text not in found]
+        for key, blob in self.disk.get_many(missing).items():
+            vector = np.frombuffer(blob, dtype=np.float32)
+            self._remember(key, vector)
+            found[keys[key]] = vector
+        return {text: vector.tolist() for text, vector in found.items()}
+
+    def put_many(self, model_name: str, embeddings: Dict[str, List[float]]):
+        blobs = {}
+        for text, embedding in embeddings.items():
+            key = self.key_for(model_name, text)
+            vector = np.asarray(embedding, dtype=np.float32)
+            self._remember(key, vector)
+            blobs[key] = vector.tobytes()
+        self.disk.put_many(blobs)
+
+    def _remember(self, key: str, vector: np.ndarray):
+        if not self.memory_entries:
+            return
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        disk = self.disk.stats()
+        with self._lock:
+            memory = {"memory_entries": len(self._memory), "memory_hits": self.memory_hits}
+        lookups = memory["memory_hits"] + disk["hits"] + disk["misses"]
+        hits = memory["memory_hits"] + disk["hits"]
+        return {
+            **memory,
+            "disk_entries": disk["entries"],
+            "disk_size_mb": disk["size_mb"],
+            "disk_hits": disk["hits"],
+            "misses": disk["misses"],
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
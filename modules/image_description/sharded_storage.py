@@ -0,0 +1,165 @@
+import os
+import re
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .storage import VectorDBStorage
+
+
+class _Shard:
+    __slots__ = ("db", "lock", "refs", "dirty")
+
+    def __init__(self):
+        self.db = None  # 샤드 잠금 안에서 처음 사용할 때 로드
+        self.lock = threading.Lock()
+        self.refs = 0  # 사용 중인 호출 수 (0일 때만 LRU에서 내릴 수 있음)
+        self.dirty = False
+
+
+class ShardedVectorStore:
+    """
+    유저별 VectorDBStorage 샤드 (user_{id}.faiss / user_{id}.meta)
+    - 처음 접근할 때 디스크에서 로드 (lazy), 파일이 없으면 새 인덱스 생성
+      (읽기 전용 접근이면 파일을 만들지 않고 빈 인덱스만 반환 → 없는 유저 조회로 샤드 파일이 생기지 않음)
+    - 전역 잠금은 LRU 슬롯 예약/해제에만 쓰고, 로드/저장(디스크 I/O)은 샤드 자신의 잠금 안에서 수행
+    - 로드된 샤드는 LRU로 관리: 샤드 수(max_shards) 또는 벡터 메모리(max_memory_mb)를 넘으면
+      가장 오래 사용하지 않은 샤드부터 내리고, 변경된 샤드는 그때 저장 (write-back)
+    - 변경된 샤드는 flush_interval_sec마다, 그리고 프로세스 종료 시 저장
+    - user_id가 None이면 "default" 샤드 사용
+
+    사용 예)
+        with store.shard(user_id) as db:            # 읽기
+            db.search_vector(embedding, top_k=2)
+        with store.shard(user_id, write=True) as db:  # 쓰기 (dirty 표시)
+            db.add_vector(embedding, {"file": ..., "text": ...})
+    """
+    def __init__(self, db_dir="./vectorstore/users", dim=1536, max_shards=256, max_memory_mb=512,
+                 flush_interval_sec=30):
+        self.db_dir = db_dir
+        self.dim = dim
+        self.max_shards = max(1, max_shards)
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._shards = OrderedDict()
+        self._evicting = {}  # LRU에서 내렸지만 아직 저장 중인 샤드 (같은 유저 재접근 시 그대로 되살림)
+        self._lock = threading.Lock()
+
+        os.makedirs(db_dir, exist_ok=True)
+        atexit.register(self.flush)
+        if flush_interval_sec and flush_interval_sec > 0:
+            threading.Thread(
+                target=self._flush_loop, args=(flush_interval_sec,), name="vector-flush", daemon=True
+            ).start()
+
+    @staticmethod
+    def _key(user_id) -> str:
+        if user_id is None:
+            return "default"
+        return re.sub(r"[^0-9A-Za-z_-]", "_", str(user_id))
+
+    def _shard_bytes(self, shard: _Shard) -> int:
+        if shard.db is None:
+            return 0
+        return shard.db.index.ntotal * self.dim * 4  # float32 (IndexFlatL2)
+
+    def _index_name(self, key: str) -> str:
+        return f"user_{key}"
+
+    def _exists_on_disk(self, key: str) -> bool:
+        base = os.path.join(self.db_dir, self._index_name(key))
+        return os.path.exists(base + ".faiss") and os.path.exists(base + ".meta")
+
+    @contextmanager
+    def shard(self, user_id, write: bool = False):
+        """user_id의 샤드를 잠그고 VectorDBStorage를 반환 (다른 유저의 샤드와는 병렬 접근 가능)"""
+        key = self._key(user_id)
+        with self._lock:
+            known = key in self._shards or key in self._evicting
+        if not known and not write and not self._exists_on_disk(key):
+            # 아직 저장된 적 없는 유저의 읽기 → 파일/LRU 슬롯 없이 빈 인덱스
+            yield VectorDBStorage(db_dir=self.db_dir, index_name=self._index_name(key), dim=self.dim, create=False)
+            return
+
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is None:
+                shard = self._evicting.pop(key, None) or _Shard()
+                self._shards[key] = shard
+            self._shards.move_to_end(key)
+            shard.refs += 1
+            victims = self._evict_locked()
+        try:
+            self._unload(victims)
+            with shard.lock:
+                if shard.db is None:
+                    shard.db = VectorDBStorage(db_dir=self.db_dir, index_name=self._index_name(key), dim=self.dim)
+                if write:
+                    shard.dirty = True
+                yield shard.db
+        finally:
+            with self._lock:
+                shard.refs -= 1
+
+    def _evict_locked(self):
+        """LRU 순으로 사용 중이 아닌 샤드를 목록에서 내리고 반환 (저장은 _unload에서 전역 잠금 밖에서 수행)"""
+        total = sum(self._shard_bytes(s) for s in self._shards.values())
+        victims = []
+        for key in list(self._shards):
+            if len(self._shards) <= self.max_shards and total <= self.max_memory_bytes:
+                break
+            shard = self._shards[key]
+            if shard.refs:
+                continue
+            total -= self._shard_bytes(shard)
+            del self._shards[key]
+            if shard.dirty:
+                self._evicting[key] = shard
+            victims.append((key, shard))
+        return victims
+
+    def _unload(self, victims):
+        """내린 샤드 중 변경된 샤드를 샤드 잠금 안에서 저장 (저장 중 재접근되면 같은 객체를 되살려 사용)"""
+        for key, shard in victims:
+            with shard.lock:
+                if shard.dirty and shard.db is not None:
+                    shard.db.save()
+                    shard.dirty = False
+            with self._lock:
+                if self._evicting.get(key) is shard:
+                    del self._evicting[key]
+                loaded = len(self._shards)
+            print(f"[FAISS] 샤드 언로드 → user_{key} (loaded={loaded})")
+
+    def flush(self):
+        """변경된 샤드를 모두 저장"""
+        with self._lock:
+            dirty = [s for s in list(self._shards.values()) + list(self._evicting.values()) if s.dirty]
+            for shard in dirty:
+                shard.refs += 1
+        for shard in dirty:
+            try:
+                with shard.lock:
+                    if shard.dirty and shard.db is not None:
+                        shard.db.save()
+                        shard.dirty = False
+            finally:
+                with self._lock:
+                    shard.refs -= 1
+
+    def _flush_loop(self, interval_sec: float):
+        while True:
+            time.sleep(interval_sec)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[FAISS] 샤드 저장 실패: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded_shards": len(self._shards),
+                "dirty_shards": sum(1 for s in self._shards.values() if s.dirty),
+                "memory_mb": round(sum(self._shard_bytes(s) for s in self._shards.values()) / 1024 / 1024, 2),
+            }
@@ -6,7 +6,7 @@ from datetime import datetime
 import json
 
 class VectorDBStorage:
-    def __init__(self, db_dir="./vectorstore", index_name="description_index", dim=1536):
+    def __init__(self, db_dir="./vectorstore", index_name="description_index", dim=1536, create=True):
         self.dim = dim
         self.db_dir = db_dir
         self.index_path = os.path.join(db_dir, f"{index_name}.faiss")
@@ -24,10 +24,11 @@ class VectorDBStorage:
             self._load()
             self._id_counter = len(self.metadata) + 1
             print(f"[FAISS] 기존 인덱스 로드 완료 ({len(self.metadata)}개)")
-        else:
+        elif create:
             # 🔹 파일이 없으면 초기화 + 즉시 저장
             print("[FAISS] 인덱스 파일이 없어 새로 생성합니다.")
             self.save()  # ✅ 바로 .faiss / .meta 생성
+        # create=False (읽기 전용 조회) → 빈 인덱스만 메모리에 두고 파일은 만들지 않음
 
     def add_vector(self, embedding, metadata):
         """Add a vector and its metadata to the index."""
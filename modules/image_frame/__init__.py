@@ -0,0 +1,13 @@
+"""
+Image Frame Module
+이미지를 한 번만 디코딩해 대표 이미지 선택, OCR/PII, 이미지 설명 단계가 공유하도록 합니다.
+"""
+
+from .frame import ImageFrame, load_frames
+from .payload import VisionPayloadOptimizer
+
+__all__ = [
+    "ImageFrame",
+    "load_frames",
+    "VisionPayloadOptimizer",
+]
@@ -0,0 +1,102 @@
+# modules/image_frame/frame.py
+import io
+import os
+import glob
+import base64
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+IMAGE_EXTS = ["*.jpg", "*.jpeg", "*.png", "*.webp", "*.bmp", "*.gif"]
+
+
+class ImageFrame:
+    """
+    이미지 1장을 메모리에 두고 여러 단계(대표 이미지 선택, OCR/PII, 이미지 설명)가 공유하는 객체.
+    - data: 원본 인코딩 바이트 (Redis/파일에서 읽은 그대로)
+    - rgb: PIL RGB 이미지 (최초 접근 시 한 번만 디코딩)
+    - bgr: OpenCV용 BGR 배열 (rgb에서 채널 순서만 바꿔 생성, 재디코딩 없음)
+    - base64: API 전송용 base64 문자열 (원본 바이트 기준, 한 번만 인코딩)
+    """
+    def __init__(self, name: str, data: bytes, image_id: Optional[int] = None, path: Optional[str] = None):
+        self.name = name
+        self.data = data
+        self.image_id = image_id
+        self.path = path or name
+        self.format: Optional[str] = None
+        self._rgb: Optional[Image.Image] = None
+        self._bgr: Optional[np.ndarray] = None
+        self._base64: Optional[str] = None
+        self._decode_failed = False
+
+    @classmethod
+    def from_path(cls, path: str) -> "ImageFrame":
+        with open(path, "rb") as f:
+            return cls(os.path.basename(path), f.read(), path=path)
+
+    @classmethod
+    def from_bgr(cls, name: str, bgr: np.ndarray, fmt: str = "PNG", image_id: Optional[int] = None) -> "ImageFrame":
+        """OpenCV BGR 배열(예: PII 블러 결과)을 한 번 인코딩해 프레임으로 만든다. (디코딩 캐시는 배열로 채움)"""
+        rgb = Image.fromarray(np.ascontiguousarray(bgr[:, :, ::-1]))
+        buf = io.BytesIO()
+        rgb.save(buf, format=fmt)
+        frame = cls(name, buf.getvalue(), image_id=image_id)
+        frame.format = fmt
+        frame._rgb = rgb
+        frame._bgr = bgr
+        return frame
+
+    @property
+    def rgb(self) -> Optional[Image.Image]:
+        """디코딩된 RGB 이미지 (디코딩 실패 시 None)"""
+        if self._rgb is None and not self._decode_failed:
+            try:
+                img = Image.open(io.BytesIO(self.data))
+                self.format = img.format
+                self._rgb = img.convert("RGB")
+            except (UnidentifiedImageError, OSError):
+                self._decode_failed = True
+        return self._rgb
+
+    @property
+    def bgr(self) -> Optional[np.ndarray]:
+        if self._bgr is None and self.rgb is not None:
+            self._bgr = np.ascontiguousarray(np.asarray(self.rgb)[:, :, ::-1])
+        return self._bgr
+
+    @property
+    def base64(self) -> str:
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data).decode("utf-8")
+        return self._base64
+
+    @property
+    def mime_type(self) -> str:
+        if self.format is None:
+            # Image.open은 헤더만 읽으므로 디코딩 없이 포맷 확인
+            try:
+                self.format = Image.open(io.BytesIO(self.data)).format
+            except (UnidentifiedImageError, OSError):
+                self.format = "PNG"
+        return Image.MIME.get(self.format, "image/png")
+
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.base64}"
+
+    def release(self):
+        """디코딩 캐시 해제 (원본 바이트만 유지)"""
+        self._rgb = None
+        self._bgr = None
+        self._base64 = None
+
+    def __repr__(self):
+        return f"ImageFrame(name={self.name!r}, bytes={len(self.data)})"
+
+
+def load_frames(directory: str) -> List[ImageFrame]:
+    """디렉토리의 이미지 파일들을 ImageFrame 목록으로 읽는다. (디렉토리 기반 API용 어댑터)"""
+    paths = []
+    for e in IMAGE_EXTS:
+        paths.extend(glob.glob(os.path.join(directory, e)))
+    return [ImageFrame.from_path(p) for p in sorted(set(paths))]
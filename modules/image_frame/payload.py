@@ -0,0 +1,111 @@
+# modules/image_frame/payload.py
+import io
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, features
+
+from .frame import ImageFrame
+
+
+class VisionPayloadOptimizer:
+    """
+    이미지 설명 요청 전에 이미지를 줄여 전송 크기와 이미지 토큰을 줄인다.
+    - max_edge: 긴 변 최대 픽셀 (넘으면 비율 유지 축소, 확대는 하지 않음, 0이면 축소 안 함)
+    - image_format / quality: "JPEG" | "WEBP" | "PNG" 재인코딩 (WEBP를 지원하지 않는 Pillow면 JPEG)
+    - crop_to_text: 글자/경계가 있는 영역(밝기 변화가 큰 행/열)의 바운딩 박스 + crop_margin으로 자르기
+    재인코딩 결과가 원본보다 크고 축소/자르기도 없으면 원본 프레임을 그대로 사용
+    """
+    def __init__(self, max_edge: int = 1568, image_format: str = "JPEG", quality: int = 80,
+                 crop_to_text: bool = False, crop_margin: int = 16, edge_threshold: int = 40,
+                 min_edge_density: float = 0.005):
+        self.max_edge = max_edge
+        self.image_format = image_format.upper()
+        if self.image_format == "WEBP" and not features.check("webp"):
+            print("[경고] Pillow WebP 미지원 → JPEG로 인코딩")
+            self.image_format = "JPEG"
+        self.quality = quality
+        self.crop_to_text = crop_to_text
+        self.crop_margin = crop_margin
+        self.edge_threshold = edge_threshold
+        self.min_edge_density = min_edge_density
+        self.images = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def settings(self) -> dict:
+        """결과 이미지를 결정하는 설정 (같은 원본 + 같은 설정이면 같은 결과 → 설명 캐시 키에 사용)"""
+        return {
+            "max_edge": self.max_edge,
+            "format": self.image_format,
+            "quality": self.quality,
+            "crop_to_text": self.crop_to_text,
+            "crop_margin": self.crop_margin,
+            "edge_threshold": self.edge_threshold,
+            "min_edge_density": self.min_edge_density,
+        }
+
+    def optimize(self, frame: ImageFrame) -> ImageFrame:
+        """전송용 프레임 (디코딩 실패 시 원본 프레임)"""
+        image = frame.rgb
+        if image is None:
+            return frame
+        original_size = image.size
+
+        box = self.text_region(image) if self.crop_to_text else None
+        if box is not None:
+            image = image.crop(box)
+        if self.max_edge and max(image.size) > self.max_edge:
+            scale = self.max_edge / max(image.size)
+            image = image.resize(
+                (max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS
+            )
+
+        buf = io.BytesIO()
+        save_kwargs = {} if self.image_format == "PNG" else {"quality": self.quality}
+        image.save(buf, format=self.image_format, **save_kwargs)
+        data = buf.getvalue()
+        if image.size == original_size and len(data) >= len(frame.data):
+            data, optimized = frame.data, frame
+        else:
+            optimized = ImageFrame(frame.name, data, image_id=frame.image_id, path=frame.path)
+            optimized.format = self.image_format
+            optimized._rgb = image
+
+        with self._lock:
+            self.images += 1
+            self.bytes_in += len(frame.data)
+            self.bytes_out += len(data)
+        print(f"[3] 이미지 전송 크기 {len(frame.data) / 1024:.0f}KB → {len(data) / 1024:.0f}KB "
+              f"({original_size[0]}x{original_size[1]} → {image.width}x{image.height}, {optimized.mime_type})")
+        return optimized
+
+    def text_region(self, image: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+        """밝기 변화가 큰 픽셀이 min_edge_density 이상인 행/열의 바운딩 박스 (left, top, right, bottom), 없으면 None"""
+        gray = np.asarray(image.convert("L"), dtype=np.int16)
+        edges = np.zeros(gray.shape, dtype=bool)
+        edges[:, 1:] |= np.abs(np.diff(gray, axis=1)) > self.edge_threshold
+        edges[1:, :] |= np.abs(np.diff(gray, axis=0)) > self.edge_threshold
+        rows = np.flatnonzero(edges.mean(axis=1) >= self.min_edge_density)
+        cols = np.flatnonzero(edges.mean(axis=0) >= self.min_edge_density)
+        if rows.size == 0 or cols.size == 0:
+            return None
+        m = self.crop_margin
+        box = (
+            max(0, int(cols[0]) - m), max(0, int(rows[0]) - m),
+            min(image.width, int(cols[-1]) + 1 + m), min(image.height, int(rows[-1]) + 1 + m),
+        )
+        if box == (0, 0, image.width, image.height):
+            return None
+        return box
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "images": self.images,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "saved_ratio": round(1 - self.bytes_out / self.bytes_in, 3) if self.bytes_in else 0.0,
+            }
@@ -1,8 +1,10 @@
 """
 Image Selector Module
 업로드된 여러 이미지 중 대표 이미지를 선택합니다.
+수집 단계에서 거의 같은 화면을 걸러내기 위한 차이 해시(dhash)도 제공합니다.
 """
 
 from .selector import ImageClusterSelector
+from .fingerprint import dhash, hamming
 
-__all__ = ["ImageClusterSelector"]
+__all__ = ["ImageClusterSelector", "dhash", "hamming"]
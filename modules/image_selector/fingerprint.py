@@ -0,0 +1,27 @@
+# modules/image_selector/fingerprint.py
+import io
+from typing import Union
+
+import numpy as np
+from PIL import Image
+
+
+def dhash(image: Union[bytes, Image.Image], hash_size: int = 8) -> int:
+    """
+    차이 해시(difference hash).
+    - 흑백 (hash_size+1) x hash_size로 축소 후 가로로 인접한 픽셀의 밝기 비교 → hash_size^2 비트 정수
+    - 거의 같은 화면(커서 이동, 시계 변화 등)은 해밍 거리가 작게 나온다.
+    """
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+    # JPEG는 디코딩 단계에서 바로 축소 (다른 포맷은 무시됨)
+    image.draft("L", (hash_size * 4, hash_size * 4))
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    px = np.asarray(small, dtype=np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    """두 해시의 해밍 거리 (다른 비트 수)"""
+    return bin(a ^ b).count("1")
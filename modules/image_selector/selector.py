@@ -1,10 +1,9 @@
 import os
 import math
-import glob
-from typing import List, Tuple, Optional
+from typing import Callable, List, Optional, Sequence, Tuple
 
 import numpy as np
-from PIL import Image, UnidentifiedImageError
+from PIL import Image
 
 import torch
 import torch.nn as nn
@@ -13,6 +12,8 @@ from torchvision import models, transforms
 from sklearn.cluster import KMeans
 from sklearn.metrics import pairwise_distances_argmin_min
 
+from modules.image_frame import ImageFrame, load_frames
+
 
 class FeatureExtractor:
     """
@@ -45,39 +46,34 @@ class FeatureExtractor:
         ])
         return backbone, tfm
 
-    @torch.inference_mode()
     def embed(self, img: Image.Image) -> np.ndarray:
-        x = self.transform(img).unsqueeze(0).to(self.device)  # (1,3,224,224)
-        feat = self.model(x)  # (1,512,1,1)
-        feat = feat.view(feat.size(0), -1)  # (1,512)
-        v = feat[0].detach().cpu().numpy().astype("float32")
+        return self.embed_batch([img])[0]
+
+    @torch.inference_mode()
+    def embed_batch(self, imgs: List[Image.Image]) -> np.ndarray:
+        """여러 이미지를 한 번의 forward로 임베딩 → (N, D)"""
+        x = torch.stack([self.transform(img) for img in imgs]).to(self.device)  # (N,3,224,224)
+        feat = self.model(x)  # (N,512,1,1)
+        feat = feat.view(feat.size(0), -1)  # (N,512)
+        v = feat.detach().cpu().numpy().astype("float32")
         # L2 정규화 (클러스터링 안정화)
-        norm = np.linalg.norm(v) + 1e-12
+        norm = np.linalg.norm(v, axis=1, keepdims=True) + 1e-12
         return (v / norm)
 
 
 class ImageClusterSelector:
     """
-    디렉토리의 여러 이미지를 임베딩 → KMeans → 최대 클러스터 메도이드 선택.
+    여러 이미지를 임베딩 → KMeans → 최대 클러스터 메도이드 선택.
+    - select_frames(frames): 메모리의 ImageFrame 목록에서 선택 (디코딩된 이미지를 다음 단계와 공유)
+    - select(directory): 디렉토리 기반 어댑터 (파일 경로 반환)
+    embed_images(imgs) -> (N, D): 특징 추출 함수. 기본은 extractor.embed_batch
+    (여러 사이클의 요청을 묶으려면 app.micro_batcher.MicroBatcher.map으로 교체)
     """
     def __init__(self, n_clusters: Optional[int] = None, random_state: int = 42):
         self.n_clusters = n_clusters
         self.random_state = random_state
         self.extractor = FeatureExtractor()
-
-    def _list_images(self, directory: str) -> List[str]:
-        exts = ["*.jpg", "*.jpeg", "*.png", "*.webp", "*.bmp", "*.gif"]
-        paths = []
-        for e in exts:
-            paths.extend(glob.glob(os.path.join(directory, e)))
-        return sorted(set(paths))
-
-    def _safe_open(self, path: str) -> Optional[Image.Image]:
-        try:
-            img = Image.open(path).convert("RGB")
-            return img
-        except (UnidentifiedImageError, OSError):
-            return None
+        self.embed_images: Callable[[List[Image.Image]], Sequence[np.ndarray]] = self.extractor.embed_batch
 
     def _auto_k(self, n: int) -> int:
         if self.n_clusters is not None:
@@ -89,31 +85,30 @@ class ImageClusterSelector:
         return k
 
     def select(self, directory: str) -> Tuple[str, List[str]]:
-        paths = self._list_images(directory)
-        if not paths:
+        frames = load_frames(directory)
+        if not frames:
             raise ValueError(f"No image files found in: {directory}")
+        rep_frame, valid_frames = self.select_frames(frames)
+        return rep_frame.path, [f.path for f in valid_frames]
 
-        images = []
-        valid_paths = []
-        for p in paths:
-            img = self._safe_open(p)
-            if img is not None:
-                images.append(img)
-                valid_paths.append(p)
+    def select_frames(self, frames: List[ImageFrame]) -> Tuple[ImageFrame, List[ImageFrame]]:
+        if not frames:
+            raise ValueError("No image frames given")
 
-        if not images:
-            raise ValueError(f"Images exist but none could be opened: {directory}")
+        valid_frames = [f for f in frames if f.rgb is not None]
+        if not valid_frames:
+            raise ValueError(f"Images exist but none could be opened: {[f.name for f in frames]}")
 
-        feats = np.stack([self.extractor.embed(img) for img in images], axis=0)
+        feats = np.stack(list(self.embed_images([f.rgb for f in valid_frames])), axis=0)
 
         if feats.shape[0] == 1:
-            return valid_paths[0], valid_paths
+            return valid_frames[0], valid_frames
 
         k = self._auto_k(feats.shape[0])
         if k == 1:
             center = feats.mean(axis=0, keepdims=True)
             idx, _ = pairwise_distances_argmin_min(center, feats, metric="euclidean")
-            return valid_paths[int(idx[0])], valid_paths
+            return valid_frames[int(idx[0])], valid_frames
 
         km = KMeans(n_clusters=k, random_state=self.random_state, n_init="auto")
         labels = km.fit_predict(feats)
@@ -127,7 +122,7 @@ class ImageClusterSelector:
         closest, _ = pairwise_distances_argmin_min(centroid, cluster_feats, metric="euclidean")
         rep_global_idx = cluster_idx[int(closest[0])]
 
-        return valid_paths[rep_global_idx], valid_paths
+        return valid_frames[rep_global_idx], valid_frames
 
 
 if __name__ == "__main__":
@@ -4,11 +4,12 @@ OCR & PII Detection Module
 """
 
 from .ocr import initialize_tesseract, extract_text_data
-from .pii_detection import initialize_analyzer, analyze_and_blur_image
+from .pii_detection import initialize_analyzer, analyze_and_blur_image, analyze_and_blur_frame
 
 __all__ = [
     "initialize_tesseract",
     "extract_text_data",
     "initialize_analyzer",
     "analyze_and_blur_image",
+    "analyze_and_blur_frame",
 ]
@@ -77,15 +77,29 @@ def detect_pii(text, analyzer):
 
 
 def analyze_and_blur_image(image_path, analyzer):
+    """파일 경로 기반 어댑터 (이미 디코딩된 이미지는 analyze_and_blur_frame 사용)"""
     try:
         image = cv2.imread(image_path)
         if image is None:
             print(f"오류: 이미지 파일을 찾을 수 없거나 손상되었습니다 - {image_path}")
             return None, []
-        blurred_image = image.copy()
     except Exception as e:
         print(f"오류: 이미지 로드 실패 - {e}")
         return None, []
+    return _analyze_and_blur(image, analyzer)
+
+
+def analyze_and_blur_frame(frame, analyzer):
+    """ImageFrame(modules.image_frame)의 디코딩된 BGR 배열로 OCR + PII 블러 (재디코딩 없음)"""
+    image = frame.bgr
+    if image is None:
+        print(f"오류: 이미지를 디코딩할 수 없습니다 - {frame.name}")
+        return None, []
+    return _analyze_and_blur(image, analyzer)
+
+
+def _analyze_and_blur(image, analyzer):
+    blurred_image = image.copy()
 
     ocr_df = extract_text_data(image)
     if ocr_df.empty:
@@ -2,6 +2,8 @@ import os
 import json
 from openai import OpenAI
 
+from modules.prompting import PromptTemplate
+
 
 class OntologyTransformer:
     """
@@ -15,12 +17,11 @@ class OntologyTransformer:
         base_dir = os.path.dirname(__file__)
         prompt_path = os.path.join(base_dir, "prompts", "transform.txt")
 
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            self.prompt_template = f.read()
+        self.prompt_template = PromptTemplate.from_file(prompt_path, name="ontology_transformer")
 
     def to_scene(self, caption: str) -> dict:
         """current_action 문장을 기반으로 Scene Ontology 생성"""
-        prompt = self.prompt_template.replace("{{caption}}", caption.strip())
+        prompt = self.prompt_template.render(caption=caption.strip())
 
         try:
             response = self.client.chat.completions.create(
@@ -4,6 +4,8 @@ import random
 from typing import Dict
 from openai import OpenAI
 
+from modules.prompting import PromptTemplate, json_block
+
 
 class PlanQAModule:
     """
@@ -17,8 +19,7 @@ class PlanQAModule:
 
         base_dir = os.path.dirname(__file__)
         prompt_path = os.path.join(base_dir, "prompts", "qa.txt")
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            self.qa_prompt = f.read()
+        self.qa_prompt = PromptTemplate.from_file(prompt_path, name="plan_qa")
 
     def _build_prompt(
         self,
@@ -28,7 +29,7 @@ class PlanQAModule:
     ) -> str:
         """LLM 입력용 프롬프트 문자열 구성"""
         goal = plan.get("goal", "")
-        plan_json = json.dumps(plan, ensure_ascii=False, indent=2)
+        plan_json = json_block(plan)
         steps = plan.get("steps", [])
         current_step = next((s for s in steps if s.get("step") == step_number), None)
 
@@ -38,16 +39,14 @@ class PlanQAModule:
         step_action = current_step.get("action", "")
         step_detail = current_step.get("detail", "")
 
-        prompt = (
-            self.qa_prompt
-            .replace("{{goal}}", goal.strip())
-            .replace("{{plan_json}}", plan_json)
-            .replace("{{step_number}}", str(step_number))
-            .replace("{{step_action}}", step_action.strip())
-            .replace("{{step_detail}}", step_detail.strip())
-            .replace("{{user_question}}", question.strip())
+        return self.qa_prompt.render(
+            goal=goal.strip(),
+            plan_json=plan_json,
+            step_number=step_number,
+            step_action=step_action.strip(),
+            step_detail=step_detail.strip(),
+            user_question=question.strip(),
         )
-        return prompt
 
     def _call_llm(self, prompt: str) -> str:
         """LLM 호출하여 답변 생성"""
@@ -3,6 +3,8 @@ import json
 from typing import Dict, List, Optional, Union
 from openai import OpenAI
 
+from modules.prompting import PromptTemplate, json_block
+
 class StepDetailer:
     """
     plan(JSON dict 또는 파일)을 받아 steps 개수만큼 LLM을 각 step별로 실행해
@@ -14,8 +16,7 @@ class StepDetailer:
 
         base_dir = os.path.dirname(__file__)
         prompt_path = os.path.join(base_dir, "prompts", "detail.txt")
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            self.detail_prompt = f.read()
+        self.detail_prompt = PromptTemplate.from_file(prompt_path, name="step_detailer")
 
     def _normalize_plan(self, plan: Dict) -> Dict:
         steps = plan.get("steps") or []
@@ -28,15 +29,13 @@ class StepDetailer:
             plan["required_resources"] = []
         return plan
 
-    def _build_prompt(self, goal: str, plan_json_str: str, step_number: int, step_action: str) -> str:
+    def _bind_plan(self, goal: str, plan_json_str: str) -> PromptTemplate:
+        """목표/전체 계획은 단계마다 같으므로 실행당 한 번만 채운다 (모든 단계 프롬프트가 같은 접두부 공유)"""
+        return self.detail_prompt.bind(goal=goal.strip(), plan_json=plan_json_str)
+
+    def _build_prompt(self, plan_prompt: PromptTemplate, step_number: int, step_action: str) -> str:
         """LLM에 넘길 프롬프트 텍스트 구성"""
-        return (
-            self.detail_prompt
-            .replace("{{goal}}", goal.strip())
-            .replace("{{plan_json}}", plan_json_str)
-            .replace("{{step_number}}", str(step_number))
-            .replace("{{step_action}}", step_action.strip())
-        )
+        return plan_prompt.render(step_number=step_number, step_action=step_action.strip())
 
     def _call_llm(self, prompt: str) -> Dict:
         """LLM 호출 -> JSON 결과(dict) 반환"""
@@ -95,7 +94,7 @@ class StepDetailer:
         goal = plan.get("goal", "")
         steps = plan["steps"]
         total_steps = plan["total_steps"]
-        plan_json_str = json.dumps(plan, ensure_ascii=False, indent=2)
+        plan_prompt = self._bind_plan(goal, json_block(plan))
 
         if print_to_console:
             print("==== 상세 지침 생성 시작 ====")
@@ -112,7 +111,7 @@ class StepDetailer:
             if print_to_console:
                 print(f"[{step_no}/{total_steps}] 단계 처리 시작: {action}")
 
-            prompt = self._build_prompt(goal, plan_json_str, step_no, action)
+            prompt = self._build_prompt(plan_prompt, step_no, action)
             try:
                 llm_result = self._call_llm(prompt)
                 detail_text = llm_result.get("detail", "").strip()
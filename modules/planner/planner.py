@@ -4,6 +4,8 @@ import requests
 from typing import List, Dict
 from openai import OpenAI
 
+from modules.prompting import PromptTemplate
+
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")   # Google Cloud API key
 GOOGLE_CSE_ID  = os.getenv("GOOGLE_CSE_ID")    # Programmable Search Engine ID (cx)
 GOOGLE_CSE_ENDPOINT = "https://www.googleapis.com/customsearch/v1"
@@ -55,8 +57,7 @@ class GoalPlanner:
 
         base_dir = os.path.dirname(__file__)
         prompt_path = os.path.join(base_dir, "prompts", "plan.txt")
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            self.prompt_template = f.read()
+        self.prompt_template = PromptTemplate.from_file(prompt_path, name="goal_planner")
 
     def search_info(self, goal: str) -> str:
         """Google Programmable Search로 절차/가이드 검색."""
@@ -82,11 +83,7 @@ class GoalPlanner:
     def make_plan(self, goal: str) -> Dict:
         """검색 → 프롬프트 → LLM → JSON 파싱"""
         info = self.search_info(goal)
-        prompt = (
-            self.prompt_template
-            .replace("{{goal}}", goal.strip())
-            .replace("{{info}}", info.strip())
-        )
+        prompt = self.prompt_template.render(goal=goal.strip(), info=info.strip())
 
         try:
             resp = self.client.chat.completions.create(
@@ -0,0 +1,13 @@
+"""
+Prompting Module
+프롬프트 템플릿을 한 번만 파싱해 재사용하고, 고정 지침을 앞에 두어
+공급자 측 프롬프트 접두부 캐시가 적용되도록 렌더링합니다.
+"""
+
+from .template import PromptTemplate, json_block, prompt_stats
+
+__all__ = [
+    "PromptTemplate",
+    "json_block",
+    "prompt_stats",
+]
@@ -0,0 +1,103 @@
+# modules/prompting/template.py
+import re
+import json
+import threading
+from typing import Dict, List, Tuple
+
+# {name} / {{name}} 자리표시자 (JSON 예시의 { "key": ... } 는 변수로 보지 않음)
+_PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}|\{(\w+)\}")
+
+Segment = Tuple[bool, str]  # (변수 여부, 고정 텍스트 또는 변수 이름)
+
+_stats: Dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+class PromptTemplate:
+    """
+    프롬프트 템플릿을 한 번만 파싱해 (고정 텍스트 / 변수) 조각으로 보관하고, 호출마다 조각만 이어 붙인다.
+    - static_prefix: 첫 변수 앞의 고정 텍스트. 호출마다 바이트 단위로 같으므로 공급자 프롬프트 캐시 대상
+      → 템플릿 파일은 고정 지침/스키마를 앞에, 호출마다 바뀌는 값을 뒤에(덜 바뀌는 값부터) 둔다.
+    - bind(**values): 여러 호출에서 같은 블록(계획 JSON 등)을 한 번만 채운 새 템플릿 (채운 값도 static_prefix에 포함)
+    - render(**values): 빠진 변수가 있으면 KeyError. 길이는 이름별로 집계되어 prompt_stats()로 보고
+    값은 다시 파싱하지 않으므로 값 안의 중괄호는 그대로 들어간다.
+    """
+    def __init__(self, text: str, name: str = "prompt"):
+        self.name = name
+        self._set_segments(self._parse(text))
+
+    @classmethod
+    def from_file(cls, path: str, name: str = "prompt") -> "PromptTemplate":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(f.read(), name=name)
+
+    @staticmethod
+    def _parse(text: str) -> List[Segment]:
+        segments: List[Segment] = []
+        pos = 0
+        for m in _PLACEHOLDER.finditer(text):
+            if m.start() > pos:
+                segments.append((False, text[pos:m.start()]))
+            segments.append((True, m.group(1) or m.group(2)))
+            pos = m.end()
+        if pos < len(text):
+            segments.append((False, text[pos:]))
+        return segments
+
+    def _set_segments(self, segments: List[Segment]):
+        merged: List[Segment] = []
+        for is_var, value in segments:
+            if not is_var and merged and not merged[-1][0]:
+                merged[-1] = (False, merged[-1][1] + value)
+            else:
+                merged.append((is_var, value))
+        self._segments = merged
+        self.variables = {value for is_var, value in merged if is_var}
+        self.static_prefix = merged[0][1] if merged and not merged[0][0] else ""
+
+    def bind(self, **values) -> "PromptTemplate":
+        bound = PromptTemplate.__new__(PromptTemplate)
+        bound.name = self.name
+        bound._set_segments([
+            (False, str(values[value])) if is_var and value in values else (is_var, value)
+            for is_var, value in self._segments
+        ])
+        return bound
+
+    def render(self, **values) -> str:
+        missing = self.variables - values.keys()
+        if missing:
+            raise KeyError(f"프롬프트 '{self.name}' 변수 누락: {sorted(missing)}")
+        text = "".join(str(values[value]) if is_var else value for is_var, value in self._segments)
+        _record(self.name, len(text), len(self.static_prefix))
+        return text
+
+
+def json_block(obj) -> str:
+    """프롬프트에 넣을 JSON (공백 없는 직렬화 → 토큰 절약, 같은 객체면 항상 같은 문자열)"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _record(name: str, chars: int, prefix_chars: int):
+    with _stats_lock:
+        s = _stats.setdefault(name, {"renders": 0, "chars": 0, "prefix_chars": 0, "max_chars": 0, "last_chars": 0})
+        s["renders"] += 1
+        s["chars"] += chars
+        s["prefix_chars"] += prefix_chars
+        s["max_chars"] = max(s["max_chars"], chars)
+        s["last_chars"] = chars
+
+
+def prompt_stats() -> Dict[str, dict]:
+    """템플릿 이름별 렌더 횟수, 평균/최대/마지막 길이(문자), 고정 접두부 비율"""
+    with _stats_lock:
+        return {
+            name: {
+                "renders": s["renders"],
+                "avg_chars": round(s["chars"] / s["renders"]),
+                "max_chars": s["max_chars"],
+                "last_chars": s["last_chars"],
+                "static_prefix_ratio": round(s["prefix_chars"] / s["chars"], 3) if s["chars"] else 0.0,
+            }
+            for name, s in _stats.items()
+        }
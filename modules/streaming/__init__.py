@@ -0,0 +1,13 @@
+"""
+Streaming Module
+토큰 단위로 도착하는 모델 응답(JSON)을 점진적으로 파싱하고,
+Server-Sent Events 형식으로 전달하기 위한 유틸을 제공합니다.
+"""
+
+from .json_stream import IncrementalJSONParser
+from .sse import format_sse
+
+__all__ = [
+    "IncrementalJSONParser",
+    "format_sse",
+]
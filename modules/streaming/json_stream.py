@@ -0,0 +1,156 @@
+# modules/streaming/json_stream.py
+import json
+from typing import List, Tuple
+
+Path = Tuple
+Event = Tuple[str, Path, object]
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    토큰 단위로 도착하는 JSON 텍스트를 조각(feed)마다 파싱해 이벤트로 반환.
+    - ("string_delta", path, text): 문자열 값에 새로 도착한 부분
+    - ("string_end", path, value): 문자열 값 완료
+    - ("value", path, value): 숫자/true/false/null 값 완료
+    - ("done", (), None): 최상위 객체/배열 완료
+    path는 최상위부터의 키/인덱스 튜플. 예) ("reasoning_steps", 0), ("final_answer",)
+    첫 '{' 또는 '[' 이전의 텍스트(```json 등)는 무시한다.
+    """
+    def __init__(self):
+        self._stack: List[list] = []  # [kind, key 또는 index] (kind: "object" | "array")
+        self._mode = "start"
+        self._chars: List[str] = []   # 현재 문자열/리터럴 누적
+        self._delta: List[str] = []   # 현재 문자열 값에서 아직 내보내지 않은 부분
+        self._escape = None           # None | "" (백슬래시 직후) | "uXXXX" 수집 중
+        self._high_surrogate = None
+
+    @property
+    def done(self) -> bool:
+        return self._mode == "done"
+
+    def feed(self, chunk: str) -> List[Event]:
+        events: List[Event] = []
+        for ch in chunk:
+            self._step(ch, events)
+        if self._mode == "string" and self._delta:
+            events.append(("string_delta", self._path(), "".join(self._delta)))
+            self._delta = []
+        return events
+
+    # ------------------------------------------------------------------
+    def _path(self) -> Path:
+        return tuple(entry[1] for entry in self._stack)
+
+    def _open(self, kind: str):
+        self._stack.append([kind, None if kind == "object" else 0])
+        self._mode = "key" if kind == "object" else "value"
+
+    def _close(self, events: List[Event]):
+        self._stack.pop()
+        if self._stack:
+            self._mode = "after_value"
+        else:
+            self._mode = "done"
+            events.append(("done", (), None))
+
+    def _step(self, ch: str, events: List[Event]):
+        mode = self._mode
+        if mode in ("string", "key_string"):
+            self._string_char(ch, events)
+        elif mode == "start":
+            if ch in "{[":
+                self._open("object" if ch == "{" else "array")
+        elif mode == "key":
+            if ch == '"':
+                self._chars = []
+                self._mode = "key_string"
+            elif ch == "}":
+                self._close(events)
+        elif mode == "colon":
+            if ch == ":":
+                self._mode = "value"
+        elif mode == "value":
+            if ch in _WHITESPACE:
+                return
+            if ch == '"':
+                self._chars = []
+                self._delta = []
+                self._mode = "string"
+            elif ch in "{[":
+                self._open("object" if ch == "{" else "array")
+            elif ch == "]" and self._stack and self._stack[-1][0] == "array":
+                self._close(events)  # 빈 배열
+            else:
+                self._chars = [ch]
+                self._mode = "literal"
+        elif mode == "literal":
+            if ch in _WHITESPACE or ch in ",}]":
+                text = "".join(self._chars)
+                try:
+                    value = json.loads(text)
+                except ValueError:
+                    value = text
+                events.append(("value", self._path(), value))
+                self._mode = "after_value"
+                self._step(ch, events)
+            else:
+                self._chars.append(ch)
+        elif mode == "after_value":
+            if ch == ",":
+                top = self._stack[-1]
+                if top[0] == "array":
+                    top[1] += 1
+                    self._mode = "value"
+                else:
+                    self._mode = "key"
+            elif ch in "}]":
+                self._close(events)
+        # mode == "done": 이후 텍스트(```) 무시
+
+    def _string_char(self, ch: str, events: List[Event]):
+        if self._escape is None:
+            if ch == "\\":
+                self._escape = ""
+            elif ch == '"':
+                self._end_string(events)
+            else:
+                self._append(ch)
+        elif self._escape == "":
+            if ch == "u":
+                self._escape = "u"
+            else:
+                self._escape = None
+                self._append(_ESCAPES.get(ch, ch))
+        else:
+            self._escape += ch
+            if len(self._escape) == 5:
+                code = int(self._escape[1:], 16)
+                self._escape = None
+                if 0xD800 <= code < 0xDC00:
+                    self._high_surrogate = code
+                elif 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                    self._append(chr(0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)))
+                    self._high_surrogate = None
+                else:
+                    self._append(chr(code))
+
+    def _append(self, ch: str):
+        self._chars.append(ch)
+        if self._mode == "string":
+            self._delta.append(ch)
+
+    def _end_string(self, events: List[Event]):
+        text = "".join(self._chars)
+        if self._mode == "key_string":
+            self._stack[-1][1] = text
+            self._mode = "colon"
+            return
+        path = self._path()
+        if self._delta:
+            events.append(("string_delta", path, "".join(self._delta)))
+            self._delta = []
+        events.append(("string_end", path, text))
+        self._mode = "after_value"
@@ -0,0 +1,7 @@
+# modules/streaming/sse.py
+import json
+
+
+def format_sse(event: str, data) -> str:
+    """Server-Sent Events 메시지 1개 (data는 JSON 한 줄로 직렬화)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,134 @@
+# tests/test_async_integration_service.py
+# 로컬 가짜 OpenAI 서버(client_kwargs["base_url"])를 대상으로 AsyncIntegrationService 확인
+# (torch / faiss / presidio 등 분석 의존성이 설치되지 않은 환경에서는 skip)
+import os
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+for _dep in ("torch", "torchvision", "faiss", "sklearn", "cv2", "pytesseract", "presidio_analyzer", "dotenv"):
+    pytest.importorskip(_dep)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from openai import AsyncOpenAI  # noqa: E402
+
+from config_loader import config  # noqa: E402
+from app.async_integration_service import AsyncIntegrationService  # noqa: E402
+
+QA_OUTPUT = json.dumps({"reasoning_steps": ["화면을 본다"], "final_answer": "**코딩 중**"}, ensure_ascii=False)
+PREDICT_OUTPUT = json.dumps(
+    {"predicted_actions": ["a1", "a2", "a3"], "predicted_questions": ["q1", "q2", "q3"]}, ensure_ascii=False
+)
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    """/v1/embeddings, /v1/responses (일반 + stream) 만 흉내 내는 서버. 받은 요청은 requests에 기록"""
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.requests = []
+        self.base_url = f"http://127.0.0.1:{self.server_port}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, body))
+        if self.path.endswith("/embeddings"):
+            dim = config["vectordb"]["dim"]
+            # 입력 길이를 첫 성분에 담아 호출자가 자기 입력의 결과를 받았는지 확인
+            data = [
+                {"object": "embedding", "index": i, "embedding": [float(len(text))] + [0.0] * (dim - 1)}
+                for i, text in enumerate(body["input"])
+            ]
+            return self._json({"object": "list", "model": body["model"], "data": data,
+                               "usage": {"prompt_tokens": 1, "total_tokens": 1}})
+
+        text = PREDICT_OUTPUT if "predicted_actions" in json.dumps(body, ensure_ascii=False) else QA_OUTPUT
+        if body.get("stream"):
+            events = "".join(
+                "event: response.output_text.delta\n"
+                f"data: {json.dumps({'type': 'response.output_text.delta', 'delta': text[i:i + 7], 'item_id': 'm', 'output_index': 0, 'content_index': 0, 'sequence_number': i, 'logprobs': []})}\n\n"
+                for i in range(0, len(text), 7)
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Content-Length", str(len(events)))
+            self.end_headers()
+            self.wfile.write(events)
+            return
+        self._json({
+            "id": "resp", "object": "response", "created_at": 0, "model": body["model"], "status": "completed",
+            "parallel_tool_calls": True, "tool_choice": "auto", "tools": [],
+            "output": [{"type": "message", "id": "msg", "role": "assistant", "status": "completed",
+                        "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+        })
+
+    def _json(self, obj):
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def fake_openai():
+    server = FakeOpenAI()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def service(fake_openai, tmp_path, monkeypatch):
+    integration = config["integration"]
+    monkeypatch.setitem(integration["description_cache"], "path", str(tmp_path / "descriptions.sqlite3"))
+    monkeypatch.setitem(integration["embedding_cache"], "path", str(tmp_path / "embeddings.sqlite3"))
+    monkeypatch.setitem(config["vectordb"], "path", str(tmp_path / "vectorstore" / "description_index.meta"))
+    monkeypatch.setitem(integration["micro_batch"], "max_wait_ms", 50)
+    return AsyncIntegrationService(base_url=fake_openai.base_url)
+
+
+def test_only_async_clients_are_created(service, fake_openai):
+    for module in (service.image_desc, service.embed_gen, service.action_predictor,
+                   service.describe_predictor, service.history_qa):
+        assert isinstance(module.client, AsyncOpenAI)
+        assert str(module.client.base_url).rstrip("/") == fake_openai.base_url
+
+
+def test_concurrent_embeds_share_one_request_without_batcher_thread(service, fake_openai):
+    texts = ["a", "bb", "ccc", "dddd"]
+
+    async def embed_all():
+        return await asyncio.gather(*(service._embed(t) for t in texts))
+
+    embeddings = asyncio.run(embed_all())
+
+    assert [e[0] for e in embeddings] == [1.0, 2.0, 3.0, 4.0]
+    embed_requests = [body for path, body in fake_openai.requests if path.endswith("/embeddings")]
+    assert len(embed_requests) == 1 and embed_requests[0]["input"] == texts
+    assert not any(t.name == "embeddings-batcher" for t in threading.enumerate())
+
+
+def test_answer_question(service):
+    context = {"current": "코드 편집기에서 함수를 작성 중", "recent": "X", "similar": "X"}
+    result = asyncio.run(service.answer_question("지금 뭐 하고 있어?", user_id=1, context=context))
+    assert result["answer"] == "**코딩 중**"
+
+
+def test_streamed_prediction_reports_partial_actions(service):
+    partials = []
+    output = asyncio.run(service._predict(
+        "코드 편집기에서 함수를 작성 중", [], "X", "X",
+        on_prediction=lambda p: partials.append(list(p["predicted_actions"])),
+    ))
+    assert json.loads(output)["predicted_actions"] == ["a1", "a2", "a3"]
+    assert partials == [["a1"], ["a1", "a2"], ["a1", "a2", "a3"]]
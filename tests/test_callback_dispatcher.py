@@ -0,0 +1,114 @@
+# tests/test_callback_dispatcher.py
+# 로컬 HTTP 서버 대상 CallbackDispatcher 유저별 전송 순서와 낡은 부분 결과 폐기 확인
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.callback_dispatcher import CallbackDispatcher
+
+
+class FakeSpring(ThreadingHTTPServer):
+    """받은 payload를 순서대로 기록. fail_first[(user_id, seq)]번만큼 503으로 응답"""
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.received = []
+        self.attempts = []
+        self.fail_first = {}
+        self.lock = threading.Lock()
+        self.base_url = f"http://127.0.0.1:{self.server_port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        key = (payload["user_id"], payload["seq"])
+        with self.server.lock:
+            self.server.attempts.append(key)
+            failing = self.server.fail_first.get(key, 0) > 0
+            if failing:
+                self.server.fail_first[key] -= 1
+            else:
+                self.server.received.append(payload)
+        self.send_response(503 if failing else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def spring():
+    server = FakeSpring()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def dispatcher(spring):
+    d = CallbackDispatcher(spring.base_url, senders=4, max_retries=5, backoff_base_sec=0.2, backoff_max_sec=0.2)
+    d.start()
+    return d
+
+
+def _payload(user_id, seq, partial, window_id="w1"):
+    return {"user_id": user_id, "window_id": f"{user_id}-{window_id}", "seq": seq, "partial": partial}
+
+
+def _wait_until(cond, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_same_user_is_sent_in_submit_order_across_retries(spring, dispatcher):
+    spring.fail_first[(1, 1)] = 2  # 첫 부분 결과가 재시도되는 동안 다음 부분 결과가 앞지르면 안 됨
+    for seq in (1, 2, 3):
+        dispatcher.submit(_payload(1, seq, partial=True))
+
+    assert _wait_until(lambda: len(spring.received) == 3)
+    assert [p["seq"] for p in spring.received] == [1, 2, 3]
+
+
+def test_final_result_drops_queued_and_retrying_partials(spring, dispatcher):
+    spring.fail_first[(1, 1)] = 1
+    dispatcher.submit(_payload(1, 1, partial=True))
+    dispatcher.submit(_payload(1, 2, partial=True))
+    assert _wait_until(lambda: (1, 1) in spring.attempts)  # 첫 부분 결과가 재시도 대기 중
+    dispatcher.submit(_payload(1, 3, partial=False))
+
+    assert _wait_until(lambda: any(not p["partial"] for p in spring.received))
+    assert [(p["seq"], p["partial"]) for p in spring.received] == [(3, False)]
+    assert dispatcher.qsize() == 0
+
+
+def test_partials_of_other_windows_are_kept(spring, dispatcher):
+    dispatcher.submit(_payload(1, 1, partial=False, window_id="old"))
+    dispatcher.submit(_payload(1, 1, partial=True, window_id="new"))  # 이전 윈도우의 최종 결과와 무관
+    assert _wait_until(lambda: len(spring.received) == 2)
+    dispatcher.submit(_payload(1, 2, partial=False, window_id="new"))
+
+    assert _wait_until(lambda: len(spring.received) == 3)
+    assert [(p["window_id"], p["seq"]) for p in spring.received] == [("1-old", 1), ("1-new", 1), ("1-new", 2)]
+
+
+def test_retrying_user_does_not_block_other_users_on_the_same_sender(spring):
+    dispatcher = CallbackDispatcher(spring.base_url, senders=1, max_retries=5, backoff_base_sec=0.3, backoff_max_sec=0.3)
+    dispatcher.start()
+    spring.fail_first[(1, 1)] = 2
+    for seq in (1, 2):
+        dispatcher.submit(_payload(1, seq, partial=False, window_id=f"w{seq}"))
+    assert _wait_until(lambda: (1, 1) in spring.attempts)  # 유저 1은 재시도 대기 중
+    for seq in (1, 2, 3):
+        dispatcher.submit(_payload(2, seq, partial=False, window_id=f"w{seq}"))
+
+    assert _wait_until(lambda: len(spring.received) == 5)
+    assert [(p["user_id"], p["seq"]) for p in spring.received] == [(2, 1), (2, 2), (2, 3), (1, 1), (1, 2)]
+    assert dispatcher.stats()["retrying"] == 0
@@ -0,0 +1,137 @@
+# tests/test_integration_service.py
+# 행동 예측 스트림이 잘리거나 끊겼을 때 파싱 단계가 완료된 항목을 복구하는지,
+# QA 답변 캐시가 정확 일치는 임베딩 없이, 의미 조회는 모델 호출 전에 처리하는지 확인 (모델 호출 없음)
+import json
+
+import pytest
+
+pytest.importorskip("modules", reason="requirements.txt 의존성이 설치되지 않음")
+from app.integration_service import IntegrationService  # noqa: E402
+from modules.history_qa import SemanticAnswerCache  # noqa: E402
+
+TRUNCATED = '```json\n{"predicted_actions": ["코드 저장", "테스트 실행", "커밋 메시지 작'
+
+
+class _StreamingPredictor:
+    """predict_stream이 chunks를 yield한 뒤 error가 있으면 예외 (연결 끊김 가정)"""
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    def predict_stream(self, current_context, recent_context, similar_context):
+        yield from self.chunks
+        if self.error is not None:
+            raise self.error
+
+
+def _service(predictor=None) -> IntegrationService:
+    service = IntegrationService.__new__(IntegrationService)  # 모델/벡터DB 초기화 생략
+    service.stream_predictions = True
+    service.action_predictor = predictor
+    return service
+
+
+CONTEXT = {"current": "코드 편집기", "recent": "X", "similar": "X"}
+ANSWER = json.dumps({"reasoning_steps": ["화면을 본다"], "final_answer": "코딩 중"}, ensure_ascii=False)
+
+
+class _FakeQA:
+    """answer / answer_stream 호출 수를 세는 HistoryQA 대역"""
+    def __init__(self):
+        self.calls = 0
+
+    def answer(self, **kwargs):
+        self.calls += 1
+        return ANSWER
+
+    def answer_stream(self, **kwargs):
+        self.calls += 1
+        for i in range(0, len(ANSWER), 8):
+            yield ANSWER[i:i + 8]
+
+
+@pytest.fixture
+def qa_service():
+    service = _service()
+    service.history_qa = _FakeQA()
+    service.answer_cache = SemanticAnswerCache(threshold=0.95)
+    service.embedded = []
+    # 같은 뜻의 질문은 같은 벡터가 되도록 "뭐 해" 포함 여부로 임베딩
+    service._embed = lambda text: service.embedded.append(text) or ([1.0, 0.0] if "뭐 해" in text else [0.0, 1.0])
+    return service
+
+
+def test_exact_answer_hit_skips_embedding_and_model(qa_service):
+    first = qa_service.answer_question("지금 뭐 해?", user_id=1, context=CONTEXT)
+    assert first["answer"] == "코딩 중"
+    assert qa_service.history_qa.calls == 1 and qa_service.embedded == ["지금 뭐 해?"]
+
+    again = qa_service.answer_question("  지금   뭐 해? ", user_id=1, context=CONTEXT)
+    assert again["answer"] == "코딩 중" and again["question"] == "지금   뭐 해?"
+    assert qa_service.history_qa.calls == 1 and qa_service.embedded == ["지금 뭐 해?"]
+    assert qa_service.answer_cache.stats()["exact_hits"] == 1
+
+
+def test_semantic_hit_skips_model(qa_service):
+    qa_service.answer_question("지금 뭐 해?", user_id=1, context=CONTEXT)
+    assert qa_service.history_qa.calls == 1
+
+    similar = qa_service.answer_question("너 지금 뭐 해", user_id=1, context=CONTEXT)
+    assert similar["answer"] == "코딩 중" and similar["question"] == "너 지금 뭐 해"
+    assert qa_service.history_qa.calls == 1
+    assert qa_service.embedded == ["지금 뭐 해?", "너 지금 뭐 해"]
+
+
+def test_answer_cache_is_scoped_by_context(qa_service):
+    qa_service.answer_question("지금 뭐 해?", user_id=1, context=CONTEXT)
+    qa_service.answer_question("지금 뭐 해?", user_id=1, context={**CONTEXT, "current": "브라우저"})
+    assert qa_service.history_qa.calls == 2
+
+
+def test_stream_is_not_opened_on_cache_hit(qa_service):
+    events = list(qa_service.answer_question_stream("지금 뭐 해?", user_id=1, context=CONTEXT))
+    assert events[-1][0] == "done" and any(name == "answer" for name, _ in events)
+    assert qa_service.history_qa.calls == 1
+
+    events = list(qa_service.answer_question_stream("너 지금 뭐 해", user_id=1, context=CONTEXT))
+    assert [name for name, _ in events] == ["start", "done"]
+    assert events[-1][1]["answer"] == "코딩 중"
+
+    events = list(qa_service.answer_question_stream("  지금 뭐 해? ", user_id=1, context=CONTEXT))
+    assert [name for name, _ in events] == ["start", "done"]
+    assert qa_service.embedded == ["지금 뭐 해?", "너 지금 뭐 해"]
+    assert qa_service.history_qa.calls == 1
+
+
+def test_parse_recovers_completed_items_from_truncated_output():
+    prediction = _service()._parse_action_prediction(TRUNCATED)
+    assert prediction == {"predicted_actions": ["코드 저장", "테스트 실행"], "predicted_questions": []}
+
+
+def test_parse_recovers_questions_after_complete_actions():
+    text = '{"predicted_actions": ["a1", "a2", "a3"], "predicted_questions": ["q1", "q2'
+    prediction = _service()._parse_action_prediction(text)
+    assert prediction == {"predicted_actions": ["a1", "a2", "a3"], "predicted_questions": ["q1"]}
+
+
+def test_parse_of_unrecoverable_output_is_empty():
+    for text in ("", "   ", "모델이 JSON 대신 문장을 반환", '{"predicted_actions": ["a'):
+        assert _service()._parse_action_prediction(text) == {"predicted_actions": [], "predicted_questions": []}
+
+
+def test_interrupted_stream_is_parsed_up_to_the_cut():
+    chunks = [TRUNCATED[i:i + 5] for i in range(0, len(TRUNCATED), 5)]
+    service = _service(_StreamingPredictor(chunks, error=ConnectionError("stream closed")))
+    partials = []
+
+    output = service._predict("설명", [], "X", "X", on_prediction=lambda p: partials.append(list(p["predicted_actions"])))
+
+    assert output == TRUNCATED
+    assert partials == [["코드 저장"], ["코드 저장", "테스트 실행"]]
+    assert service._parse_action_prediction(output)["predicted_actions"] == ["코드 저장", "테스트 실행"]
+
+
+def test_stream_failing_before_any_output_raises():
+    service = _service(_StreamingPredictor([], error=ConnectionError("refused")))
+    with pytest.raises(ConnectionError):
+        service._predict("설명", [], "X", "X")
@@ -0,0 +1,123 @@
+# tests/test_json_stream.py
+# IncrementalJSONParser 이벤트로 다시 만든 값이 json.loads 결과와 같은지 (조각 분할 위치와 무관하게) 확인
+import json
+import random
+
+import pytest
+
+# modules 패키지는 모든 하위 모듈(torch, faiss 등)을 함께 import → 의존성이 없으면 skip
+pytest.importorskip("modules", reason="requirements.txt 의존성이 설치되지 않음")
+from modules.streaming import IncrementalJSONParser  # noqa: E402
+
+
+def _feed(text, sizes):
+    """text를 sizes 길이 조각으로 나눠 넣고 전체 이벤트 반환"""
+    parser = IncrementalJSONParser()
+    events, pos = [], 0
+    for size in sizes:
+        events.extend(parser.feed(text[pos:pos + size]))
+        pos += size
+    events.extend(parser.feed(text[pos:]))
+    return parser, events
+
+
+def _rebuild(events):
+    """value / string_end 이벤트를 path 위치에 채워 값 재구성 (빈 객체/배열은 표현되지 않음)"""
+    root = None
+    for kind, path, value in events:
+        if kind not in ("value", "string_end"):
+            continue
+        if root is None:
+            root = [] if isinstance(path[0], int) else {}
+        node = root
+        for key, next_key in zip(path, path[1:]):
+            if isinstance(node, list) and key == len(node):
+                node.append([] if isinstance(next_key, int) else {})
+            elif isinstance(node, dict) and key not in node:
+                node[key] = [] if isinstance(next_key, int) else {}
+            node = node[key]
+        if isinstance(node, list):
+            assert path[-1] == len(node)
+            node.append(value)
+        else:
+            node[path[-1]] = value
+    return root
+
+
+def _string_deltas(events):
+    """path별 string_delta를 이어 붙인 결과"""
+    joined = {}
+    for kind, path, value in events:
+        if kind == "string_delta":
+            joined[path] = joined.get(path, "") + value
+    return joined
+
+
+DOCS = [
+    {"reasoning_steps": ["화면을 본다", "코드를 읽는다"], "final_answer": "**코딩 중**"},
+    {"escapes": "따옴표 \" 역슬래시 \\ 슬래시 / 줄\n탭\t복귀\r\b\f", "unicode": "é 한글 😀 \u0001"},
+    {"nested": [[1, 2], [3, [4.5, -6e3]], [[["깊다"]]]], "flags": [True, False, None]},
+    [{"a": 1}, {"b": "x", "c": [0, "y"]}, "z", 7],
+]
+
+
+@pytest.mark.parametrize("doc", DOCS)
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_events_match_json_loads_for_any_chunking(doc, ensure_ascii):
+    text = json.dumps(doc, ensure_ascii=ensure_ascii)
+    rng = random.Random(len(text))
+    chunkings = [[1] * len(text), [len(text)]] + [
+        [rng.randint(1, 6) for _ in range(len(text))] for _ in range(20)
+    ]
+    for sizes in chunkings:
+        parser, events = _feed(text, sizes)
+        assert parser.done
+        assert events[-1] == ("done", (), None)
+        assert _rebuild(events) == json.loads(text)
+
+
+def test_string_deltas_concatenate_to_final_value():
+    text = json.dumps({"final_answer": "줄1\n줄2 \"인용\" 😀"}, ensure_ascii=True)
+    _, events = _feed(text, [3] * len(text))
+    ends = {path: value for kind, path, value in events if kind == "string_end"}
+    assert _string_deltas(events) == ends
+
+
+@pytest.mark.parametrize("split", ["\\u00", "\\ud83d", "\\ud83d\\u", "\\", "tr", "-1", "\"fin"])
+def test_chunk_split_inside_token(split):
+    text = '{"final": "a\\u00e9\\ud83d\\ude00\\\\b", "flag": true, "n": -12.5}'
+    cut = text.index(split) + len(split)
+    _, events = _feed(text, [cut])
+    assert _rebuild(events) == json.loads(text)
+
+
+def test_text_around_json_is_ignored():
+    text = '```json\n{"predicted_actions": ["a"]}\n```'
+    parser, events = _feed(text, [5] * len(text))
+    assert parser.done
+    assert _rebuild(events) == {"predicted_actions": ["a"]}
+
+
+def test_empty_containers():
+    parser, events = _feed('{"a": [], "b": {}, "c": [[]], "d": 1}', [])
+    assert parser.done
+    assert _rebuild(events) == {"d": 1}
+
+
+def test_truncated_input_reports_completed_values_only():
+    text = '{"predicted_actions": ["첫 행동", "둘째 행동", "셋째 행'
+    parser, events = _feed(text, [4] * len(text))
+    assert not parser.done
+    completed = [(path, value) for kind, path, value in events if kind == "string_end"]
+    assert completed == [(("predicted_actions", 0), "첫 행동"), (("predicted_actions", 1), "둘째 행동")]
+    # 끝나지 않은 문자열은 도착한 부분만 delta로 전달
+    assert _string_deltas(events)[("predicted_actions", 2)] == "셋째 행"
+
+
+def test_truncated_inside_escape_and_literal():
+    parser, events = _feed('{"a": 12, "b": tru', [])
+    assert not parser.done
+    assert [(p, v) for k, p, v in events if k == "value"] == [(("a",), 12)]
+    parser, events = _feed('{"a": "x\\u00', [])
+    assert not parser.done
+    assert _string_deltas(events) == {("a",): "x"}
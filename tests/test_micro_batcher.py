@@ -0,0 +1,61 @@
+# tests/test_micro_batcher.py
+# 배치 실패 시 요청별 재시도로 실패한 요청의 호출자에게만 예외가 전달되는지 확인
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.micro_batcher import AsyncMicroBatcher, MicroBatcher
+
+
+def _upper(items):
+    if "bad" in items:
+        raise ValueError("bad item")
+    return [item.upper() for item in items]
+
+
+def test_results_are_split_per_caller():
+    calls = []
+    batcher = MicroBatcher(lambda items: calls.append(list(items)) or _upper(items), max_wait_ms=100)
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(batcher.map, items) for items in (["a"], ["b", "c"], ["d"])]
+        results = [f.result() for f in futures]
+    assert results == [["A"], ["B", "C"], ["D"]]
+    assert len(calls) == 1 and sorted(calls[0]) == ["a", "b", "c", "d"]
+
+
+def test_bad_item_fails_only_its_caller():
+    batcher = MicroBatcher(_upper, max_wait_ms=100)
+    futures = [batcher.submit_many(items) for items in (["a"], ["bad", "b"], ["c"])]
+    assert futures[0].result() == ["A"]
+    with pytest.raises(ValueError):
+        futures[1].result()
+    assert futures[2].result() == ["C"]
+
+
+def test_single_request_failure_is_not_retried():
+    calls = []
+
+    def fail(items):
+        calls.append(items)
+        raise RuntimeError("down")
+
+    batcher = MicroBatcher(fail, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.submit("a")
+    assert len(calls) == 1
+
+
+def test_async_bad_item_fails_only_its_caller():
+    async def upper(items):
+        return _upper(items)
+
+    async def run():
+        batcher = AsyncMicroBatcher(upper, max_wait_ms=10)
+        return await asyncio.gather(
+            batcher.submit("a"), batcher.submit("bad"), batcher.map(["b", "c"]), return_exceptions=True
+        )
+
+    a, bad, bc = asyncio.run(run())
+    assert a == "A" and bc == ["B", "C"]
+    assert isinstance(bad, ValueError)
@@ -0,0 +1,85 @@
+# tests/test_prompt_template.py
+# PromptTemplate 자리표시자 파싱, 변수 누락, 값 재파싱 금지, bind() 고정 접두부 확인
+import pytest
+
+pytest.importorskip("modules", reason="requirements.txt 의존성이 설치되지 않음")
+from modules.prompting import PromptTemplate, json_block, prompt_stats  # noqa: E402
+
+
+def test_single_and_double_brace_placeholders():
+    t = PromptTemplate("지침\n현재: {current}\n질문: {{question}}", name="t-parse")
+    assert t.variables == {"current", "question"}
+    assert t.static_prefix == "지침\n현재: "
+    assert t.render(current="편집기", question="뭐 해?") == "지침\n현재: 편집기\n질문: 뭐 해?"
+
+
+def test_json_example_braces_are_not_variables():
+    text = '출력 형식:\n{ "predicted_actions": ["..."], "n": {"a": 1} }\n입력: {context}'
+    t = PromptTemplate(text, name="t-json")
+    assert t.variables == {"context"}
+    assert t.render(context="X") == text.replace("{context}", "X")
+    assert t.static_prefix == text[:text.index("{context}")]
+
+
+def test_repeated_variable_is_filled_everywhere():
+    t = PromptTemplate("{a}-{{a}}-{a}", name="t-repeat")
+    assert t.variables == {"a"}
+    assert t.render(a="x") == "x-x-x"
+    assert t.static_prefix == ""
+
+
+def test_missing_variable_raises_key_error():
+    t = PromptTemplate("{current} / {question}", name="t-missing")
+    with pytest.raises(KeyError) as e:
+        t.render(current="X")
+    assert "t-missing" in str(e.value) and "question" in str(e.value)
+
+
+def test_extra_values_are_ignored():
+    assert PromptTemplate("{a}", name="t-extra").render(a=1, b=2) == "1"
+
+
+def test_substituted_values_are_not_rescanned():
+    t = PromptTemplate("맥락: {context}\n질문: {question}", name="t-rescan")
+    # 사용자 입력에 자리표시자 모양의 텍스트가 있어도 다른 변수로 치환되지 않음
+    out = t.render(context="{question} {{question}} {unknown}", question="진짜 질문")
+    assert out == "맥락: {question} {{question}} {unknown}\n질문: 진짜 질문"
+
+
+def test_bind_fills_values_into_static_prefix():
+    t = PromptTemplate("지침 {plan} 단계 {step} 끝", name="t-bind")
+    plan = json_block({"steps": ["a", "b"], "note": "{step}"})
+    bound = t.bind(plan=plan)
+
+    assert bound.variables == {"step"}
+    assert bound.static_prefix == f"지침 {plan} 단계 "
+    assert bound.render(step=1) == t.render(plan=plan, step=1)
+    # 바인딩한 값 안의 {step}은 변수가 아님
+    assert bound.render(step=2).count("{step}") == 1
+    # 원본 템플릿은 바뀌지 않음
+    assert t.variables == {"plan", "step"} and t.static_prefix == "지침 "
+
+
+def test_bound_templates_share_prefix_across_calls():
+    t = PromptTemplate("{system}\n---\n{user}", name="t-share")
+    bound = t.bind(system="고정 지침")
+    rendered = [bound.render(user=u) for u in ("질문1", "두 번째 질문")]
+    assert all(r.startswith(bound.static_prefix) for r in rendered)
+    assert bound.static_prefix == "고정 지침\n---\n"
+
+
+def test_bind_all_variables_leaves_static_text():
+    bound = PromptTemplate("A{x}B{y}C", name="t-full").bind(x=1, y=2)
+    assert bound.variables == set()
+    assert bound.static_prefix == "A1B2C"
+    assert bound.render() == "A1B2C"
+
+
+def test_render_is_recorded_in_prompt_stats():
+    t = PromptTemplate("고정{v}", name="t-stats")
+    t.render(v="12")
+    t.render(v="1234")
+    stats = prompt_stats()["t-stats"]
+    assert stats["renders"] == 2
+    assert stats["max_chars"] == 6 and stats["last_chars"] == 6
+    assert stats["static_prefix_ratio"] == round(4 / 10, 3)
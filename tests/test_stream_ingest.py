@@ -0,0 +1,166 @@
+# tests/test_stream_ingest.py
+# 로컬 redis-server 대상 StreamIngestor 동작 확인 (연결할 수 없으면 skip)
+#   REDIS_HOST=localhost REDIS_PORT=6379 python -m pytest tests/test_stream_ingest.py
+import os
+import time
+import threading
+
+import pytest
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+from app.stream_ingest import StreamIngestor, k_lease, k_stream
+
+TEST_GROUP = "mindtrack-test"
+TEST_REGISTRY = b"test:active:ingest"
+TEST_UID = 990101
+
+
+def _client(**kwargs) -> redis.Redis:
+    return redis.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"), port=int(os.getenv("REDIS_PORT", "6379")),
+        db=int(os.getenv("REDIS_TEST_DB", "15")), **kwargs,
+    )
+
+
+def _reachable() -> bool:
+    try:
+        return bool(_client(socket_connect_timeout=0.5, retry=Retry(NoBackoff(), 0)).ping())
+    except redis.ConnectionError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _reachable(), reason="redis-server에 연결할 수 없음")
+
+
+@pytest.fixture
+def r():
+    client = _client()
+    keys = [k_stream(TEST_UID), k_lease(TEST_UID), TEST_REGISTRY]
+    client.delete(*keys)
+    yield client
+    client.delete(*keys)
+
+
+def _ingestor(r, consumer, received, lease_ms=1000, registry_key=None):
+    def on_entries(uid, img_ids, entry_ids):
+        received.append((consumer, img_ids, entry_ids))
+    return StreamIngestor(
+        r, on_entries, group=TEST_GROUP, consumer=consumer,
+        lease_ms=lease_ms, block_ms=50, registry_key=registry_key,
+    )
+
+
+def _start(ingestor):
+    thread = threading.Thread(target=ingestor.run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_until(cond, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _ids(received, consumer=None):
+    return [i for c, ids, _ in received if consumer in (None, c) for i in ids]
+
+
+def test_lease_is_exclusive(r):
+    received = []
+    a = _ingestor(r, "consumer-a", received)
+    b = _ingestor(r, "consumer-b", received)
+
+    assert a.acquire(TEST_UID)
+    assert not b.acquire(TEST_UID)
+    assert r.get(k_lease(TEST_UID)) == b"consumer-a"
+    assert a.owns(TEST_UID) and not b.owns(TEST_UID)
+
+
+def test_heartbeat_keeps_lease_alive(r):
+    received = []
+    a = _ingestor(r, "consumer-a", received, lease_ms=300)
+    assert a.acquire(TEST_UID)
+    _start(a)
+    try:
+        time.sleep(1.0)  # 리스 만료 시간의 3배 이상
+        assert r.get(k_lease(TEST_UID)) == b"consumer-a"
+        assert not _ingestor(r, "consumer-b", received).acquire(TEST_UID)
+    finally:
+        a.stop()
+
+
+def test_crashed_consumer_entries_are_reclaimed_in_order(r):
+    received = []
+    a = _ingestor(r, "consumer-a", received, lease_ms=300)
+    for i in range(3):
+        r.xadd(k_stream(TEST_UID), {"img_id": i})
+    assert a.acquire(TEST_UID)
+    _start(a)
+    assert _wait_until(lambda: _ids(received, "consumer-a") == [0, 1, 2])
+    a.stop()  # ACK 없이 종료 (크래시 가정) → 하트비트 중단
+
+    r.xadd(k_stream(TEST_UID), {"img_id": 3})
+    b = _ingestor(r, "consumer-b", received, lease_ms=300)
+    assert _wait_until(lambda: b.acquire(TEST_UID))  # a의 리스 만료 후 획득
+    # XAUTOCLAIM으로 회수한 엔트리가 새 엔트리보다 먼저 전달됨
+    assert _ids(received, "consumer-b") == [0, 1, 2]
+    _start(b)
+    try:
+        assert _wait_until(lambda: _ids(received, "consumer-b") == [0, 1, 2, 3])
+    finally:
+        b.stop()
+
+
+def test_entries_stay_pending_until_ack(r):
+    received = []
+    a = _ingestor(r, "consumer-a", received)
+    for i in range(2):
+        r.xadd(k_stream(TEST_UID), {"img_id": i})
+    assert a.acquire(TEST_UID)
+    _start(a)
+    try:
+        assert _wait_until(lambda: _ids(received) == [0, 1])
+        assert r.xpending(k_stream(TEST_UID), TEST_GROUP)["pending"] == 2
+
+        entry_ids = [e for _, _, eids in received for e in eids]
+        a.ack(TEST_UID, entry_ids)
+        assert r.xpending(k_stream(TEST_UID), TEST_GROUP)["pending"] == 0
+        assert r.xlen(k_stream(TEST_UID)) == 0
+    finally:
+        a.stop()
+
+
+def test_release_with_leftover_entries_reregisters_user(r):
+    received = []
+    a = _ingestor(r, "consumer-a", received, registry_key=TEST_REGISTRY)
+    assert a.acquire(TEST_UID)
+    r.xadd(k_stream(TEST_UID), {"img_id": 7})  # 해제 직전에 들어온 엔트리
+
+    a.release(TEST_UID)
+
+    assert not a.owns(TEST_UID)
+    assert r.get(k_lease(TEST_UID)) is None
+    registered = r.xrange(TEST_REGISTRY)
+    assert [fields[b"uid"] for _, fields in registered] == [str(TEST_UID).encode()]
+
+    # 다른 컨슈머가 레지스트리로 유저를 인수해 남은 엔트리를 읽음
+    b = _ingestor(r, "consumer-b", received, registry_key=TEST_REGISTRY)
+    _start(b)
+    try:
+        assert _wait_until(lambda: b.owns(TEST_UID) and _ids(received, "consumer-b") == [7])
+    finally:
+        b.stop()
+
+
+def test_release_of_empty_stream_deletes_it(r):
+    a = _ingestor(r, "consumer-a", [], registry_key=TEST_REGISTRY)
+    assert a.acquire(TEST_UID)
+    a.release(TEST_UID)
+    assert not r.exists(k_stream(TEST_UID))
+    assert not r.exists(TEST_REGISTRY)  # 남은 엔트리가 없으면 재등록하지 않음